@@ -1,15 +1,26 @@
+from typing import Dict, Optional
 try:
     from schemas.models import Event
 except Exception:
     from backend.schemas.models import Event  # type: ignore
 
-def apply_rules(events: list[Event]) -> list[Event]:
-    # Toy rule: >= 5 "fail" messages from same source => brute-force hint
-    fails = {}
+BRUTE_FORCE_FAILS = 5
+
+def count_failures(events: list[Event], counts: Dict[str, int]) -> Dict[str, int]:
+    # "fail" messages per source; counts is updated in place so it can be carried across batches
     for e in events:
         if "fail" in (e.summary or "").lower():
-            fails[e.source] = fails.get(e.source, 0) + 1
+            counts[e.source] = counts.get(e.source, 0) + 1
+    return counts
+
+def tag_brute_force(events: list[Event], counts: Dict[str, int]) -> list[Event]:
     for e in events:
-        if fails.get(e.source, 0) >= 5 and "brute" not in (e.summary or "").lower():
+        if counts.get(e.source, 0) >= BRUTE_FORCE_FAILS and "brute" not in (e.summary or "").lower():
             e.summary += " [rule:possible brute-force]"
     return events
+
+def apply_rules(events: list[Event], counts: Optional[Dict[str, int]] = None) -> list[Event]:
+    # Toy rule: >= 5 "fail" messages from same source => brute-force hint.
+    # Pass the same `counts` dict across calls to keep state when events arrive in batches.
+    fails = count_failures(events, {} if counts is None else counts)
+    return tag_brute_force(events, fails)
@@ -0,0 +1,286 @@
+"""
+Streaming ingest of evidence bundles: plain logs, .gz, .zip, .tar(.gz|.bz2|.xz).
+
+Nothing is decompressed into memory as a whole. Each log inside a bundle
+becomes a lazily-read line stream, parsed event by event and tagged with its
+origin ("bundle.zip:var/log/auth.log" in event.raw["file"]).
+
+Streams are spread over SENTINEL_INGEST_WORKERS worker threads (zlib/bz2/lzma
+release the GIL while inflating). Each worker merges its streams by event
+time and hands batches to a bounded queue; the consumer merges the worker
+queues by time again (heapq.merge). Decompression and parsing hold at most
+workers x queue depth x batch size events at a time. Whatever consumes
+iter_events decides the rest: /ingest keeps every event for the timeline, so
+its memory grows with the input; /ingest/jobs (agent_tools/checkpoint.py)
+works segment by segment.
+
+Tar archives can only be read front to back, so the members of one tar form
+a single stream (member after member) instead of being interleaved. Callers
+that work file by file (shards, preview, jobs, cases) use streams(), which
+reads a tar in one `r|*` pass. Opening a member by name re-reads every header
+before it, so a compressed tar would be inflated once per member.
+
+A corrupt or truncated upload raises BadArchive (a ValueError naming the
+file), whether it fails while listing members or halfway through a stream;
+the routers answer it with a 400.
+"""
+import gzip
+import heapq
+import io
+import lzma
+import os
+import queue
+import tarfile
+import threading
+import zipfile
+import zlib
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+from .parser import parse_lines
+
+INGEST_WORKERS = int(os.getenv("SENTINEL_INGEST_WORKERS", "4"))
+BATCH = 512
+QUEUE_DEPTH = 8
+
+_TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# an opener returns a fresh binary stream; a stream is (origin, opener)
+Opener = Callable[[], BinaryIO]
+
+# what gzip/zipfile/tarfile/bz2/lzma raise on damaged input (gzip.BadGzipFile is an OSError)
+CORRUPT = (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, zlib.error, lzma.LZMAError)
+
+
+class BadArchive(ValueError):
+    """An uploaded file that cannot be decompressed or listed."""
+
+
+def _bad(name: str, e: BaseException) -> BadArchive:
+    return BadArchive(f"Cannot read '{name}': corrupt or truncated ({type(e).__name__}: {e})")
+
+
+class _Checked:
+    """Stream proxy that turns decompression errors into BadArchive(origin).
+
+    `sequential` streams (members of a tar read with r|*) cannot seek; they
+    seek forward by reading, which is all a resumed reader needs.
+    """
+
+    def __init__(self, origin: str, fh: BinaryIO, sequential: bool = False):
+        self._origin = origin
+        self._fh = fh
+        self._sequential = sequential
+        self._pos = 0
+
+    def read(self, n: int = -1) -> bytes:
+        try:
+            data = self._fh.read(n)
+        except CORRUPT as e:
+            raise _bad(self._origin, e) from e
+        self._pos += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if self._sequential:
+            if whence != os.SEEK_SET or offset < self._pos:
+                raise io.UnsupportedOperation(f"{self._origin}: only forward seeks")
+            while self._pos < offset and self.read(min(1 << 20, offset - self._pos)):
+                pass
+            return self._pos
+        try:
+            self._pos = self._fh.seek(offset, whence)
+        except CORRUPT as e:
+            raise _bad(self._origin, e) from e
+        return self._pos
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._fh, name)
+
+
+def _checked(origin: str, opener: Opener) -> Opener:
+    def open_checked() -> BinaryIO:
+        try:
+            return _Checked(origin, opener())  # type: ignore[return-value]
+        except CORRUPT as e:
+            raise _bad(origin, e) from e
+    return open_checked
+
+
+def _skip(member: str) -> bool:
+    base = member.rsplit("/", 1)[-1]
+    return not base or base.startswith(".") or member.startswith("__MACOSX/")
+
+
+def _maybe_gunzip(name: str, fh: BinaryIO) -> BinaryIO:
+    return gzip.GzipFile(fileobj=fh) if name.lower().endswith(".gz") else fh
+
+
+def _lines(fh: BinaryIO, chunk: int = 1 << 20) -> Iterator[str]:
+    """Decoded lines from a binary stream, read in fixed-size chunks.
+
+    (tar members in stream mode are not seekable, so io.TextIOWrapper is out.)
+    """
+    rest = b""
+    try:
+        while True:
+            block = fh.read(chunk)
+            if not block:
+                break
+            parts = (rest + block).split(b"\n")
+            rest = parts.pop()
+            for p in parts:
+                yield p.decode("utf-8", errors="ignore")
+        if rest:
+            yield rest.decode("utf-8", errors="ignore")
+    finally:
+        fh.close()
+
+
+def _file_stream(origin: str, opener: Opener) -> Iterator[Any]:
+    return parse_lines(_lines(opener()), origin)
+
+
+def _tar_members(path: str, label: str) -> Iterator[Tuple[str, BinaryIO]]:
+    """(origin, stream) per log member in one sequential pass; a stream is valid until the next one."""
+    try:
+        with tarfile.open(path, mode="r|*") as tf:
+            for m in tf:
+                if not m.isfile() or _skip(m.name):
+                    continue
+                fh = tf.extractfile(m)
+                if fh is not None:
+                    origin = f"{label}:{m.name}"
+                    yield origin, _Checked(origin, _maybe_gunzip(m.name, fh), sequential=True)  # type: ignore[misc]
+    except CORRUPT as e:
+        raise _bad(label, e) from e
+
+
+def _tar_stream(path: str, label: str) -> Iterator[Any]:
+    for origin, fh in _tar_members(path, label):
+        yield from parse_lines(_lines(fh), origin)
+
+
+def _zip_streams(path: str, label: str) -> List[Tuple[str, Opener]]:
+    with zipfile.ZipFile(path) as zf:
+        names = [i.filename for i in zf.infolist() if not i.is_dir() and not _skip(i.filename)]
+    out = []
+    for n in names:
+        def opener(n: str = n) -> BinaryIO:
+            # one ZipFile per member stream: members are read from different threads
+            return _maybe_gunzip(n, zipfile.ZipFile(path).open(n))
+        out.append((f"{label}:{n}", opener))
+    return out
+
+
+def _is_tar(path: str, label: str) -> bool:
+    low = label.lower()
+    return low.endswith(_TAR_SUFFIXES) or (not low.endswith((".gz", ".zip")) and tarfile.is_tarfile(path))
+
+
+def openers(path: str, label: str) -> List[Tuple[str, Opener]]:
+    """(origin, opener) per log in a plain/.gz/.zip upload; any stream can be opened at any time.
+
+    Not for tars, which have no cheap random access: use streams().
+    Raises BadArchive for a damaged bundle; the streams raise it on read.
+    """
+    if _is_tar(path, label):
+        raise ValueError(f"{label}: tar bundles are read sequentially, use archive.streams()")
+    try:
+        if label.lower().endswith(".zip") or zipfile.is_zipfile(path):
+            found = _zip_streams(path, label)
+        else:
+            found = [(label, lambda: _maybe_gunzip(label, open(path, "rb")))]
+    except CORRUPT as e:
+        raise _bad(label, e) from e
+    return [(origin, _checked(origin, opener)) for origin, opener in found]
+
+
+def streams(path: str, label: str) -> Iterator[Tuple[str, BinaryIO]]:
+    """(origin, open stream) per log in one uploaded file, one after the other.
+
+    Each stream is closed when the caller moves on, and it is only valid until
+    then. Unread streams cost nothing for zip/plain files and are skipped
+    over for tars. seek() decompresses forward, so a reader can resume at an
+    uncompressed byte offset within a member (see agent_tools.checkpoint).
+    """
+    if _is_tar(path, label):
+        for origin, fh in _tar_members(path, label):
+            try:
+                yield origin, fh
+            finally:
+                fh.close()
+        return
+    for origin, opener in openers(path, label):
+        fh = opener()
+        try:
+            yield origin, fh
+        finally:
+            fh.close()
+
+
+def expand(path: str, label: str) -> List[Callable[[], Iterator[Any]]]:
+    """Event-stream factories for one uploaded file (a bundle may yield many)."""
+    if _is_tar(path, label):
+        return [lambda: _tar_stream(path, label)]
+    return [lambda o=o, op=op: _file_stream(o, op) for o, op in openers(path, label)]
+
+
+_DONE = object()
+
+
+def _put(q: "queue.Queue", item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _worker(factories: Sequence[Callable[[], Iterator[Any]]], out: "queue.Queue", stop: threading.Event) -> None:
+    try:
+        merged = heapq.merge(*(f() for f in factories), key=lambda e: e.time)
+        batch: List[Any] = []
+        for ev in merged:
+            batch.append(ev)
+            if len(batch) >= BATCH:
+                if not _put(out, batch, stop):
+                    return
+                batch = []
+        if batch and not _put(out, batch, stop):
+            return
+        _put(out, _DONE, stop)
+    except BaseException as e:  # surface decode/archive errors to the consumer
+        _put(out, e, stop)
+
+
+def _drain(q: "queue.Queue") -> Iterator[Any]:
+    while True:
+        item = q.get()
+        if item is _DONE:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield from item
+
+
+def iter_events(sources: Iterable[Tuple[str, str]], workers: int = INGEST_WORKERS) -> Iterator[Any]:
+    """Events from all (label, path) sources, merged by time across files."""
+    factories: List[Callable[[], Iterator[Any]]] = []
+    for label, path in sources:
+        factories.extend(expand(path, label))
+    if not factories:
+        return
+    n = max(1, min(workers, len(factories)))
+    groups = [factories[i::n] for i in range(n)]
+    queues: List["queue.Queue"] = [queue.Queue(maxsize=QUEUE_DEPTH) for _ in groups]
+    stop = threading.Event()
+    threads = [threading.Thread(target=_worker, args=(g, q, stop), daemon=True, name=f"ingest-{i}")
+               for i, (g, q) in enumerate(zip(groups, queues))]
+    for t in threads:
+        t.start()
+    try:
+        yield from heapq.merge(*(_drain(q) for q in queues), key=lambda e: e.time)
+    finally:
+        stop.set()  # producers give up on their next (timed) put
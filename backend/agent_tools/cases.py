@@ -0,0 +1,410 @@
+"""
+Versioned cases: re-ingest only what changed.
+
+A case is a directory (data/out/cases/<id>/):
+
+    case.json                versions: chunk keys per stream, counts, what changed
+    chunks/<key>.jsonl       processed events of one chunk (enriched + MITRE-mapped)
+    chunks/<key>.json        the chunk's aggregates (nodes, edges, IOCs, techniques, failures)
+    versions/v00001.json     aggregates of one version
+    versions/v00001.result.json   timeline + graph, built on first request
+
+Every stream (a plain file, a .gz, or one member of a bundle) is cut into
+content-defined chunks: a chunk ends after a line whose crc32 is 0 mod
+SENTINEL_CASE_CHUNK (within 1/4x..4x that many lines), so appending to or
+editing a log only changes the chunks around the change. A chunk's key is
+"<sha1 of its origin and bytes>-<pipeline fingerprint>". The fingerprint
+hashes what decides a processed event: the MITRE mapper mode, KB and Sigma
+rule set (mitre_map_ibmrag.fingerprint), the IOC list and PIPELINE_VERSION.
+Chunks already stored under the current fingerprint are not parsed again.
+When the fingerprint changes, the next ingest re-processes the chunks of
+streams it keeps, from the raw lines stored with their events, under new
+keys. The old chunks stay, so earlier versions still materialize as they were.
+
+Uploading a stream with an origin the case already has (say a grown
+auth.log) replaces that stream's chunks. New origins are added. A version's
+aggregates are the previous version's, minus removed chunks, plus added
+chunks. Brute-force tagging depends on failure counts across the whole case,
+so each chunk also caches, per source, how its technique counts shift once
+that source is tagged. Only sources whose flag changes touch kept chunks.
+"""
+import hashlib
+import json
+import os
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from schemas.models import Event
+    from metrics import StageRecorder
+except Exception:
+    from backend.schemas.models import Event  # type: ignore
+    from backend.metrics import StageRecorder  # type: ignore
+
+from .archive import streams as open_streams
+from .parser import parse_lines
+from .enrich import BAD_IPS, enrich_events
+from .anomaly import BRUTE_FORCE_FAILS, count_failures, tag_brute_force
+from .mitre_map_ibmrag import fingerprint as mapper_fingerprint, map_events_to_mitre
+from .timeline import build_timeline
+from .graphify import timeline_to_graph
+from .checkpoint import _dump, _write_atomic, finish_rules, new_job_id
+
+CHUNK_LINES = int(os.getenv("SENTINEL_CASE_CHUNK", "20000"))
+PIPELINE_VERSION = 1  # bump when parse/enrich/mapping code changes what a chunk's events look like
+READ_CHUNK = 1 << 20
+
+CASE = "case.json"
+KINDS = ("nodes", "edges", "iocs", "techniques")
+
+
+# ---------- state ----------
+
+def load_case(case_dir: Path) -> Dict[str, Any]:
+    return json.loads((Path(case_dir) / CASE).read_text(encoding="utf-8"))
+
+
+def save_case(case_dir: Path, state: Dict[str, Any]) -> None:
+    state["updated"] = time.time()
+    _write_atomic(Path(case_dir) / CASE, json.dumps(state))
+
+
+def create_case(case_dir: Path, name: Optional[str] = None) -> Dict[str, Any]:
+    case_dir = Path(case_dir)
+    (case_dir / "chunks").mkdir(parents=True, exist_ok=True)
+    (case_dir / "versions").mkdir(exist_ok=True)
+    state = {"id": case_dir.name, "name": name, "created": time.time(), "versions": []}
+    save_case(case_dir, state)
+    return state
+
+
+def new_case_id() -> str:
+    return new_job_id()
+
+
+def summary(state: Dict[str, Any]) -> Dict[str, Any]:
+    last = state["versions"][-1] if state["versions"] else None
+    return {
+        "id": state["id"], "name": state.get("name"), "created": state["created"], "updated": state.get("updated"),
+        "version": last["version"] if last else 0, "events": last["events"] if last else 0,
+        "versions": [{k: v for k, v in ver.items() if k != "streams"} for ver in state["versions"]],
+    }
+
+
+def _version_file(case_dir: Path, version: int, suffix: str = ".json") -> Path:
+    return Path(case_dir) / "versions" / f"v{version:05d}{suffix}"
+
+
+def load_aggregates(case_dir: Path, version: int) -> Dict[str, Any]:
+    if version == 0:
+        return _empty()
+    return json.loads(_version_file(case_dir, version).read_text(encoding="utf-8"))
+
+
+# ---------- chunking ----------
+
+def _chunks(fh, avg: int = CHUNK_LINES) -> Iterator[List[bytes]]:
+    """Content-defined chunks of raw lines (newline stripped)."""
+    lo, hi = max(1, avg // 4), max(1, avg * 4)
+    crc = zlib.crc32
+    rest, batch = b"", []
+    try:
+        while True:
+            block = fh.read(READ_CHUNK)
+            if not block:
+                break
+            parts = (rest + block).split(b"\n")
+            rest = parts.pop()
+            for p in parts:
+                batch.append(p)
+                n = len(batch)
+                if n >= hi or (n >= lo and crc(p) % avg == 0):
+                    yield batch
+                    batch = []
+        if rest:
+            batch.append(rest)
+        if batch:
+            yield batch
+    finally:
+        fh.close()
+
+
+def pipeline_fingerprint() -> str:
+    parts = [str(PIPELINE_VERSION), mapper_fingerprint(), ",".join(sorted(BAD_IPS))]
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def chunk_key(origin: str, lines: List[bytes], pipeline: str) -> str:
+    h = hashlib.sha1(origin.encode("utf-8", errors="replace") + b"\0")
+    for line in lines:
+        h.update(line)
+        h.update(b"\n")
+    return f"{h.hexdigest()}-{pipeline}"
+
+
+def _rekey(key: str, pipeline: str) -> str:
+    # keys written before fingerprints existed are a bare sha1
+    return f"{key.split('-', 1)[0]}-{pipeline}"
+
+
+# ---------- aggregates ----------
+
+def _empty() -> Dict[str, Any]:
+    return {"events": 0, "failures": {}, **{k: {} for k in KINDS}}
+
+
+def _add(dst: Dict[str, int], src: Dict[str, int], sign: int = 1, times: int = 1) -> None:
+    for k, v in src.items():
+        n = dst.get(k, 0) + sign * times * v
+        if n:
+            dst[k] = n
+        else:
+            dst.pop(k, None)
+
+
+def _aggregate(events: List[Event]) -> Dict[str, Any]:
+    nodes: Counter = Counter()
+    edges: Counter = Counter()
+    iocs: Counter = Counter()
+    techniques: Counter = Counter()
+    for e in events:
+        nodes[e.source] += 1
+        if e.target != e.source:
+            nodes[e.target] += 1
+        edges[f"{e.source} -> {e.target}"] += 1  # hosts never contain whitespace (parser: \S+)
+        iocs.update(e.iocs)
+        if e.technique:
+            techniques[e.technique] += 1
+    return {"events": len(events), "failures": count_failures(events, {}),
+            "nodes": dict(nodes), "edges": dict(edges), "iocs": dict(iocs), "techniques": dict(techniques),
+            "sources": sorted({e.source for e in events}), "corr": {}}
+
+
+def _flagged(failures: Dict[str, int]) -> set:
+    return {s for s, n in failures.items() if n >= BRUTE_FORCE_FAILS}
+
+
+# ---------- chunk store ----------
+
+def _chunk_path(case_dir: Path, key: str, suffix: str) -> Path:
+    return Path(case_dir) / "chunks" / f"{key}{suffix}"
+
+
+def _load_events(case_dir: Path, key: str) -> List[Event]:
+    with open(_chunk_path(case_dir, key, ".jsonl"), encoding="utf-8") as fh:
+        return [Event(**json.loads(line)) for line in fh]
+
+
+def _load_meta(case_dir: Path, key: str) -> Dict[str, Any]:
+    return json.loads(_chunk_path(case_dir, key, ".json").read_text(encoding="utf-8"))
+
+
+def _process_chunk(case_dir: Path, key: str, origin: str, lines: List[bytes], rec: StageRecorder,
+                   pipeline: str) -> None:
+    with rec.stage("parse", nbytes=sum(len(b) + 1 for b in lines)) as s:
+        events = list(parse_lines((b.decode("utf-8", errors="ignore") for b in lines), origin))
+        s.events = len(events)
+    n = len(events)
+    with rec.stage("enrich", events=n):
+        events = enrich_events(events)
+    with rec.stage("mitre", events=n):
+        events = map_events_to_mitre(events)
+    # time-sorted chunks make the version's timeline sort a merge of runs
+    events.sort(key=lambda e: e.time)
+    _write_atomic(_chunk_path(case_dir, key, ".jsonl"), "".join(json.dumps(_dump(e)) + "\n" for e in events))
+    meta = _aggregate(events)
+    meta["origin"] = origin
+    meta["pipeline"] = pipeline
+    # the meta file is written last: its presence marks the chunk as complete
+    _write_atomic(_chunk_path(case_dir, key, ".json"), json.dumps(meta))
+
+
+def _reprocess_chunk(case_dir: Path, old: str, key: str, rec: StageRecorder, pipeline: str) -> None:
+    """Rebuild a chunk under the current pipeline from the raw lines kept with its events.
+
+    Lines that never parsed are not stored, but they would yield no events again.
+    """
+    events = _load_events(case_dir, old)
+    origin = _load_meta(case_dir, old)["origin"]
+    _process_chunk(case_dir, key, origin, [e.raw["line"].encode("utf-8") for e in events], rec, pipeline)
+
+
+def _corrections(case_dir: Path, key: str, meta: Dict[str, Any], sources: set, rec: StageRecorder) -> Dict[str, Dict[str, int]]:
+    """Technique-count shift of this chunk per source once that source is brute-force tagged (cached in meta)."""
+    missing = [s for s in sources if s in meta["sources"] and s not in meta["corr"]]
+    if missing:
+        want = set(missing)
+        events = [e for e in _load_events(case_dir, key) if e.source in want]
+        with rec.stage("mitre", events=len(events)):
+            before = [(e.source, e.technique, e.summary) for e in events]
+            tag_brute_force(events, {s: BRUTE_FORCE_FAILS for s in want})
+            tagged = [e for e, b in zip(events, before) if e.summary != b[2]]
+            if tagged:
+                map_events_to_mitre(tagged)
+        for s in missing:
+            meta["corr"][s] = {}
+        for (src, old, _), e in zip(before, events):
+            if old == e.technique:
+                continue
+            d = meta["corr"][src]
+            if old:
+                _add(d, {old: 1}, -1)
+            if e.technique:
+                _add(d, {e.technique: 1})
+        _write_atomic(_chunk_path(case_dir, key, ".json"), json.dumps(meta))
+    return {s: meta["corr"][s] for s in sources if s in meta["corr"]}
+
+
+# ---------- versions ----------
+
+def ingest(case_dir: str, sources: List[Tuple[str, str]]) -> Tuple[Dict[str, Any], list]:
+    """Add (label, path) uploads as a new version (heavy pool; picklable args).
+
+    Returns (case summary, stage samples).
+    """
+    case_dir = Path(case_dir)
+    rec = StageRecorder()
+    state = load_case(case_dir)
+    prev = state["versions"][-1] if state["versions"] else None
+    streams: Dict[str, List[str]] = dict(prev["streams"]) if prev else {}
+    pipeline = pipeline_fingerprint()
+    processed = reprocessed = 0
+    uploaded = set()
+    for label, path in sources:
+        for origin, fh in open_streams(path, label):
+            keys = []
+            for lines in _chunks(fh):
+                key = chunk_key(origin, lines, pipeline)
+                if not _chunk_path(case_dir, key, ".json").exists():
+                    _process_chunk(case_dir, key, origin, lines, rec, pipeline)
+                    processed += 1
+                keys.append(key)
+            streams[origin] = keys
+            uploaded.add(origin)
+    # kept streams built by another pipeline (new rules, KB, mapper mode) are re-processed too,
+    # so a version never mixes results of two pipelines
+    for origin in set(streams) - uploaded:
+        keys = []
+        for old_key in streams[origin]:
+            key = _rekey(old_key, pipeline)
+            if key != old_key and not _chunk_path(case_dir, key, ".json").exists():
+                _reprocess_chunk(case_dir, old_key, key, rec, pipeline)
+                reprocessed += 1
+            keys.append(key)
+        streams[origin] = keys
+
+    old = Counter(k for keys in (prev["streams"] if prev else {}).values() for k in keys)
+    new = Counter(k for keys in streams.values() for k in keys)
+    added, removed, kept = new - old, old - new, old & new
+
+    with rec.stage("case_aggregate", events=0) as s:
+        agg = load_aggregates(case_dir, prev["version"] if prev else 0)
+        metas = {k: _load_meta(case_dir, k) for k in list(added) + list(removed)}
+        flagged_old = _flagged(agg["failures"])
+        for k, times in removed.items():
+            m = metas[k]
+            agg["events"] -= times * m["events"]
+            _add(agg["failures"], m["failures"], -1, times)
+            for kind in KINDS:
+                _add(agg[kind], m[kind], -1, times)
+            for d in _corrections(case_dir, k, m, flagged_old, rec).values():
+                _add(agg["techniques"], d, -1, times)
+        for k, times in added.items():
+            m = metas[k]
+            agg["events"] += times * m["events"]
+            _add(agg["failures"], m["failures"], 1, times)
+            for kind in KINDS:
+                _add(agg[kind], m[kind], 1, times)
+        flagged = _flagged(agg["failures"])
+        for k, times in added.items():
+            for d in _corrections(case_dir, k, metas[k], flagged, rec).values():
+                _add(agg["techniques"], d, 1, times)
+        # sources whose brute-force flag flipped shift the techniques of chunks that stayed
+        gained, lost = flagged - flagged_old, flagged_old - flagged
+        if gained or lost:
+            for k, times in kept.items():
+                m = _load_meta(case_dir, k)
+                for src, d in _corrections(case_dir, k, m, gained | lost, rec).items():
+                    _add(agg["techniques"], d, 1 if src in gained else -1, times)
+        s.events = agg["events"]
+
+    version = (prev["version"] if prev else 0) + 1
+    _write_atomic(_version_file(case_dir, version), json.dumps(agg))
+    state["versions"].append({
+        "version": version, "created": time.time(), "events": agg["events"],
+        "files": {o: len(ks) for o, ks in streams.items()},
+        "chunks": sum(new.values()), "added": sum(added.values()), "removed": sum(removed.values()),
+        "processed": processed, "reprocessed": reprocessed, "pipeline": pipeline, "streams": streams,
+    })
+    save_case(case_dir, state)
+    return summary(state), rec.samples
+
+
+def _get_version(state: Dict[str, Any], version: Optional[int]) -> Dict[str, Any]:
+    if not state["versions"]:
+        raise KeyError("case has no versions yet")
+    if version is None:
+        return state["versions"][-1]
+    for v in state["versions"]:
+        if v["version"] == version:
+            return v
+    raise KeyError(f"no version {version}")
+
+
+def materialize(case_dir: str, version: Optional[int] = None) -> Tuple[Dict[str, Any], list]:
+    """Timeline + graph of one version (default latest), cached next to its aggregates."""
+    case_dir = Path(case_dir)
+    rec = StageRecorder()
+    ver = _get_version(load_case(case_dir), version)
+    out = _version_file(case_dir, ver["version"], ".result.json")
+    if out.exists():
+        return json.loads(out.read_text(encoding="utf-8")), rec.samples
+    with rec.stage("case_load") as s:
+        events: List[Event] = []
+        for keys in ver["streams"].values():
+            for k in keys:
+                events.extend(_load_events(case_dir, k))
+        s.events = len(events)
+    n = len(events)
+    with rec.stage("anomaly", events=n):
+        finish_rules(events, load_aggregates(case_dir, ver["version"])["failures"])
+    with rec.stage("timeline", events=n):
+        tl = build_timeline(events)
+    with rec.stage("graphify", events=n):
+        graph = timeline_to_graph(tl)
+    payload = {"version": ver["version"], "timeline": _dump(tl), "graph": _dump(graph), "files": ver["files"]}
+    _write_atomic(out, json.dumps(payload))
+    return payload, rec.samples
+
+
+def _ranked(d: Dict[str, int], limit: int) -> List[Dict[str, Any]]:
+    return [{"id": k, "events": v} for k, v in sorted(d.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]]
+
+
+def diff(case_dir: str, a: int, b: int, limit: int = 1000) -> Dict[str, Any]:
+    """What appeared, disappeared or changed count between versions a and b."""
+    case_dir = Path(case_dir)
+    state = load_case(case_dir)
+    va = _get_version(state, a) if a else {"version": 0, "streams": {}}
+    vb = _get_version(state, b)
+    ga, gb = load_aggregates(case_dir, va["version"]), load_aggregates(case_dir, vb["version"])
+    out: Dict[str, Any] = {"from": va["version"], "to": vb["version"], "events": {"from": ga["events"], "to": gb["events"]}}
+    ca = Counter(k for ks in va["streams"].values() for k in ks)
+    cb = Counter(k for ks in vb["streams"].values() for k in ks)
+    out["chunks"] = {"added": sum((cb - ca).values()), "removed": sum((ca - cb).values()), "kept": sum((ca & cb).values())}
+    for kind in KINDS:
+        x, y = ga[kind], gb[kind]
+        new = {k: v for k, v in y.items() if k not in x}
+        gone = {k: v for k, v in x.items() if k not in y}
+        entry: Dict[str, Any] = {"new_total": len(new), "gone_total": len(gone), "new": _ranked(new, limit), "gone": _ranked(gone, limit)}
+        if kind == "edges":
+            for lst in (entry["new"], entry["gone"]):
+                for item in lst:
+                    item["source"], item["target"] = item["id"].split(" -> ", 1)
+        if kind == "techniques":
+            entry["changed"] = {k: {"from": x[k], "to": y[k]} for k in sorted(set(x) & set(y)) if x[k] != y[k]}
+        out[kind] = entry
+    return out
@@ -0,0 +1,248 @@
+"""
+Checkpointed, resumable ingest jobs for very large inputs.
+
+A job is a directory (data/out/jobs/<id>/):
+
+    input/            spooled uploads (kept until the job is deleted)
+    state.json        per-stream byte offsets, carried aggregates, segment list
+    seg-00000.jsonl   processed events of one segment (enriched + MITRE-mapped)
+    result.json       final timeline + graph
+    iocs.json         inverted IOC index over the final timeline (ioc_index.py)
+
+Every log stream (a plain file, a .gz, or one member of a zip/tar bundle) is
+read in segments of SENTINEL_JOB_SEGMENT lines. A segment is parsed,
+enriched and MITRE-mapped, written to its own file, and only then is
+state.json atomically replaced with the new uncompressed byte offset, the
+anomaly counters and the graph node set. After a crash or restart the job
+seeks to its last checkpoint: completed segments are never recomputed, and a
+segment file written but not yet recorded is simply overwritten.
+
+Brute-force tagging needs the final per-source counters, so it runs once in
+finalize() over all segments (tagged events are re-mapped to MITRE); the
+result matches a single in-memory /ingest run.
+"""
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+try:
+    from schemas.models import Event
+    from metrics import StageRecorder
+except Exception:
+    from backend.schemas.models import Event  # type: ignore
+    from backend.metrics import StageRecorder  # type: ignore
+
+from .archive import streams as open_streams
+from .parser import parse_lines
+from .enrich import enrich_events
+from .anomaly import count_failures, tag_brute_force
+from .mitre_map_ibmrag import map_events_to_mitre
+from .timeline import build_timeline
+from .graphify import timeline_to_graph
+from .ioc_index import IOCIndex
+
+SEGMENT_LINES = int(os.getenv("SENTINEL_JOB_SEGMENT", "50000"))
+READ_CHUNK = 1 << 20
+
+STATE = "state.json"
+RESULT = "result.json"
+IOCS = "iocs.json"
+
+
+def _dump(model):
+    return model.model_dump() if hasattr(model, "model_dump") else model.dict()
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def load_state(job_dir: Path) -> Dict[str, Any]:
+    return json.loads((Path(job_dir) / STATE).read_text(encoding="utf-8"))
+
+
+def save_state(job_dir: Path, state: Dict[str, Any]) -> None:
+    state["updated"] = time.time()
+    _write_atomic(Path(job_dir) / STATE, json.dumps(state))
+
+
+def note_rejected(job_dir: Path, detail: str, retry_in: float) -> Dict[str, Any]:
+    """Record that the heavy pool turned the job away; it stays pending until a retry is admitted."""
+    state = load_state(job_dir)
+    state["rejections"] = state.get("rejections", 0) + 1
+    state["error"] = f"{detail} (retry in {retry_in:g}s)"
+    save_state(job_dir, state)
+    return state
+
+
+def create_job(job_dir: Path, sources: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Initial state for (label, path) sources already copied into job_dir."""
+    streams = [
+        {"origin": origin, "label": label, "path": path, "offset": 0, "events": 0, "done": False}
+        for label, path in sources
+        for origin, _ in open_streams(path, label)
+    ]
+    state = {
+        "id": Path(job_dir).name, "status": "pending", "created": time.time(), "error": None,
+        "streams": streams, "segments": [], "events": 0, "counts": {}, "nodes": [],
+    }
+    save_state(job_dir, state)
+    return state
+
+
+def new_job_id() -> str:
+    return time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:8]
+
+
+def _segments(fh, offset: int, size: int) -> Iterator[Tuple[List[str], int]]:
+    """(lines, byte offset just past the last of them), `size` lines at a time."""
+    if offset:
+        fh.seek(offset)
+    pos, rest, batch = offset, b"", []
+    try:
+        while True:
+            block = fh.read(READ_CHUNK)
+            if not block:
+                break
+            parts = (rest + block).split(b"\n")
+            rest = parts.pop()
+            for p in parts:
+                pos += len(p) + 1
+                batch.append(p.decode("utf-8", errors="ignore"))
+                if len(batch) >= size:
+                    yield batch, pos
+                    batch = []
+        if rest:
+            pos += len(rest)
+            batch.append(rest.decode("utf-8", errors="ignore"))
+        if batch:
+            yield batch, pos
+    finally:
+        fh.close()
+
+
+def _process_stream(job_dir: Path, state: Dict[str, Any], stream: Dict[str, Any], fh, rec: StageRecorder) -> None:
+    nodes = set(state["nodes"])
+    for lines, end in _segments(fh, stream["offset"], SEGMENT_LINES):
+        with rec.stage("parse", nbytes=end - stream["offset"]) as s:
+            events = list(parse_lines(lines, stream["origin"]))
+            s.events = len(events)
+        n = len(events)
+        with rec.stage("enrich", events=n):
+            events = enrich_events(events)
+        with rec.stage("anomaly", events=n):
+            counts = count_failures(events, dict(state["counts"]))
+        with rec.stage("mitre", events=n):
+            events = map_events_to_mitre(events)
+        for e in events:
+            nodes.add(e.source)
+            nodes.add(e.target)
+
+        seg = f"seg-{len(state['segments']):05d}.jsonl"
+        _write_atomic(Path(job_dir) / seg, "".join(json.dumps(_dump(e)) + "\n" for e in events))
+        # only now does the checkpoint move past these lines
+        state["segments"].append({"file": seg, "origin": stream["origin"], "events": n})
+        state["events"] += n
+        state["counts"] = counts
+        state["nodes"] = sorted(nodes)
+        stream["offset"] = end
+        stream["events"] += n
+        save_state(job_dir, state)
+    stream["done"] = True
+    save_state(job_dir, state)
+
+
+def finish_rules(events: List[Event], counts: Dict[str, int]) -> List[Event]:
+    """Brute-force tags from final counters; tagged events are re-mapped to MITRE
+    because the tag is part of the text the mapper sees in a single run."""
+    before = [e.summary for e in events]
+    tag_brute_force(events, counts)
+    tagged = [e for e, b in zip(events, before) if e.summary != b]
+    if tagged:
+        map_events_to_mitre(tagged)
+    return events
+
+
+def finalize(job_dir: Path, state: Dict[str, Any], rec: StageRecorder) -> Dict[str, Any]:
+    """Merge completed segments into the timeline + graph (result.json)."""
+    events: List[Event] = []
+    for seg in state["segments"]:
+        with open(Path(job_dir) / seg["file"], encoding="utf-8") as fh:
+            events.extend(Event(**json.loads(line)) for line in fh)
+    n = len(events)
+    with rec.stage("anomaly", events=n):
+        finish_rules(events, state["counts"])
+    with rec.stage("timeline", events=n):
+        tl = build_timeline(events)
+    with rec.stage("graphify", events=n):
+        graph = timeline_to_graph(tl)
+    with rec.stage("ioc_index", events=n):
+        IOCIndex.from_timeline(tl.events).save(Path(job_dir) / IOCS)
+    files: Dict[str, int] = {}
+    for s in state["streams"]:
+        files[s["origin"]] = files.get(s["origin"], 0) + s["events"]
+    payload = {"timeline": _dump(tl), "graph": _dump(graph), "files": files}
+    _write_atomic(Path(job_dir) / RESULT, json.dumps(payload))
+    return payload
+
+
+def run_job(job_dir: str) -> Tuple[Dict[str, Any], list]:
+    """Run or resume a job from its last checkpoint (heavy pool; picklable args).
+
+    Returns (status summary, stage samples).
+    """
+    job_dir = Path(job_dir)
+    rec = StageRecorder()
+    state = load_state(job_dir)
+    if state["status"] == "done":
+        return summary(state), rec.samples
+    state.update(status="running", error=None)
+    save_state(job_dir, state)
+    try:
+        # one pass per uploaded file (a tar is read front to back once); a stream resumes
+        # at its (member, offset within member) checkpoint
+        files: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        for stream in state["streams"]:
+            files.setdefault((stream["label"], stream["path"]), {})[stream["origin"]] = stream
+        for (label, path), by_origin in files.items():
+            if all(st["done"] for st in by_origin.values()):
+                continue
+            for origin, fh in open_streams(path, label):
+                stream = by_origin.get(origin)
+                if stream is not None and not stream["done"]:
+                    _process_stream(job_dir, state, stream, fh, rec)
+        finalize(job_dir, state, rec)
+        state["status"] = "done"
+    except Exception as e:
+        state.update(status="failed", error=f"{type(e).__name__}: {e}")
+    save_state(job_dir, state)
+    return summary(state), rec.samples
+
+
+def summary(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": state["id"], "status": state["status"], "error": state["error"],
+        "events": state["events"], "segments": len(state["segments"]), "nodes": len(state["nodes"]),
+        "streams": [{k: s[k] for k in ("origin", "offset", "events", "done")} for s in state["streams"]],
+        "created": state["created"], "updated": state.get("updated"), "rejections": state.get("rejections", 0),
+    }
+
+
+def unfinished(root: Path) -> List[str]:
+    """Job dirs under root that were interrupted (pending or running)."""
+    out = []
+    for d in sorted(Path(root).glob("*/" + STATE)):
+        try:
+            if load_state(d.parent)["status"] in ("pending", "running"):
+                out.append(str(d.parent))
+        except Exception:
+            continue
+    return out
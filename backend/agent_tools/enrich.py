@@ -1,11 +1,16 @@
+from typing import Optional
+
 try:
     from schemas.models import Event
 except Exception:
     from backend.schemas.models import Event  # type: ignore
 
+from .ioc_index import IOCIndex
+
 BAD_IPS = {"203.0.113.66", "198.51.100.42", "192.0.2.9"}
 
-def enrich_events(events: list[Event]) -> list[Event]:
+def enrich_events(events: list[Event], index: Optional[IOCIndex] = None) -> list[Event]:
+    """Tag known-bad IPs in e.iocs; with `index`, also record them for the IOC index."""
     for e in events:
         found = []
         for tok in str(e.raw.get("line", "")).replace(",", " ").split():
@@ -13,4 +18,6 @@ def enrich_events(events: list[Event]) -> list[Event]:
                 found.append(tok)
         if found:
             e.iocs = sorted(set((e.iocs or []) + found))
+            if index is not None:
+                index.add(e.id, e.iocs)
     return events
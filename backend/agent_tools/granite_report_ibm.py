@@ -1,35 +1,19 @@
-import os
-from typing import List
+from typing import List, Tuple
 
-try:
-    from ibm_watsonx_ai import Credentials, WatsonxAI
-except Exception:
-    Credentials = WatsonxAI = None
-
-GRANITE_API_KEY = os.getenv("IBM_WATSONX_APIKEY")
-GRANITE_PROJECT_ID = os.getenv("IBM_PROJECT_ID")
-GRANITE_URL = os.getenv("IBM_WATSONX_URL", "https://us-south.ml.cloud.ibm.com")
-GRANITE_MODEL_ID = os.getenv("IBM_WATSONX_MODEL_ID", "ibm/granite-13b-instruct-v2")
-
-client = None
-if GRANITE_API_KEY and GRANITE_PROJECT_ID and Credentials and WatsonxAI:
-    creds = Credentials(url=GRANITE_URL, api_key=GRANITE_API_KEY)
-    client = WatsonxAI(credentials=creds, project_id=GRANITE_PROJECT_ID)
+from .llm_client import LLMError, get_client, is_configured
+from .report_stream import iter_local_report
 
 def _local_html(timeline, iocs: List[str]) -> str:
     """Fallback if Granite is unavailable."""
-    from html import escape
-    rows = "\n".join([
-        f"<tr><td>{e.stepNum}</td><td>{escape(e.time)}</td><td>{escape(e.source)}</td>"
-        f"<td>{escape(e.target)}</td><td>{escape(e.tactic or '-')}</td>"
-        f"<td>{escape(e.technique or '-')}</td><td>{escape(e.summary)}</td></tr>"
-        for e in timeline.events
-    ])
-    return f"<h1>ForensicMind Report (Local Fallback)</h1><table>{rows}</table>"
+    return "".join(iter_local_report(timeline))
 
 def generate_report_html(timeline, iocs: List[str]) -> str:
-    if not client:
-        return _local_html(timeline, iocs)
+    return generate_report(timeline, iocs)[0]
+
+def generate_report(timeline, iocs: List[str]) -> Tuple[str, bool]:
+    """(html, fell_back): fell_back is True when Granite was configured but failed."""
+    if not is_configured():
+        return _local_html(timeline, iocs), False
 
     events_txt = "\n".join([
         f"{e.stepNum}. {e.time} | {e.source}->{e.target} | {e.tactic}/{e.technique} | {e.summary}"
@@ -51,11 +35,6 @@ def generate_report_html(timeline, iocs: List[str]) -> str:
     - Remediation Steps
     """
     try:
-        resp = client.generate_text(
-            model_id=GRANITE_MODEL_ID,
-            input=prompt,
-            parameters={"max_new_tokens": 800, "temperature": 0.3}
-        )
-        return resp["results"][0]["generated_text"]
-    except Exception:
-        return _local_html(timeline, iocs)
+        return get_client().generate(prompt, params={"max_new_tokens": 800, "temperature": 0.3}), False
+    except LLMError:
+        return _local_html(timeline, iocs), True
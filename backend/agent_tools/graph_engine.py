@@ -0,0 +1,207 @@
+"""
+In-memory attack-graph engine over CSR adjacency arrays (NumPy).
+
+Edges are grouped into (source, target) pairs; each pair keeps its edge
+steps sorted, so a time-respecting relaxation from a node is a handful of
+vectorised reductions over that node's slice instead of a Python loop over
+every (possibly parallel) edge.
+"""
+import heapq
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+_INF = np.iinfo(np.int64).max
+# rows with at most this many distinct neighbours are relaxed with bisect on
+# plain lists; wider rows (hubs) use one vectorised reduceat pass
+_SMALL_ROW = 32
+
+
+def _as_dict(obj: Any) -> Dict[str, Any]:
+    if isinstance(obj, dict):
+        return obj
+    return obj.model_dump() if hasattr(obj, "model_dump") else obj.dict()
+
+
+class GraphEngine:
+    def __init__(self, graph: Any):
+        g = _as_dict(graph)
+        self.edges: List[Dict[str, Any]] = [_as_dict(e) for e in g.get("edges", [])]
+
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        for n in g.get("nodes", []):
+            self._node(_as_dict(n)["id"])
+        m = len(self.edges)
+        src = np.empty(m, dtype=np.int64)
+        dst = np.empty(m, dtype=np.int64)
+        step = np.empty(m, dtype=np.int64)
+        for i, e in enumerate(self.edges):
+            src[i] = self._node(e["source"])
+            dst[i] = self._node(e["target"])
+            step[i] = int(e.get("stepNum") or 0)
+        n = len(self.ids)
+
+        # edges ordered by (src, dst, step): contiguous pairs, steps ascending
+        order = np.lexsort((step, dst, src))
+        self.eid = order
+        self.e_dst = dst[order]
+        self.e_step = step[order]
+        e_src = src[order]
+
+        if m:
+            brk = np.flatnonzero((np.diff(e_src) != 0) | (np.diff(self.e_dst) != 0)) + 1
+            self.p_start = np.concatenate(([0], brk)).astype(np.int64)
+        else:
+            self.p_start = np.zeros(0, dtype=np.int64)
+        self.p_end = np.append(self.p_start[1:], m).astype(np.int64)
+        self.p_src = e_src[self.p_start]
+        self.p_dst = self.e_dst[self.p_start]
+        self.p_weight = self.p_end - self.p_start
+
+        # CSR over pairs: pairs of node u are p_indptr[u]:p_indptr[u+1]
+        self.p_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.p_src, minlength=n), out=self.p_indptr[1:])
+
+        # list mirrors for the scalar (small row) path
+        self._indptr = self.p_indptr.tolist()
+        self._ps, self._pe = self.p_start.tolist(), self.p_end.tolist()
+        self._pd, self._steps = self.p_dst.tolist(), self.e_step.tolist()
+
+        self.out_degree = np.bincount(src, minlength=n)
+        self.in_degree = np.bincount(dst, minlength=n)
+
+    def _node(self, node_id: str) -> int:
+        i = self.index.get(node_id)
+        if i is None:
+            i = self.index[node_id] = len(self.ids)
+            self.ids.append(node_id)
+        return i
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edges)
+
+    # ---------- temporal reachability ----------
+
+    def _earliest_arrival(self, start: int, after: int, stop: Optional[int] = None):
+        """Dijkstra on arrival step; edges must be taken in non-decreasing step order."""
+        arrival = {start: after}
+        via: Dict[int, int] = {}
+        done = set()
+        heap = [(after, start)]
+        while heap:
+            a, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            if u == stop:
+                break
+            p0, p1 = self._indptr[u], self._indptr[u + 1]
+            if p0 == p1:
+                continue
+            if p1 - p0 <= _SMALL_ROW:
+                steps, ps, pe = self._steps, self._ps, self._pe
+                cand = []
+                for j in range(p0, p1):
+                    k = bisect_left(steps, a, ps[j], pe[j])
+                    if k < pe[j]:
+                        cand.append((j, k))
+            else:
+                lo, hi = self._ps[p0], self._pe[p1 - 1]
+                # first edge with step >= a inside every pair of u
+                late = (self.e_step[lo:hi] < a).astype(np.int64)
+                first = self.p_start[p0:p1] + np.add.reduceat(late, self.p_start[p0:p1] - lo)
+                ok = np.flatnonzero(first < self.p_end[p0:p1])
+                cand = zip((p0 + ok).tolist(), first[ok].tolist())
+            for j, k in cand:
+                v = self._pd[j]
+                t = self._steps[k]
+                if v not in done and t < arrival.get(v, _INF):
+                    arrival[v] = t
+                    via[v] = k
+                    heapq.heappush(heap, (t, v))
+        return arrival, via
+
+    def _edge(self, k: int) -> Dict[str, Any]:
+        return self.edges[int(self.eid[k])]
+
+    def shortest_path(self, source: str, target: str, after: int = 0) -> Dict[str, Any]:
+        """Earliest-arriving time-respecting path from source to target."""
+        s, t = self.index.get(source), self.index.get(target)
+        if s is None or t is None:
+            return {"found": False, "reason": "unknown node", "path": [], "edges": []}
+        if s == t:
+            return {"found": True, "path": [source], "edges": [], "arrival": after}
+        arrival, via = self._earliest_arrival(s, after, stop=t)
+        if t not in arrival:
+            return {"found": False, "reason": "no time-respecting path", "path": [], "edges": []}
+        hops: List[Dict[str, Any]] = []
+        v = t
+        while v != s:
+            k = via[v]
+            hops.append(self._edge(k))
+            v = self.index[hops[-1]["source"]]
+        hops.reverse()
+        return {
+            "found": True,
+            "path": [source] + [e["target"] for e in hops],
+            "edges": hops,
+            "arrival": arrival[t],
+        }
+
+    def blast_radius(self, node: str, after: int = 0) -> Dict[str, Any]:
+        """Nodes reachable from node via edges at step >= after, with earliest arrival step."""
+        s = self.index.get(node)
+        if s is None:
+            return {"found": False, "reason": "unknown node", "reachable": []}
+        arrival, via = self._earliest_arrival(s, after)
+        reach = sorted(
+            ({"id": self.ids[v], "arrival": a, "via": self._edge(via[v]).get("id")}
+             for v, a in arrival.items() if v != s),
+            key=lambda r: (r["arrival"], r["id"]),
+        )
+        return {"found": True, "source": node, "after": after, "count": len(reach), "reachable": reach}
+
+    # ---------- centrality ----------
+
+    def pagerank(self, damping: float = 0.85, iters: int = 50, tol: float = 1e-9) -> np.ndarray:
+        n = self.num_nodes
+        if n == 0:
+            return np.zeros(0)
+        w = self.p_weight.astype(np.float64)
+        out_w = np.bincount(self.p_src, weights=w, minlength=n)
+        share = np.divide(w, out_w[self.p_src], out=np.zeros_like(w), where=out_w[self.p_src] > 0)
+        dangling = out_w == 0
+        pr = np.full(n, 1.0 / n)
+        for _ in range(iters):
+            nxt = np.bincount(self.p_dst, weights=pr[self.p_src] * share, minlength=n)
+            nxt = damping * (nxt + pr[dangling].sum() / n) + (1.0 - damping) / n
+            if np.abs(nxt - pr).sum() < tol:
+                pr = nxt
+                break
+            pr = nxt
+        return pr
+
+    def top_central(self, k: int = 10, metric: str = "pagerank") -> List[Dict[str, Any]]:
+        if metric == "degree":
+            score = (self.in_degree + self.out_degree).astype(np.float64)
+        elif metric == "pagerank":
+            score = self.pagerank()
+        else:
+            raise ValueError(f"unknown metric '{metric}'")
+        k = min(k, self.num_nodes)
+        if k <= 0:
+            return []
+        top = np.argpartition(-score, k - 1)[:k]
+        top = top[np.argsort(-score[top], kind="stable")]
+        return [
+            {"id": self.ids[i], "score": float(score[i]),
+             "in_degree": int(self.in_degree[i]), "out_degree": int(self.out_degree[i])}
+            for i in top
+        ]
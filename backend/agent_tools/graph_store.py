@@ -0,0 +1,268 @@
+"""
+Embedded on-disk graph store: the Neptune stand-in for single-node deployments.
+
+SQLite (WAL) with two tables: nodes(id, label) and edges(id, source, target,
+...) plus indexes on (source, stepNum) and (target, stepNum), so
+neighbourhood and time-filtered queries are index range scans. Writes are
+upserts keyed by node id / edge id (re-sending an event updates its edge), in
+one transaction per call; graph_write/graph_read match neptune_client.
+
+    store = get_store()
+    store.upsert(events)                        # {"nodes": n, "edges": m}
+    store.neighborhood("web01", depth=2, after=10)
+    store.bulk_load(events, replace=True)       # big loads: indexes rebuilt once
+
+POST /neptune/graph-write uses bulk_load for ?replace=1 and for batches of
+SENTINEL_GRAPH_BULK_MIN events or more. A bulk load is one transaction, and
+reads on the store wait for it to commit, so no query scans the edge table
+while its indexes are missing.
+
+Env:
+  SENTINEL_GRAPH_DB        database file (default data/out/graph.db)
+  SENTINEL_GRAPH_BULK_MIN  events per write that switch to bulk_load (default 50000)
+"""
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DB_PATH = os.getenv("SENTINEL_GRAPH_DB", str(Path(__file__).resolve().parents[2] / "data" / "out" / "graph.db"))
+BULK_MIN = int(os.getenv("SENTINEL_GRAPH_BULK_MIN", "50000"))
+BATCH = 5000
+IN_CHUNK = 500  # ids per IN (...) query, below SQLite's variable limit
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id    TEXT PRIMARY KEY,
+    label TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS edges (
+    id        TEXT PRIMARY KEY,
+    source    TEXT NOT NULL,
+    target    TEXT NOT NULL,
+    label     TEXT,
+    tactic    TEXT,
+    technique TEXT,
+    stepNum   INTEGER NOT NULL DEFAULT 0,
+    time      TEXT
+);
+"""
+_INDEXES = {
+    "edges_source": "CREATE INDEX IF NOT EXISTS edges_source ON edges(source, stepNum)",
+    "edges_target": "CREATE INDEX IF NOT EXISTS edges_target ON edges(target, stepNum)",
+    "edges_step": "CREATE INDEX IF NOT EXISTS edges_step ON edges(stepNum)",
+}
+
+_EDGE_COLS = "id, source, target, label, tactic, technique, stepNum, time"
+_UPSERT_NODE = "INSERT INTO nodes(id, label) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET label = excluded.label"
+_UPSERT_EDGE = (
+    f"INSERT INTO edges({_EDGE_COLS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET source = excluded.source, target = excluded.target, label = excluded.label, "
+    "tactic = excluded.tactic, technique = excluded.technique, stepNum = excluded.stepNum, time = excluded.time"
+)
+
+
+def _get(e: Any, key: str, default: Any = None) -> Any:
+    return e.get(key, default) if isinstance(e, dict) else getattr(e, key, default)
+
+
+def _edge_row(e: Any) -> Tuple:
+    return (str(_get(e, "id")), _get(e, "source"), _get(e, "target"), (_get(e, "summary") or _get(e, "label") or "")[:120],
+            _get(e, "tactic"), _get(e, "technique"), _get(e, "stepNum") or 0, _get(e, "time"))
+
+
+def _edge(row: Sequence[Any]) -> Dict[str, Any]:
+    return {"id": row[0], "source": row[1], "target": row[2], "label": row[3], "tactic": row[4],
+            "technique": row[5], "stepNum": row[6], "time": row[7]}
+
+
+class GraphStore:
+    def __init__(self, path: str = DB_PATH):
+        self.path = str(path)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._readable = threading.Event()  # cleared while bulk_load has the indexes dropped
+        self._readable.set()
+        self.writes = 0  # bumped on every committed write; part of version()
+        with self._conn() as c:
+            c.executescript(_SCHEMA + ";\n".join(_INDEXES.values()) + ";")
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread (FastAPI runs sync routes in a thread pool)
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(self.path, timeout=30)
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = c
+        return c
+
+    # ---------- writes ----------
+
+    def _upsert(self, c: sqlite3.Connection, events: Iterable[Any]) -> Dict[str, int]:
+        n_edges = 0
+        nodes: Dict[str, str] = {}
+        rows: List[Tuple] = []
+        for e in events:
+            for h in (_get(e, "source"), _get(e, "target")):
+                nodes[h] = h
+            rows.append(_edge_row(e))
+            if len(rows) >= BATCH:
+                c.executemany(_UPSERT_EDGE, rows)
+                n_edges += len(rows)
+                rows = []
+        c.executemany(_UPSERT_EDGE, rows)
+        n_edges += len(rows)
+        c.executemany(_UPSERT_NODE, nodes.items())
+        return {"nodes": len(nodes), "edges": n_edges}
+
+    def upsert(self, events: Iterable[Any]) -> Dict[str, int]:
+        """Insert or update the nodes and edges of events (Event models or dicts), in one transaction."""
+        with self._write_lock:
+            c = self._conn()
+            with c:
+                counts = self._upsert(c, events)
+            self.writes += 1
+        return counts
+
+    def bulk_load(self, events: Iterable[Any], replace: bool = False) -> Dict[str, int]:
+        """Large loads in one transaction: optionally wipe, drop the edge indexes, insert, rebuild them once.
+
+        Reads on this store block until the load commits (or rolls back with the indexes intact).
+        """
+        with self._write_lock:
+            self._readable.clear()
+            try:
+                c = self._conn()
+                with c:
+                    if replace:
+                        c.execute("DELETE FROM edges")
+                        c.execute("DELETE FROM nodes")
+                    for ix in _INDEXES:
+                        c.execute(f"DROP INDEX IF EXISTS {ix}")
+                    counts = self._upsert(c, events)
+                    for ddl in _INDEXES.values():
+                        c.execute(ddl)
+                self.writes += 1
+            finally:
+                self._readable.set()
+        return counts
+
+    def clear(self) -> None:
+        with self._write_lock, self._conn() as c:
+            c.execute("DELETE FROM edges")
+            c.execute("DELETE FROM nodes")
+        self.writes += 1
+
+    def version(self) -> str:
+        """Changes with every write, from this process (counter) or another one (db/WAL file stat)."""
+        parts = [str(self.writes)]
+        for f in (self.path, self.path + "-wal"):
+            try:
+                st = os.stat(f)
+                parts.append(f"{st.st_mtime_ns:x}-{st.st_size:x}")
+            except OSError:
+                parts.append("-")
+        return ":".join(parts)
+
+    # ---------- reads ----------
+
+    def read(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        self._readable.wait()
+        c = self._conn()
+        nodes = [{"id": i, "label": l} for i, l in c.execute("SELECT id, label FROM nodes ORDER BY id")]
+        q = f"SELECT {_EDGE_COLS} FROM edges ORDER BY stepNum, id"
+        rows = c.execute(q + " LIMIT ?", (limit,)) if limit else c.execute(q)
+        return {"nodes": nodes, "edges": [_edge(r) for r in rows]}
+
+    def stats(self) -> Dict[str, Any]:
+        self._readable.wait()
+        c = self._conn()
+        n = c.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+        e, lo, hi = c.execute("SELECT COUNT(*), MIN(stepNum), MAX(stepNum) FROM edges").fetchone()
+        return {"path": self.path, "nodes": n, "edges": e, "min_step": lo, "max_step": hi}
+
+    def _adjacent(self, ids: Sequence[str], after: Optional[int], direction: str) -> List[Tuple]:
+        c = self._conn()
+        cols = [("source",)] if direction == "out" else [("target",)] if direction == "in" else [("source",), ("target",)]
+        out: List[Tuple] = []
+        for i in range(0, len(ids), IN_CHUNK):
+            chunk = list(ids[i:i + IN_CHUNK])
+            marks = ",".join("?" * len(chunk))
+            for (col,) in cols:
+                q = f"SELECT {_EDGE_COLS} FROM edges WHERE {col} IN ({marks})"
+                args: List[Any] = chunk
+                if after is not None:
+                    q += " AND stepNum >= ?"
+                    args = chunk + [after]
+                out.extend(c.execute(q, args))
+        return out
+
+    def neighborhood(self, node: str, depth: int = 1, after: Optional[int] = None,
+                     direction: str = "both", limit: int = 5000) -> Dict[str, Any]:
+        """Nodes within `depth` hops of `node` and the edges used to reach them (BFS over indexed lookups)."""
+        if direction not in ("out", "in", "both"):
+            raise ValueError("direction must be out|in|both")
+        self._readable.wait()
+        c = self._conn()
+        row = c.execute("SELECT id, label FROM nodes WHERE id = ?", (node,)).fetchone()
+        if row is None:
+            return {"node": node, "found": False, "nodes": [], "edges": []}
+        hop = {node: 0}
+        edges: Dict[str, Dict[str, Any]] = {}
+        frontier = [node]
+        truncated = False
+        for d in range(1, max(0, depth) + 1):
+            if not frontier:
+                break
+            nxt = []
+            for r in self._adjacent(frontier, after, direction):
+                if r[0] in edges:
+                    continue
+                if len(edges) >= limit:
+                    truncated = True
+                    break
+                edges[r[0]] = _edge(r)
+                for h in (r[1], r[2]):
+                    if h not in hop:
+                        hop[h] = d
+                        nxt.append(h)
+            if truncated:
+                break
+            frontier = nxt
+        labels = {}
+        ids = list(hop)
+        for i in range(0, len(ids), IN_CHUNK):
+            chunk = ids[i:i + IN_CHUNK]
+            labels.update(c.execute(f"SELECT id, label FROM nodes WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+        return {
+            "node": node, "found": True, "depth": depth, "after": after, "direction": direction,
+            "nodes": [{"id": h, "label": labels.get(h, h), "hops": d} for h, d in sorted(hop.items(), key=lambda kv: kv[1])],
+            "edges": sorted(edges.values(), key=lambda e: (e["stepNum"], e["id"])),
+            "truncated": truncated,
+        }
+
+
+_store: Optional[GraphStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> GraphStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = GraphStore(DB_PATH)
+        return _store
+
+
+# same interface as neptune_client
+def graph_write(events):
+    get_store().upsert(events)
+    return graph_read()
+
+
+def graph_read():
+    return get_store().read()
@@ -0,0 +1,200 @@
+"""
+Graph summarisation / level-of-detail for large SentinelVision graphs.
+
+Level 2 is the raw graph, level 1 collapses parallel edges into weighted
+multi-edges, level 0 additionally folds nodes into super-nodes (communities
+or /24 subnets). Super-nodes carry their members so the client can ask for
+them to be expanded; expanded super-nodes are left unfolded in later views.
+"""
+import re
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+CLUSTER_PREFIX = "c:"
+_IP24 = re.compile(r"(\d{1,3}\.\d{1,3}\.\d{1,3})\.\d{1,3}")
+
+
+def _as_dict(obj: Any) -> Dict[str, Any]:
+    if isinstance(obj, dict):
+        return obj
+    return obj.model_dump() if hasattr(obj, "model_dump") else obj.dict()
+
+
+def _collapse(edges: Iterable[Dict[str, Any]], key: Callable[[str], str]) -> List[Dict[str, Any]]:
+    """Merge edges by (key(source), key(target)); self-loops created by key() are dropped."""
+    acc: Dict[tuple, Dict[str, Any]] = {}
+    for e in edges:
+        s, t = key(e["source"]), key(e["target"])
+        if s == t and (s != e["source"] or t != e["target"]):
+            continue
+        w = int(e.get("weight") or 1)
+        lo = e.get("stepMin", e.get("stepNum") or 0)
+        hi = e.get("stepMax", e.get("stepNum") or 0)
+        a = acc.get((s, t))
+        if a is None:
+            a = acc[(s, t)] = {
+                "source": s, "target": t, "weight": 0,
+                "stepMin": lo, "stepMax": hi,
+                "_tac": Counter(), "_tech": Counter(),
+            }
+        a["weight"] += w
+        a["stepMin"] = min(a["stepMin"], lo)
+        a["stepMax"] = max(a["stepMax"], hi)
+        for field, bag in (("tactic", "_tac"), ("technique", "_tech")):
+            vals = e.get(field + "s") or ([e.get(field)] if e.get(field) else [])
+            for v in vals:
+                a[bag][v] += w
+
+    out: List[Dict[str, Any]] = []
+    for (s, t), a in acc.items():
+        tac, tech = a.pop("_tac"), a.pop("_tech")
+        a["id"] = f"{s}->{t}"
+        a["stepNum"] = a["stepMin"]
+        a["tactic"] = tac.most_common(1)[0][0] if tac else None
+        a["technique"] = tech.most_common(1)[0][0] if tech else None
+        a["tactics"] = sorted(tac)
+        a["techniques"] = sorted(tech)
+        out.append(a)
+    out.sort(key=lambda e: (e["stepMin"], e["id"]))
+    return out
+
+
+def collapse_parallel_edges(graph: Any) -> Dict[str, Any]:
+    """Level 1: one weighted edge per (source, target) with technique sets and step range."""
+    g = _as_dict(graph)
+    nodes = [_as_dict(n) for n in g.get("nodes", [])]
+    edges = _collapse((_as_dict(e) for e in g.get("edges", [])), lambda x: x)
+    return {"nodes": nodes, "edges": edges}
+
+
+def subnet_groups(nodes: List[Dict[str, Any]]) -> Dict[str, str]:
+    """node id -> /24 for ids containing an IPv4 address; other nodes stay on their own."""
+    groups = {}
+    for n in nodes:
+        m = _IP24.search(n["id"])
+        groups[n["id"]] = f"{m.group(1)}.0/24" if m else n["id"]
+    return groups
+
+
+def community_groups(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]], rounds: int = 10) -> Dict[str, str]:
+    """Weighted label propagation on the undirected collapsed graph (deterministic)."""
+    adj: Dict[str, Counter] = defaultdict(Counter)
+    for e in edges:
+        if e["source"] != e["target"]:
+            w = int(e.get("weight") or 1)
+            adj[e["source"]][e["target"]] += w
+            adj[e["target"]][e["source"]] += w
+    order = sorted(n["id"] for n in nodes)
+    label = {nid: nid for nid in order}
+    for _ in range(rounds):
+        changed = False
+        for nid in order:
+            nb = adj.get(nid)
+            if not nb:
+                continue
+            score: Counter = Counter()
+            for other, w in nb.items():
+                score[label[other]] += w
+            best = max(score.values())
+            new = min(lbl for lbl, v in score.items() if v == best)
+            if new != label[nid]:
+                label[nid] = new
+                changed = True
+        if not changed:
+            break
+    return label
+
+
+def _groups(level1: Dict[str, Any], by: str) -> Dict[str, str]:
+    if by == "subnet":
+        return subnet_groups(level1["nodes"])
+    if by == "community":
+        return community_groups(level1["nodes"], level1["edges"])
+    raise ValueError(f"unknown grouping '{by}' (use community|subnet)")
+
+
+def cluster_graph(level1: Dict[str, Any], by: str = "community", expanded: Iterable[str] = ()) -> Dict[str, Any]:
+    """Level 0: super-nodes with member lists, edges aggregated between super-nodes.
+
+    Super-node ids listed in `expanded` stay unfolded: their members are returned as
+    plain nodes tagged with "parent", and edges to them keep the member ids.
+    """
+    groups = _groups(level1, by)
+    members: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for n in level1["nodes"]:
+        members[groups[n["id"]]].append(n)
+    opened = set(expanded)
+
+    def folded(g: str) -> bool:
+        return len(members.get(g, ())) > 1 and CLUSTER_PREFIX + g not in opened
+
+    def key(nid: str) -> str:
+        g = groups.get(nid, nid)
+        return CLUSTER_PREFIX + g if folded(g) else nid
+
+    internal: Counter = Counter()
+    for e in level1["edges"]:
+        ks = key(e["source"])
+        if ks == key(e["target"]) and ks.startswith(CLUSTER_PREFIX):
+            internal[ks] += int(e.get("weight") or 1)
+
+    nodes: List[Dict[str, Any]] = []
+    shown: List[str] = []
+    for g, ms in members.items():
+        if len(ms) == 1:
+            nodes.append(ms[0])
+            continue
+        cid = CLUSTER_PREFIX + g
+        if not folded(g):
+            shown.append(cid)
+            nodes.extend({**m, "parent": cid} for m in ms)
+            continue
+        nodes.append({
+            "id": cid,
+            "label": f"{g} ({len(ms)})" if by == "subnet" else f"{len(ms)} hosts",
+            "cluster": True,
+            "size": len(ms),
+            "members": sorted(m["id"] for m in ms),
+            "internal_edges": internal.get(cid, 0),
+        })
+    out = {"nodes": nodes, "edges": _collapse(level1["edges"], key)}
+    if opened:
+        out["expanded"] = sorted(shown)
+    return out
+
+
+def expand_cluster(
+    level1: Dict[str, Any], cluster_id: str, by: str = "community", expanded: Iterable[str] = (),
+) -> Optional[Dict[str, Any]]:
+    """Members of one super-node at level 1, plus boundary edges to the rest.
+
+    Neighbours are super-nodes unless they are in `expanded` too, in which case the
+    boundary edges point at their members, so expansions can be merged on the client.
+    """
+    view = cluster_graph(level1, by, {*expanded, cluster_id})
+    inside = {n["id"] for n in view["nodes"] if n.get("parent") == cluster_id}
+    if not inside:
+        return None
+    edges = [e for e in view["edges"] if e["source"] in inside or e["target"] in inside]
+    border = {e["source"] for e in edges} | {e["target"] for e in edges}
+    nodes = [n for n in view["nodes"] if n["id"] in inside]
+    nodes += sorted((n for n in view["nodes"] if n["id"] in border - inside), key=lambda n: n["id"])
+    return {"nodes": nodes, "edges": edges, "expanded": cluster_id}
+
+
+def graph_at_level(
+    graph: Any, level: int, by: str = "community", cluster: Optional[str] = None, min_nodes: int = 0,
+    expanded: Iterable[str] = (),
+) -> Optional[Dict[str, Any]]:
+    """Graph at the requested level; level 0 falls back to level 1 when there are <= min_nodes nodes.
+
+    `expanded` lists super-node ids to keep unfolded (level 0 and cluster expansion only).
+    """
+    if level >= 2 and not cluster:
+        return _as_dict(graph)
+    level1 = collapse_parallel_edges(graph)
+    if cluster:
+        return expand_cluster(level1, cluster, by, expanded)
+    if level == 1 or len(level1["nodes"]) <= min_nodes:
+        return level1
+    return cluster_graph(level1, by, expanded)
@@ -0,0 +1,128 @@
+"""
+Inverted IOC index: IOC value -> sorted timeline positions of the events that
+carry it, with per-IOC type, count and first/last seen time.
+
+Built while enriching (enrich_events(events, index=...) records event ids),
+then resolved against the final, time-sorted timeline so postings become
+ascending positions: a pivot is one dict lookup plus a list slice, no scan.
+Paths that enrich elsewhere (shard workers, job segments) build it from the
+finished timeline with IOCIndex.from_timeline().
+
+Persisted next to the case timeline as JSON:
+
+    {"version": 1, "events": N,
+     "iocs": {"203.0.113.66": {"type": "ip", "count": 3, "first": "...",
+                               "last": "...", "events": [4, 17, 90]}}}
+"""
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+FORMAT_VERSION = 1
+
+_IP = re.compile(r"^\d{1,3}(?:\.\d{1,3}){3}$")
+_HASH = re.compile(r"^(?:[a-f0-9]{32}|[a-f0-9]{40}|[a-f0-9]{64})$", re.I)
+
+
+def ioc_type(value: str) -> str:
+    if _IP.match(value):
+        return "ip"
+    if _HASH.match(value):
+        return "hash"
+    if "." in value and " " not in value:
+        return "domain"
+    return "other"
+
+
+def _get(e: Any, key: str) -> Any:
+    return e.get(key) if isinstance(e, dict) else getattr(e, key)
+
+
+class IOCIndex:
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.events = 0
+        self._pending: Dict[str, List[str]] = {}  # value -> event ids, until resolve()
+
+    # ---------- building ----------
+
+    def add(self, event_id: str, iocs: Iterable[str]) -> None:
+        """Record an enriched event; positions are assigned by resolve()."""
+        for v in iocs:
+            self._pending.setdefault(v, []).append(event_id)
+
+    def resolve(self, events: Sequence[Any]) -> "IOCIndex":
+        """Turn pending event ids into positions in the time-sorted timeline `events`."""
+        pos = {_get(e, "id"): i for i, e in enumerate(events)} if self._pending else {}
+        for v, ids in self._pending.items():
+            self._put(v, sorted(pos[i] for i in ids if i in pos), events)
+        self._pending.clear()
+        self.events = len(events)
+        return self
+
+    @classmethod
+    def from_timeline(cls, events: Sequence[Any]) -> "IOCIndex":
+        """Index a finished timeline (Events or dicts) in one pass."""
+        post: Dict[str, List[int]] = {}
+        for i, e in enumerate(events):
+            for v in _get(e, "iocs") or ():
+                post.setdefault(v, []).append(i)
+        idx = cls()
+        for v, positions in post.items():
+            idx._put(v, positions, events)
+        idx.events = len(events)
+        return idx
+
+    def _put(self, value: str, positions: List[int], events: Sequence[Any]) -> None:
+        if not positions:
+            return
+        self.entries[value] = {
+            "type": ioc_type(value), "count": len(positions),
+            "first": _get(events[positions[0]], "time"), "last": _get(events[positions[-1]], "time"),
+            "events": positions,
+        }
+
+    # ---------- queries ----------
+
+    def ranked(self, limit: int = 100, offset: int = 0, type: Optional[str] = None,
+               q: Optional[str] = None) -> Dict[str, Any]:
+        """IOCs by event count (desc), then first seen; without posting lists."""
+        rows = [(v, e) for v, e in self.entries.items()
+                if (not type or e["type"] == type) and (not q or q.lower() in v.lower())]
+        rows.sort(key=lambda r: (-r[1]["count"], r[1]["first"] or "", r[0]))
+        return {
+            "total": len(rows), "events": self.events, "offset": offset, "limit": limit,
+            "iocs": [{"value": v, "type": e["type"], "count": e["count"], "first": e["first"], "last": e["last"]}
+                     for v, e in rows[offset:offset + limit]],
+        }
+
+    def lookup(self, value: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(value)
+
+    def overview(self, top: int = 10) -> Dict[str, Any]:
+        return {"count": len(self.entries), "top": self.ranked(limit=top)["iocs"]}
+
+    # ---------- persistence ----------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": FORMAT_VERSION, "events": self.events, "iocs": self.entries}
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "IOCIndex":
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported IOC index version {data.get('version')!r} in {path}")
+        idx = cls()
+        idx.entries = data["iocs"]
+        idx.events = data["events"]
+        return idx
@@ -0,0 +1,234 @@
+"""
+Server-side node layouts for SentinelVision (NumPy).
+
+force_layout   Fruchterman-Reingold; above EXACT_MAX_NODES the repulsion uses a
+               Barnes-Hut approximation: a quadtree cell that is far enough
+               away (cell size / distance < theta) repels as one body at its
+               centre of mass, nearer cells are opened down to the leaves.
+layered_layout time-ordered columns: a node's column is the first stepNum at
+               which it is reached (origins sit just before their first move);
+               rows are ordered by neighbour barycentres to reduce crossings.
+
+Both return {node_id: (x, y)} scaled into a WIDTH x HEIGHT box.
+"""
+import math
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+WIDTH, HEIGHT = 1000.0, 700.0
+# below this many nodes the O(n^2) all-pairs repulsion is cheaper than the tree
+EXACT_MAX_NODES = 400
+LAYOUTS = ("force", "layered")
+
+
+def _as_dict(obj: Any) -> Dict[str, Any]:
+    if isinstance(obj, dict):
+        return obj
+    return obj.model_dump() if hasattr(obj, "model_dump") else obj.dict()
+
+
+def _index(graph: Dict[str, Any]) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    ids = [_as_dict(n)["id"] for n in graph.get("nodes", [])]
+    pos = {nid: i for i, nid in enumerate(ids)}
+    src, dst, w, step = [], [], [], []
+    for e in graph.get("edges", []):
+        e = _as_dict(e)
+        for k in (e["source"], e["target"]):
+            if k not in pos:
+                pos[k] = len(ids)
+                ids.append(k)
+        src.append(pos[e["source"]])
+        dst.append(pos[e["target"]])
+        w.append(int(e.get("weight") or 1))
+        step.append(int(e.get("stepMin", e.get("stepNum")) or 0))
+    return ids, np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64), \
+        np.array(w, dtype=np.float64), np.array(step, dtype=np.int64)
+
+
+def _scale(xy: np.ndarray) -> np.ndarray:
+    if len(xy) == 0:
+        return xy
+    lo, hi = xy.min(axis=0), xy.max(axis=0)
+    span = np.where(hi - lo > 1e-9, hi - lo, 1.0)
+    margin = 40.0
+    box = np.array([WIDTH - 2 * margin, HEIGHT - 2 * margin])
+    out = (xy - lo) / span * box + margin
+    out[:, (hi - lo) <= 1e-9] = (box / 2 + margin)[(hi - lo) <= 1e-9]
+    return out
+
+
+def _as_positions(ids: List[str], xy: np.ndarray) -> Dict[str, Tuple[float, float]]:
+    xy = np.round(_scale(xy), 1)
+    return {nid: (float(x), float(y)) for nid, (x, y) in zip(ids, xy)}
+
+
+def _repulsion_exact(xy: np.ndarray, k2: float) -> np.ndarray:
+    d = xy[:, None, :] - xy[None, :, :]
+    d2 = (d ** 2).sum(axis=2)
+    np.fill_diagonal(d2, np.inf)
+    return (d * (k2 / np.maximum(d2, 1e-9))[:, :, None]).sum(axis=1)
+
+
+def _repulsion(xy: np.ndarray, k2: float, theta: float) -> np.ndarray:
+    """Barnes-Hut repulsion over an implicit quadtree, evaluated level by level.
+
+    Every (node, cell) pair that fails the opening criterion is split into the
+    cell's four children at the next level; pairs still open at the leaf level
+    are computed exactly against the leaf's members.
+    """
+    n = len(xy)
+    depth = int(min(10, max(1, math.ceil(math.log(max(n, 2), 4)) + 1)))
+    lo = xy.min(axis=0)
+    span = max(float((xy.max(axis=0) - lo).max()), 1e-6) * (1 + 1e-9)
+    side = 1 << depth
+    cxy = np.minimum(((xy - lo) / span * side).astype(np.int64), side - 1)
+
+    # per level: cell key of every node, cell mass and centre of mass
+    keys, mass, com = [], [], []
+    for lvl in range(depth + 1):
+        sh = depth - lvl
+        key = (cxy[:, 0] >> sh) * (1 << lvl) + (cxy[:, 1] >> sh)
+        m = np.bincount(key, minlength=1 << (2 * lvl)).astype(np.float64)
+        c = np.stack([np.bincount(key, weights=xy[:, d], minlength=len(m)) for d in (0, 1)], axis=1)
+        c /= np.maximum(m, 1.0)[:, None]
+        keys.append(key)
+        mass.append(m)
+        com.append(c)
+
+    force = np.zeros_like(xy)
+    node = np.arange(n)
+    cell = keys[0].copy()  # the root
+    for lvl in range(depth + 1):
+        keep = mass[lvl][cell] > 0
+        node, cell = node[keep], cell[keep]
+        delta = xy[node] - com[lvl][cell]
+        d2 = (delta ** 2).sum(axis=1)
+        size = span / (1 << lvl)
+        far = (size * size < theta * theta * d2) & (keys[lvl][node] != cell)
+        if lvl == depth:
+            far[:] = False
+        wgt = mass[lvl][cell[far]] * k2 / d2[far]
+        for d in (0, 1):
+            force[:, d] += np.bincount(node[far], weights=delta[far, d] * wgt, minlength=n)
+        node, cell = node[~far], cell[~far]
+        if lvl == depth:
+            break
+        # open: four children at the next level
+        row, col = cell // (1 << lvl), cell % (1 << lvl)
+        w = 1 << (lvl + 1)
+        kids = np.stack([(2 * row + a) * w + (2 * col + b) for a in (0, 1) for b in (0, 1)], axis=1)
+        node = np.repeat(node, 4)
+        cell = kids.ravel()
+
+    # leaves left open: exact against their members
+    leaf = keys[depth]
+    by_leaf = np.argsort(leaf, kind="stable")
+    counts = mass[depth].astype(np.int64)
+    starts = np.cumsum(counts) - counts
+    reps = counts[cell]
+    total = int(reps.sum())
+    offs = np.repeat(starts[cell] - (np.cumsum(reps) - reps), reps) + np.arange(total)
+    rows = np.repeat(node, reps)
+    cols = by_leaf[offs]
+    d = xy[rows] - xy[cols]
+    d2 = (d ** 2).sum(axis=1)
+    wgt = np.where(d2 > 0, k2 / np.maximum(d2, 1e-9), 0.0)
+    for dim in (0, 1):
+        force[:, dim] += np.bincount(rows, weights=d[:, dim] * wgt, minlength=n)
+    return force
+
+
+def force_layout(graph: Any, iterations: int = 0, theta: float = 1.0, seed: int = 7) -> Dict[str, Tuple[float, float]]:
+    g = _as_dict(graph)
+    ids, src, dst, w, _ = _index(g)
+    n = len(ids)
+    if n == 0:
+        return {}
+    if n == 1:
+        return {ids[0]: (WIDTH / 2, HEIGHT / 2)}
+    if not iterations:
+        iterations = 150 if n <= EXACT_MAX_NODES else 80 if n <= 5000 else 40
+
+    rng = np.random.default_rng(seed)
+    xy = rng.random((n, 2)) * math.sqrt(n)
+    k = 1.0
+    k2 = k * k
+    attract_w = 1.0 + np.log(w) if len(w) else w
+    temp = math.sqrt(n) / 10.0
+    cool = temp / (iterations + 1)
+    for _ in range(iterations):
+        disp = _repulsion_exact(xy, k2) if n <= EXACT_MAX_NODES else _repulsion(xy, k2, theta)
+        if len(src):
+            d = xy[src] - xy[dst]
+            dist = np.sqrt((d ** 2).sum(axis=1)) + 1e-9
+            pull = d * (dist * attract_w / k)[:, None]
+            np.subtract.at(disp, src, pull)
+            np.add.at(disp, dst, pull)
+        # mild gravity keeps disconnected components on screen
+        disp -= (xy - xy.mean(axis=0)) * 0.01
+        length = np.sqrt((disp ** 2).sum(axis=1)) + 1e-9
+        xy += disp / length[:, None] * np.minimum(length, temp)[:, None]
+        temp -= cool
+    return _as_positions(ids, xy)
+
+
+def layered_layout(graph: Any, sweeps: int = 4) -> Dict[str, Tuple[float, float]]:
+    g = _as_dict(graph)
+    ids, src, dst, _, step = _index(g)
+    n = len(ids)
+    if n == 0:
+        return {}
+
+    # column key: step at which a node is first reached; pure origins sit
+    # half a step before their first outgoing edge
+    big = float(np.iinfo(np.int64).max)
+    reached = np.full(n, big)
+    acted = np.full(n, big)
+    if len(src):
+        np.minimum.at(reached, dst, step.astype(np.float64))
+        np.minimum.at(acted, src, step.astype(np.float64))
+    key = np.where(reached < big, reached, acted - 0.5)
+    key[key >= big - 1] = -1.0
+    _, layer = np.unique(key, return_inverse=True)
+
+    order = np.zeros(n, dtype=np.float64)
+    for lyr in range(layer.max() + 1):
+        members = np.flatnonzero(layer == lyr)
+        order[members] = np.arange(len(members))
+    for _ in range(sweeps):
+        if not len(src):
+            break
+        # barycentre of neighbours in other layers, then re-rank within each layer
+        tot = np.bincount(dst, weights=order[src], minlength=n) + np.bincount(src, weights=order[dst], minlength=n)
+        cnt = np.bincount(dst, minlength=n) + np.bincount(src, minlength=n)
+        bary = np.where(cnt > 0, tot / np.maximum(cnt, 1), order)
+        for lyr in range(layer.max() + 1):
+            members = np.flatnonzero(layer == lyr)
+            members = members[np.argsort(bary[members], kind="stable")]
+            order[members] = np.arange(len(members))
+
+    per_layer = np.bincount(layer)
+    y = (order + 0.5) / per_layer[layer]
+    xy = np.stack([layer.astype(np.float64), y], axis=1)
+    if layer.max() == 0:
+        xy[:, 0] = 0.5
+    return _as_positions(ids, xy)
+
+
+def compute_layout(graph: Any, name: str) -> Dict[str, Tuple[float, float]]:
+    if name == "force":
+        return force_layout(graph)
+    if name == "layered":
+        return layered_layout(graph)
+    raise ValueError(f"unknown layout '{name}' (use {'|'.join(LAYOUTS)})")
+
+
+def with_positions(graph: Dict[str, Any], positions: Dict[str, Tuple[float, float]]) -> Dict[str, Any]:
+    """Shallow copy of graph whose nodes carry x/y (source graph is left untouched)."""
+    nodes = []
+    for n in graph.get("nodes", []):
+        n = _as_dict(n)
+        x, y = positions.get(n["id"], (None, None))
+        nodes.append({**n, "x": x, "y": y})
+    return {**graph, "nodes": nodes}
@@ -0,0 +1,379 @@
+"""
+Single client for Granite / watsonx text generation.
+
+Every LLM call in the backend goes through `get_client().generate()`:
+
+  * one pooled requests.Session (keep-alive, bounded pool) per backend
+  * token-bucket rate limiting (SENTINEL_LLM_RPS / SENTINEL_LLM_BURST) and a
+    cap on concurrent calls (SENTINEL_LLM_CONCURRENCY)
+  * retries with exponential backoff and full jitter on 429 / 5xx /
+    connection errors, honouring Retry-After
+  * identical in-flight prompts are coalesced: later callers wait for the
+    first call's result instead of sending the request again
+  * generate_many() fans a batch out under the same limits
+
+Backends (SENTINEL_LLM_BACKEND=auto|rest|sdk|http|off, default auto):
+  rest  watsonx.ai REST API (IAM token cached until it expires)
+  sdk   ibm-watsonx-ai SDK, model objects cached per model/params
+  http  any local stand-in speaking POST {SENTINEL_LLM_URL}/generate
+        {"prompt", "model_id", "parameters"} -> {"text"} (see bench/llm_stub.py)
+auto picks http when SENTINEL_LLM_URL is set, otherwise rest when watsonx
+credentials are present. The backend (SDK import, HTTP session) is built on
+the first get_client() call, not at import.
+
+Credentials: WATSONX_API_KEY / WATSONX_PROJECT_ID / WATSONX_BASE_URL /
+WATSONX_MODEL_ID; the older IBM_WATSONX_APIKEY / IBM_PROJECT_ID /
+IBM_WATSONX_URL / IBM_WATSONX_MODEL_ID names are still accepted.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from metrics import stage
+except Exception:
+    from backend.metrics import stage  # type: ignore
+
+
+def _env(*names: str, default: str = "") -> str:
+    for n in names:
+        v = os.getenv(n)
+        if v:
+            return v
+    return default
+
+
+API_KEY = _env("WATSONX_API_KEY", "IBM_WATSONX_APIKEY")
+PROJECT_ID = _env("WATSONX_PROJECT_ID", "IBM_PROJECT_ID")
+BASE_URL = _env("WATSONX_BASE_URL", "IBM_WATSONX_URL", default="https://eu-gb.ml.cloud.ibm.com").rstrip("/")
+MODEL_ID = _env("WATSONX_MODEL_ID", "IBM_WATSONX_MODEL_ID", default="ibm/granite-13b-chat-v2")
+IAM_URL = os.getenv("WATSONX_IAM_URL", "https://iam.cloud.ibm.com/identity/token")
+API_VERSION = os.getenv("WATSONX_API_VERSION", "2023-05-29")
+
+BACKEND = os.getenv("SENTINEL_LLM_BACKEND", "auto").lower()
+STUB_URL = os.getenv("SENTINEL_LLM_URL", "").rstrip("/")
+RPS = float(os.getenv("SENTINEL_LLM_RPS", "2"))
+BURST = int(os.getenv("SENTINEL_LLM_BURST", "4"))
+CONCURRENCY = int(os.getenv("SENTINEL_LLM_CONCURRENCY", "4"))
+MAX_RETRIES = int(os.getenv("SENTINEL_LLM_RETRIES", "3"))
+TIMEOUT = float(os.getenv("SENTINEL_LLM_TIMEOUT", "60"))
+
+DEFAULT_PARAMS: Dict[str, Any] = {"decoding_method": "greedy", "max_new_tokens": 600, "temperature": 0.2}
+
+
+class LLMError(RuntimeError):
+    pass
+
+
+class RetryableLLMError(LLMError):
+    def __init__(self, msg: str, retry_after: Optional[float] = None):
+        super().__init__(msg)
+        self.retry_after = retry_after
+
+
+def _session(pool: int):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+def _post_json(session, url: str, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    import requests
+
+    try:
+        r = session.post(url, json=body, headers=headers or {}, timeout=TIMEOUT)
+    except (requests.ConnectionError, requests.Timeout) as e:
+        raise RetryableLLMError(f"{type(e).__name__}: {e}") from e
+    if r.status_code == 429 or r.status_code >= 500:
+        ra = r.headers.get("Retry-After")
+        raise RetryableLLMError(f"HTTP {r.status_code}: {r.text[:200]}",
+                                float(ra) if ra and ra.replace(".", "", 1).isdigit() else None)
+    if r.status_code >= 400:
+        raise LLMError(f"HTTP {r.status_code}: {r.text[:200]}")
+    return r.json()
+
+
+def _generated_text(out: Any) -> str:
+    if isinstance(out, dict):
+        res = out.get("results") or []
+        if isinstance(res, list) and res and isinstance(res[0], dict):
+            return res[0].get("generated_text") or res[0].get("text") or ""
+        return out.get("generated_text") or out.get("text") or ""
+    return str(out)
+
+
+class RestBackend:
+    name = "rest"
+
+    def __init__(self):
+        self.session = _session(CONCURRENCY)
+        self._token: Optional[str] = None
+        self._token_exp = 0.0
+        self._token_lock = threading.Lock()
+
+    def _bearer(self) -> str:
+        with self._token_lock:
+            if self._token is None or time.time() > self._token_exp - 60:
+                import requests
+
+                try:
+                    r = self.session.post(IAM_URL, timeout=TIMEOUT, data={
+                        "grant_type": "urn:ibm:params:oauth:grant-type:apikey", "apikey": API_KEY})
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    raise RetryableLLMError(f"IAM token: {e}") from e
+                if r.status_code >= 400:
+                    raise (RetryableLLMError if r.status_code >= 500 else LLMError)(f"IAM token: HTTP {r.status_code}")
+                tok = r.json()
+                self._token = tok["access_token"]
+                self._token_exp = float(tok.get("expiration") or time.time() + 3000)
+            return self._token
+
+    def warm(self) -> None:
+        self._bearer()
+
+    def generate(self, prompt: str, model_id: str, params: Dict[str, Any]) -> str:
+        out = _post_json(
+            self.session,
+            f"{BASE_URL}/ml/v1/text/generation?version={API_VERSION}",
+            {"model_id": model_id, "input": prompt, "parameters": params, "project_id": PROJECT_ID},
+            {"Authorization": f"Bearer {self._bearer()}", "Accept": "application/json"},
+        )
+        return _generated_text(out)
+
+
+_RETRYABLE_STATUS = re.compile(r"\b(?:429|5\d\d)\b")
+
+
+class SDKBackend:
+    name = "sdk"
+
+    def __init__(self):
+        from ibm_watsonx_ai import Credentials  # optional dependency
+        try:
+            from ibm_watsonx_ai.foundation_models import Model as _Model
+        except Exception:
+            from ibm_watsonx_ai import ModelInference as _Model
+        self._creds = Credentials(api_key=API_KEY, url=BASE_URL)
+        self._cls = _Model
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str, model_id: str, params: Dict[str, Any]) -> str:
+        key = (model_id, json.dumps(params, sort_keys=True))
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._models[key] = self._cls(
+                    model_id=model_id, credentials=self._creds, project_id=PROJECT_ID, params=params)
+        try:
+            out = model.generate_text(prompt=prompt) if hasattr(model, "generate_text") else model.generate(prompt=prompt)
+        except Exception as e:
+            # the SDK wraps HTTP errors; rate limits and server errors are worth retrying
+            msg = str(e)
+            if _RETRYABLE_STATUS.search(msg):
+                raise RetryableLLMError(msg) from e
+            raise LLMError(msg) from e
+        return _generated_text(out)
+
+
+class HTTPBackend:
+    name = "http"
+
+    def __init__(self, url: str = STUB_URL):
+        self.url = url
+        self.session = _session(CONCURRENCY)
+
+    def generate(self, prompt: str, model_id: str, params: Dict[str, Any]) -> str:
+        return _generated_text(_post_json(
+            self.session, f"{self.url}/generate", {"prompt": prompt, "model_id": model_id, "parameters": params}))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns the time spent waiting."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_BACKENDS = {"rest": RestBackend, "sdk": SDKBackend, "http": HTTPBackend}
+
+
+def _backend_mode() -> Tuple[str, str]:
+    """(mode, reason) from the environment alone: no SDK import, no network."""
+    mode = BACKEND
+    if mode == "auto":
+        mode = "http" if STUB_URL else "rest" if (API_KEY and PROJECT_ID) else "off"
+    if mode == "off":
+        return "off", "no SENTINEL_LLM_URL and no WATSONX_API_KEY/WATSONX_PROJECT_ID"
+    if mode in ("rest", "sdk") and not (API_KEY and PROJECT_ID):
+        return "off", "missing API key/project id"
+    if mode not in _BACKENDS:
+        return "off", f"unknown SENTINEL_LLM_BACKEND '{mode}'"
+    return mode, ""
+
+
+def _select_backend():
+    mode, reason = _backend_mode()
+    if mode == "off":
+        return None, reason
+    try:
+        return _BACKENDS[mode](), ""
+    except Exception as e:
+        return None, f"{mode} backend unavailable: {e}"
+
+
+class LLMClient:
+    def __init__(self, backend=None, rate: float = RPS, burst: int = BURST,
+                 concurrency: int = CONCURRENCY, retries: int = MAX_RETRIES, reason: str = ""):
+        self.backend = backend
+        self.reason = reason
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(max(1, concurrency))
+        self.retries = retries
+        self._inflight: Dict[Tuple[str, str, str], Future] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="llm")
+        self.counters = {"requests": 0, "calls": 0, "coalesced": 0, "retries": 0, "failures": 0, "throttled_s": 0.0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _count(self, key: str, n: float = 1) -> None:
+        with self._lock:
+            self.counters[key] += n
+
+    def _call(self, prompt: str, model_id: str, params: Dict[str, Any]) -> str:
+        attempt = 0
+        while True:
+            self._count("throttled_s", self.bucket.acquire())
+            with self.slots:
+                self._count("calls")
+                try:
+                    with stage("llm", nbytes=len(prompt)):
+                        return self.backend.generate(prompt, model_id, params)
+                except RetryableLLMError as e:
+                    if attempt >= self.retries:
+                        raise
+                    retry_after = e.retry_after
+            attempt += 1
+            self._count("retries")
+            # exponential backoff with full jitter, never shorter than Retry-After
+            time.sleep(max(retry_after or 0.0, random.uniform(0, min(30.0, 0.5 * 2 ** attempt))))
+
+    def generate(self, prompt: str, model_id: Optional[str] = None, params: Optional[Dict[str, Any]] = None) -> str:
+        """Generated text; raises LLMError when disabled or after the last retry."""
+        if self.backend is None:
+            raise LLMError(f"LLM disabled: {self.reason}")
+        model_id = model_id or MODEL_ID
+        params = {**DEFAULT_PARAMS, **(params or {})}
+        key = (model_id, json.dumps(params, sort_keys=True), prompt)
+        with self._lock:
+            self.counters["requests"] += 1
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+            else:
+                self.counters["coalesced"] += 1
+        if not owner:
+            return fut.result()
+        try:
+            text = self._call(prompt, model_id, params)
+            fut.set_result(text)
+            return text
+        except Exception as e:
+            self._count("failures")
+            err = e if isinstance(e, LLMError) else LLMError(f"{type(e).__name__}: {e}")
+            fut.set_exception(err)
+            raise err from e
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def generate_many(self, prompts: Sequence[str], model_id: Optional[str] = None,
+                      params: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """One result per prompt: the text, or the LLMError raised for it."""
+        futs = [self._pool.submit(self.generate, p, model_id, params) for p in prompts]
+        out: List[Any] = []
+        for f in futs:
+            try:
+                out.append(f.result())
+            except LLMError as e:
+                out.append(e)
+        return out
+
+    def warm(self) -> None:
+        """Open the backend's connections ahead of the first call (IAM token for rest)."""
+        if self.backend is not None and hasattr(self.backend, "warm"):
+            self.backend.warm()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            c = dict(self.counters)
+        return {"backend": getattr(self.backend, "name", None), "reason": self.reason, "model_id": MODEL_ID,
+                "rps": self.bucket.rate, "burst": self.bucket.capacity, "inflight": len(self._inflight),
+                **c, "throttled_s": round(c["throttled_s"], 3)}
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> LLMClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                backend, reason = _select_backend()
+                _client = LLMClient(backend, reason=reason)
+    return _client
+
+
+def is_configured() -> bool:
+    return get_client().enabled
+
+
+def configured_mode() -> Tuple[str, str]:
+    """(backend name or "off", reason) without building the client if it isn't yet."""
+    if _client is not None:
+        return (_client.backend.name, "") if _client.enabled else ("off", _client.reason)
+    return _backend_mode()
+
+
+def describe() -> str:
+    """Startup banner line; reads the config only, so the SDK/session stay unbuilt."""
+    mode, reason = configured_mode()
+    if mode == "off":
+        return f"Granite summaries: DISABLED ({reason})"
+    target = STUB_URL if mode == "http" else BASE_URL
+    return f"Granite enabled -> backend={mode} base={target} model={MODEL_ID} rps={RPS} concurrency={CONCURRENCY}"
@@ -1,8 +1,24 @@
+"""
+MITRE mapping for agent_tools events.
+
+SENTINEL_MITRE_MAPPER=rag (default) retrieves the closest technique from the
+local KB index (see mitre_rag); summaries it cannot place confidently fall
+back to the keyword LOOKUPS. SENTINEL_MITRE_MAPPER=keyword uses LOOKUPS only.
+Sigma rules (see sigma) run last: a matching rule's ATT&CK tag overrides the
+retrieved technique and the match is kept in event.raw["sigma"].
+"""
+import hashlib
+import os
+
 try:
     from schemas.models import Event
 except Exception:
     from backend.schemas.models import Event  # type: ignore
 
+from .sigma import apply_sigma, ruleset_signature
+
+MAPPER = os.getenv("SENTINEL_MITRE_MAPPER", "rag").lower()
+
 LOOKUPS = [
     ("ssh",     ("Credential Access", "T1110 Brute Force")),
     ("brute",   ("Credential Access", "T1110 Brute Force")),
@@ -12,15 +28,34 @@ LOOKUPS = [
     ("scp",     ("Exfiltration",      "T1048 Exfiltration Over Alt Protocol")),
 ]
 
-def map_events_to_mitre(events: list[Event]) -> list[Event]:
-    for e in events:
-        text = (e.summary or "").lower()
-        assigned = False
-        for key, (tac, tech) in LOOKUPS:
-            if key in text:
-                e.tactic, e.technique = tac, tech
-                assigned = True
-                break
-        if not assigned and not e.tactic:
+def _keyword(text: str):
+    text = text.lower()
+    for key, hit in LOOKUPS:
+        if key in text:
+            return hit
+    return None
+
+def _retriever():
+    # imported on first use: numpy + building the index is not paid at API import
+    from .mitre_rag import get_retriever
+    return get_retriever()
+
+def fingerprint() -> str:
+    """Hash of everything that decides an event's tactic/technique: mode, keyword table, KB, Sigma rules."""
+    parts = [MAPPER, repr(LOOKUPS), ruleset_signature()]
+    if MAPPER == "rag":
+        from . import mitre_rag
+        parts += [mitre_rag.kb_signature(), mitre_rag.MODEL_NAME, repr(mitre_rag.MIN_SCORE)]
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+
+def map_events_to_mitre(events: list[Event], sigma: bool = True) -> list[Event]:
+    """Tactic/technique per event (RAG or keyword table), then Sigma unless sigma=False."""
+    summaries = [e.summary or "" for e in events]
+    matches = _retriever().match(summaries) if MAPPER == "rag" else [None] * len(events)
+    for e, text, m in zip(events, summaries, matches):
+        hit = m[:2] if m else _keyword(text)
+        if hit:
+            e.tactic, e.technique = hit
+        elif not e.tactic:
             e.tactic, e.technique = "Discovery", ""
-    return events
+    return apply_sigma(events) if sigma else events
@@ -0,0 +1,242 @@
+"""
+Local retrieval for MITRE ATT&CK mapping (no remote calls).
+
+Every technique in data/mitre_kb.jsonl contributes several short documents
+(name + description, and each typical log phrase from "examples") which are
+embedded once into a row-normalised matrix; event summaries are embedded in
+batches and matched by cosine similarity (matrix product + argmax), FAISS
+IndexFlatIP style. Short phrase documents match short log lines far better
+than one long description per technique.
+
+Embedders:
+  tfidf  (default) word uni/bi-grams, sublinear tf, idf fitted on the KB,
+         NumPy only
+  st     sentence-transformers model named by SENTINEL_MITRE_MODEL, used when
+         that package is installed (CPU)
+
+Log lines repeat the same few templates with different IPs, users, ports and
+numbers, so summaries are normalised to a template first and each template
+is embedded and scored only once (bounded LRU cache).
+
+Env:
+  SENTINEL_MITRE_KB         KB path (default data/mitre_kb.jsonl)
+  SENTINEL_MITRE_MODEL      sentence-transformers model name; empty = tfidf
+  SENTINEL_MITRE_MIN_SCORE  minimum cosine similarity to accept (default 0.25)
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KB_PATH = os.getenv("SENTINEL_MITRE_KB", str(Path(__file__).resolve().parents[2] / "data" / "mitre_kb.jsonl"))
+MODEL_NAME = os.getenv("SENTINEL_MITRE_MODEL", "")
+MIN_SCORE = float(os.getenv("SENTINEL_MITRE_MIN_SCORE", "0.25"))
+BATCH_SIZE = 256
+CACHE_SIZE = 50000
+
+_TEMPLATE_SUBS: Tuple[Tuple["re.Pattern[str]", object], ...] = (
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), " <ip> "),
+    (re.compile(r"\b[0-9a-f]{8,}\b"), " <hex> "),
+    (re.compile(r"\b(?:user|for|by|as|rhost)[= ]+[\w.-]+"), lambda m: m.group(0).split()[0].split("=")[0] + " <usr> "),
+    (re.compile(r"(?<![a-z])\d+"), "0"),
+    (re.compile(r"\s+"), " "),
+)
+_TOKEN = re.compile(r"[a-z][a-z0-9_]+")
+_PLACEHOLDER = re.compile(r"<(?:ip|hex|usr)>")
+_STOP = frozenset("the a an of to on in for from by with as and or is are be may such using via at".split())
+
+
+def normalize_template(text: str) -> str:
+    """Collapse variable parts (IPs, ids, users, numbers) so repeated messages share a key."""
+    s = (text or "").lower()
+    for pat, rep in _TEMPLATE_SUBS:
+        s = pat.sub(rep, s)
+    return s.strip()
+
+
+def _tokens(text: str) -> List[str]:
+    text = _PLACEHOLDER.sub(" ", text.lower())
+    words = [w[:-1] if w.endswith("s") and len(w) > 4 else w
+             for w in _TOKEN.findall(text) if w not in _STOP]
+    return words + [a + " " + b for a, b in zip(words, words[1:])]
+
+
+class TfidfEmbedder:
+    """TF-IDF over the KB vocabulary (sublinear tf).
+
+    Query terms outside the vocabulary cannot match anything, but they still
+    count towards the query norm (at the maximum idf), so a long line that
+    shares one word with a technique scores lower than a short one.
+    """
+
+    def __init__(self):
+        self.vocab: Dict[str, int] = {}
+        self.idf = np.ones(0, dtype=np.float32)
+        self.oov_idf = 1.0
+
+    def fit(self, docs: Sequence[str]) -> "TfidfEmbedder":
+        df: Dict[str, int] = {}
+        for d in docs:
+            for tok in set(_tokens(d)):
+                df[tok] = df.get(tok, 0) + 1
+        self.vocab = {tok: i for i, tok in enumerate(sorted(df))}
+        counts = np.array([df[t] for t in sorted(df)], dtype=np.float32)
+        self.idf = (np.log((1 + len(docs)) / (1 + counts)) + 1).astype(np.float32)
+        self.oov_idf = float(np.log(1 + len(docs)) + 1)
+        return self
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), len(self.vocab)), dtype=np.float32)
+        oov = np.zeros(len(texts), dtype=np.float32)
+        for i, t in enumerate(texts):
+            tf: Dict[str, int] = {}
+            for tok in _tokens(t):
+                tf[tok] = tf.get(tok, 0) + 1
+            for tok, c in tf.items():
+                w = 1.0 + math.log(c)
+                j = self.vocab.get(tok)
+                if j is None:
+                    oov[i] += (w * self.oov_idf) ** 2
+                else:
+                    out[i, j] = w * self.idf[j]
+        norm = np.sqrt((out ** 2).sum(axis=1) + oov)
+        return out / np.where(norm > 0, norm, 1.0)[:, None]
+
+
+class SentenceEmbedder:
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer  # optional dependency
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def fit(self, docs: Sequence[str]) -> "SentenceEmbedder":
+        return self
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vecs = self.model.encode(list(texts), batch_size=BATCH_SIZE, normalize_embeddings=True)
+        return np.asarray(vecs, dtype=np.float32)
+
+
+_kb_sig: Optional[Tuple[Tuple, str]] = None
+
+
+def kb_signature(path: str = KB_PATH) -> str:
+    """SHA-1 of the KB file (re-hashed only when its mtime/size change)."""
+    global _kb_sig
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    stamp = (path, st.st_mtime_ns, st.st_size)
+    cached = _kb_sig
+    if cached is None or cached[0] != stamp:
+        with open(path, "rb") as f:
+            cached = _kb_sig = (stamp, hashlib.sha1(f.read()).hexdigest())
+    return cached[1]
+
+
+def load_kb(path: str = KB_PATH) -> List[Dict[str, str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _docs(entry: Dict[str, str]) -> List[str]:
+    head = f"{entry.get('name', '')} {entry.get('description', '')}"
+    return [head] + [p.strip() for p in entry.get("examples", "").split(";") if p.strip()]
+
+
+class VectorIndex:
+    """Flat inner-product index over unit vectors (exact search)."""
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        sims = queries @ self.vectors.T
+        if k == 1:
+            idx = sims.argmax(axis=1)[:, None]
+        else:
+            idx = np.argsort(-sims, axis=1)[:, :k]
+        return np.take_along_axis(sims, idx, axis=1), idx
+
+
+class MitreRetriever:
+    def __init__(self, kb: List[Dict[str, str]], model_name: str = MODEL_NAME, min_score: float = MIN_SCORE):
+        self.kb = kb
+        self.min_score = min_score
+        docs: List[str] = []
+        self.doc_technique: List[int] = []
+        for i, e in enumerate(kb):
+            for d in _docs(e):
+                docs.append(d)
+                self.doc_technique.append(i)
+        self.embedder = SentenceEmbedder(model_name) if model_name else TfidfEmbedder()
+        self.embedder.fit(docs)
+        self.index = VectorIndex(self.embedder.embed(docs))
+        self.labels = [(e["tactic"], f"{e['technique_id']} {e.get('name', '')}".strip()) for e in kb]
+        self._cache: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _lookup(self, key: str) -> Optional[Tuple[int, float]]:
+        with self._lock:
+            v = self._cache.get(key)
+            if v is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            return v
+
+    def _store(self, items: Iterable[Tuple[str, Tuple[int, float]]]) -> None:
+        with self._lock:
+            for k, v in items:
+                self._cache[k] = v
+                self.misses += 1
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def match(self, texts: Sequence[str]) -> List[Optional[Tuple[str, str, float]]]:
+        """(tactic, technique, score) per text, or None below min_score."""
+        keys = [normalize_template(t) for t in texts]
+        found: Dict[str, Tuple[int, float]] = {}
+        todo: List[str] = []
+        for k in dict.fromkeys(keys):
+            v = self._lookup(k)
+            if v is None:
+                todo.append(k)
+            else:
+                found[k] = v
+        for i in range(0, len(todo), BATCH_SIZE):
+            batch = todo[i:i + BATCH_SIZE]
+            scores, idx = self.index.search(self.embedder.embed(batch))
+            fresh = [(k, (self.doc_technique[j], float(s))) for k, j, s in zip(batch, idx[:, 0], scores[:, 0])]
+            found.update(fresh)
+            self._store(fresh)
+
+        out: List[Optional[Tuple[str, str, float]]] = []
+        for k in keys:
+            j, s = found[k]
+            out.append((*self.labels[j], round(s, 4)) if s >= self.min_score else None)
+        return out
+
+    def stats(self) -> Dict[str, object]:
+        return {"embedder": type(self.embedder).__name__, "techniques": len(self.kb),
+                "templates_cached": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+_retriever: Optional[MitreRetriever] = None
+_build_lock = threading.Lock()
+
+
+def get_retriever() -> MitreRetriever:
+    global _retriever
+    if _retriever is None:
+        with _build_lock:
+            if _retriever is None:
+                _retriever = MitreRetriever(load_kb())
+    return _retriever
@@ -1,13 +1,30 @@
-import os, requests
+import os, threading
 
 NEPTUNE_ENDPOINT = os.getenv("NEPTUNE_ENDPOINT")
 NEPTUNE_PORT = os.getenv("NEPTUNE_PORT", "8182")
 BASE = f"https://{NEPTUNE_ENDPOINT}:{NEPTUNE_PORT}/openCypher" if NEPTUNE_ENDPOINT else None
 
+_session = None
+_session_lock = threading.Lock()
+
+def _get_session():
+    # requests is imported and the keep-alive session built on first use, not at API import
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                _session = requests.Session()
+    return _session
+
+def warm():
+    if BASE:
+        _get_session()
+
 def _run(query: str):
     if not BASE:
         raise RuntimeError("NEPTUNE_ENDPOINT not set")
-    r = requests.post(BASE, json={"query": query}, timeout=30, verify=False)
+    r = _get_session().post(BASE, json={"query": query}, timeout=30, verify=False)
     r.raise_for_status()
     return r.json()
 
@@ -1,30 +1,127 @@
-import re, uuid
+"""
+Line parser for `TIME SRC -> DST : MSG` and `TIME SRC : MSG` logs.
+
+The canonical, space-separated shape is split with str.split; a line that
+does not fit it exactly goes to the regexes (PAT_ARROW, then PAT_SIMPLE), so
+results are the same as a regex-only parser. Lines neither path understands
+are counted in PARSE_STATS and kept in a small sample instead of vanishing.
+The counters are per process.
+
+Event ids are "<process prefix>-<counter>" instead of uuid4: unique within
+a process, and the prefix is redrawn after a fork so shard workers differ.
+Events are still built through the validating constructor: with pydantic 2
+(Rust core) that is cheaper than model_construct's Python-level field loop.
+`iocs` is passed explicitly, so the list default is not deep-copied per event.
+"""
+import itertools
+import os
+import re
+import threading
+import uuid
+from collections import Counter, deque
+from typing import Any, Dict, Iterable, Iterator, Optional
 try:
     from schemas.models import Event
 except Exception:
     from backend.schemas.models import Event  # type: ignore
 
+from .symbols import HOSTS
+
 PAT_ARROW  = re.compile(r"^([0-9TZ:\-]+)\s+(\S+)\s*->\s*(\S+)\s*:\s*(.+)$")
 PAT_SIMPLE = re.compile(r"^([0-9TZ:\-]+)\s+(\S+)\s*:\s*(.+)$")
+_TIME_CHARS = "0123456789TZ:-"
 
-def parse_logs(text: str):
-    events = []
-    for line in text.splitlines():
-        s = line.strip()
-        if not s:
-            continue
-        m = PAT_ARROW.match(s)
-        if m:
-            t, src, dst, msg = m.groups()
-        else:
-            m2 = PAT_SIMPLE.match(s)
-            if not m2:
+# lines seen, parsed by the split fast path / regex fallback, blank, unparsed
+PARSE_STATS: Counter = Counter()
+UNPARSED_BY_ORIGIN: Counter = Counter()
+UNPARSED_SAMPLE: deque = deque(maxlen=20)
+_stats_lock = threading.Lock()
+
+_ids = {"pid": None, "prefix": "", "counter": itertools.count()}
+
+
+def _id_prefix() -> str:
+    pid = os.getpid()
+    if _ids["pid"] != pid:
+        _ids.update(pid=pid, prefix=uuid.uuid4().hex[:12], counter=itertools.count())
+    return _ids["prefix"]
+
+
+def _fast(s: str):
+    """(time, src, dst, msg) when the line has the exact canonical shape, else None.
+
+    Arrow: `T SRC -> DST : MSG`; simple: `T SRC : MSG` (SRC without "->",
+    which PAT_ARROW would read as an arrow). Anything else, e.g. "SRC:" or
+    "->DST", goes to the regexes.
+    """
+    t, _, rest = s.partition(" ")
+    if not rest or not t or t.strip(_TIME_CHARS):
+        return None
+    parts = rest.split(None, 4)
+    if len(parts) == 5 and parts[1] == "->" and parts[3] == ":":
+        return t, parts[0], parts[2], parts[4]
+    parts = rest.split(None, 2)
+    if len(parts) == 3 and parts[1] == ":" and "->" not in parts[0]:
+        return t, parts[0], parts[0], parts[2]
+    return None
+
+
+def _regex(s: str):
+    m = PAT_ARROW.match(s)
+    if m:
+        return m.groups()
+    m = PAT_SIMPLE.match(s)
+    if m:
+        t, src, msg = m.groups()
+        return t, src, src, msg
+    return None
+
+
+def parse_lines(lines: Iterable[str], origin: Optional[str] = None) -> Iterator[Event]:
+    """Lazily parse log lines; `origin` (source file) is kept in event.raw["file"]."""
+    prefix = _id_prefix() + "-"
+    counter = _ids["counter"]
+    intern = HOSTS.intern
+    seen = fast = slow = blank = bad = 0
+    try:
+        for line in lines:
+            seen += 1
+            line = line.rstrip("\r\n")
+            s = line.strip()
+            if not s:
+                blank += 1
                 continue
-            t, src, msg = m2.groups()
-            dst = src
-        events.append(Event(
-            id=str(uuid.uuid4()),
-            time=t, source=src, target=dst, summary=msg,
-            raw={"line": line}
-        ))
-    return events
+            hit = _fast(s)
+            if hit is not None:
+                fast += 1
+            else:
+                hit = _regex(s)
+                if hit is None:
+                    bad += 1
+                    UNPARSED_SAMPLE.append({"origin": origin, "line": line[:300]})
+                    continue
+                slow += 1
+            t, src, dst, msg = hit
+            yield Event(
+                id=prefix + format(next(counter), "x"),
+                time=t, source=intern(src), target=intern(dst), summary=msg,
+                raw={"line": line, "file": origin} if origin else {"line": line},
+                iocs=[],  # explicit: a defaulted mutable field is deep-copied per instance
+            )
+    finally:
+        # flushed once per call (also when the consumer stops early)
+        with _stats_lock:
+            PARSE_STATS.update(lines=seen, fast=fast, regex=slow, blank=blank, unparsed=bad)
+            if bad:
+                UNPARSED_BY_ORIGIN[origin or "-"] += bad
+
+
+def parse_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        return {**{k: PARSE_STATS.get(k, 0) for k in ("lines", "fast", "regex", "blank", "unparsed")},
+                "unparsed_by_origin": dict(UNPARSED_BY_ORIGIN.most_common(20)),
+                "unparsed_sample": list(UNPARSED_SAMPLE)}
+
+
+def parse_logs(text: str):
+    return list(parse_lines(text.splitlines()))
@@ -0,0 +1,294 @@
+"""
+Preview of a huge upload: one pass over the input, full pipeline on a sample.
+
+The pass only classifies lines and updates sketches:
+  * stratum per line: "ioc" (known-bad IP), "mitre" (a MITRE keyword or a
+    Sigma anchor literal occurs) or "other"; one reservoir per stratum
+  * HyperLogLog of distinct hosts and IPs, count-min sketch of events per
+    host pair (edge weights for the graph skeleton)
+  * exact "fail" counts per source, so brute-force tagging of the sample uses
+    the same counters as a full run
+Only the sampled lines are parsed, enriched, rule-checked and MITRE-mapped.
+Technique counts are stratified estimates, N_s * c_s / n_s per stratum, with
+a 95% normal interval (finite population corrected); a stratum smaller than
+its reservoir is kept whole and is exact.
+
+Plain files above FULL_BYTES are not read end to end: BLOCKS blocks of
+BLOCK_BYTES at jittered, evenly spaced offsets are scanned and the counts
+scaled to the file's estimated line count (assumes the blocks are
+representative). Compressed streams are read in order until the time budget
+runs out; the preview is then marked incomplete and covers what was read.
+
+Env:
+  SENTINEL_PREVIEW_SAMPLE      reservoir size per stratum (default 2000)
+  SENTINEL_PREVIEW_SECONDS     scan budget for streamed input (default 10)
+  SENTINEL_PREVIEW_FULL_BYTES  plain files up to this size are read whole (default 256 MiB)
+  SENTINEL_PREVIEW_BLOCKS      blocks sampled from larger plain files (default 32)
+"""
+import math
+import os
+import random
+import re
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from schemas.models import Timeline
+    from metrics import StageRecorder
+except Exception:
+    from backend.schemas.models import Timeline  # type: ignore
+    from backend.metrics import StageRecorder  # type: ignore
+
+from .archive import _is_tar, _lines, streams
+from .parser import parse_lines
+from .enrich import BAD_IPS, enrich_events
+from .anomaly import tag_brute_force
+from .mitre_map_ibmrag import LOOKUPS, map_events_to_mitre
+from .timeline import build_timeline
+from .sketch import CountMinSketch, HyperLogLog, Reservoir
+from . import sigma
+
+SAMPLE = int(os.getenv("SENTINEL_PREVIEW_SAMPLE", "2000"))
+SECONDS = float(os.getenv("SENTINEL_PREVIEW_SECONDS", "10"))
+FULL_BYTES = int(os.getenv("SENTINEL_PREVIEW_FULL_BYTES", str(256 << 20)))
+BLOCKS = int(os.getenv("SENTINEL_PREVIEW_BLOCKS", "32"))
+BLOCK_BYTES = 1 << 20
+
+STRATA = ("ioc", "mitre", "other")
+Z95 = 1.96
+
+_IP = re.compile(r"\d+\.\d+\.\d+\.\d+")
+FLUSH_LINES = 1 << 16
+
+
+def _dump(model):
+    return model.model_dump() if hasattr(model, "model_dump") else model.dict()
+
+
+def _classifiers() -> Tuple["re.Pattern", "re.Pattern"]:
+    """(known-bad IP regex, MITRE keyword / Sigma anchor regex over lower-cased text)."""
+    words = {k for k, _ in LOOKUPS}
+    if sigma.ENABLED:
+        for r in sigma.get_engine().rules:
+            words.update(lit for field, lit in r.ir["anchors"] or () if field in ("summary", "line"))
+    ioc = "|".join(re.escape(ip) for ip in sorted(BAD_IPS))
+    kw = "|".join(re.escape(w) for w in sorted(words, key=lambda w: (-len(w), w)))
+    # re.I on a long alternation is ~10x slower than searching the lower-cased line
+    return re.compile(rf"(?<![\d.])(?:{ioc})(?![\d.])"), re.compile(kw)
+
+
+def _block_lines(path: str, size: int, rng: random.Random) -> Iterator[str]:
+    """Whole lines from BLOCKS jittered blocks spread over a plain file."""
+    n = min(BLOCKS, max(1, size // BLOCK_BYTES))
+    span = size / n
+    with open(path, "rb") as fh:
+        for i in range(n):
+            start = int(i * span + rng.random() * max(0.0, span - BLOCK_BYTES))
+            fh.seek(start)
+            block = fh.read(BLOCK_BYTES)
+            parts = block.split(b"\n")
+            if start > 0:
+                parts = parts[1:]  # partial first line
+            if start + len(block) < size:
+                parts = parts[:-1]  # partial last line
+            for p in parts:
+                yield p.decode("utf-8", errors="ignore")
+
+
+class Preview:
+    def __init__(self, sample: int = SAMPLE, seconds: float = SECONDS, seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+        self.deadline = time.perf_counter() + seconds
+        self.reservoirs = [Reservoir(sample, self.rng) for _ in STRATA]
+        self.totals = [0.0] * len(STRATA)  # estimated lines per stratum in the whole input
+        self.hosts, self.ips = HyperLogLog(), HyperLogLog()
+        self.edges = CountMinSketch()
+        self.fails: Dict[str, float] = {}
+        self.ioc_rx, self.mitre_rx = _classifiers()
+        self.lines = 0
+        self.bytes = 0
+        self.est_lines = 0.0
+        self.complete = True
+        self.files: List[Dict[str, Any]] = []
+
+    def _scan(self, lines: Iterable[str], origin: str, timed: bool) -> Tuple[List[int], Dict[str, int], int, int]:
+        counts = [0] * len(STRATA)
+        res = self.reservoirs
+        bad = tuple(BAD_IPS)
+        is_ioc, is_mitre = self.ioc_rx.search, self.mitre_rx.search
+        ipfind = _IP.findall
+        fails: Dict[str, int] = {}
+        # pre-aggregated per chunk, then flushed into the sketches
+        hosts: set = set()
+        ips: set = set()
+        edges: Dict[str, int] = {}
+        n = nbytes = 0
+        for line in lines:
+            if not line:
+                continue
+            n += 1
+            nbytes += len(line) + 1
+            low = line.lower()
+            if any(ip in line for ip in bad) and is_ioc(line):
+                s = 0
+            else:
+                s = 1 if is_mitre(low) else 2
+            counts[s] += 1
+            res[s].add((origin, line))
+            toks = line.split(None, 4)
+            if len(toks) >= 3:
+                src = toks[1].rstrip(":")
+                dst = toks[3].rstrip(":") if toks[2] == "->" and len(toks) > 3 else src
+                hosts.add(src)
+                hosts.add(dst)
+                k = f"{src}\x00{dst}"
+                edges[k] = edges.get(k, 0) + 1
+                if "fail" in low:
+                    fails[src] = fails.get(src, 0) + 1
+            ips.update(ipfind(line))
+            if not n & (FLUSH_LINES - 1):
+                self._flush(hosts, ips, edges)
+                if timed and time.perf_counter() > self.deadline:
+                    self.complete = False
+                    break
+        self._flush(hosts, ips, edges)
+        return counts, fails, n, nbytes
+
+    def _flush(self, hosts: set, ips: set, edges: Dict[str, int]) -> None:
+        for h in hosts:
+            self.hosts.add(h)
+        for ip in ips:
+            self.ips.add(ip)
+        for k, c in edges.items():
+            self.edges.add(k, c)
+        hosts.clear()
+        ips.clear()
+        edges.clear()
+
+    def add_source(self, label: str, path: str) -> None:
+        size = os.path.getsize(path)
+        plain = not (_is_tar(path, label) or label.lower().endswith((".gz", ".zip")))
+        if plain and size > FULL_BYTES:
+            counts, fails, n, nbytes = self._scan(_block_lines(path, size, self.rng), label, timed=False)
+            scale = (size / (nbytes / n)) / n if n else 0.0
+            self._account(label, "blocks", counts, fails, n, nbytes, scale)
+            return
+        tar = _is_tar(path, label)
+        for origin, fh in streams(path, label):
+            if not self.complete:
+                if tar:
+                    # listing the rest of a tar means inflating it: out of budget, stop here
+                    self.files.append({"file": f"{label}:*", "mode": "skipped", "lines": 0})
+                    break
+                self.files.append({"file": origin, "mode": "skipped", "lines": 0})
+                continue
+            counts, fails, n, nbytes = self._scan(_lines(fh), origin, timed=True)
+            self._account(origin, "full" if self.complete else "partial", counts, fails, n, nbytes, 1.0)
+
+    def _account(self, origin: str, mode: str, counts: List[int], fails: Dict[str, int],
+                 n: int, nbytes: int, scale: float) -> None:
+        for s, c in enumerate(counts):
+            self.totals[s] += c * scale
+        for src, c in fails.items():
+            self.fails[src] = self.fails.get(src, 0) + c * scale
+        self.lines += n
+        self.bytes += nbytes
+        self.est_lines += n * scale
+        self.files.append({"file": origin, "mode": mode, "lines": n, "bytes": nbytes,
+                           "est_lines": round(n * scale)})
+
+    def _technique_estimates(self, by_stratum: List[List[Any]]) -> List[Dict[str, Any]]:
+        est: Dict[Tuple[str, str], List[float]] = {}  # (tactic, technique) -> [estimate, variance]
+        for s, events in enumerate(by_stratum):
+            n, N = len(self.reservoirs[s].items), self.totals[s]
+            if not n:
+                continue
+            fpc = max(0.0, 1 - n / N) if N else 0.0
+            counts: Dict[Tuple[str, str], int] = {}
+            for e in events:
+                if e.technique:
+                    k = (e.tactic or "", e.technique)
+                    counts[k] = counts.get(k, 0) + 1
+            for k, c in counts.items():
+                p = c / n
+                acc = est.setdefault(k, [0.0, 0.0])
+                acc[0] += N * p
+                acc[1] += N * N * fpc * p * (1 - p) / max(1, n - 1)
+        out = []
+        for (tactic, technique), (e, var) in est.items():
+            half = Z95 * math.sqrt(var)
+            out.append({"tactic": tactic, "technique": technique, "estimate": round(e),
+                        "low": max(0, round(e - half)), "high": round(e + half)})
+        out.sort(key=lambda r: (-r["estimate"], r["technique"]))
+        return out
+
+    def _skeleton(self, events: List[Any]) -> Dict[str, Any]:
+        """Distinct sampled host pairs, weighted by the count-min estimate of all their events."""
+        pairs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for e in events:
+            p = pairs.get((e.source, e.target))
+            if p is None:
+                p = pairs[(e.source, e.target)] = {"source": e.source, "target": e.target, "sampled": 0,
+                                                   "tactics": {}}
+            p["sampled"] += 1
+            if e.tactic:
+                p["tactics"][e.tactic] = p["tactics"].get(e.tactic, 0) + 1
+        scale = self.est_lines / self.lines if self.lines else 0.0
+        edges, nodes = [], {}
+        for (src, dst), p in pairs.items():
+            w = round(self.edges.estimate(f"{src}\x00{dst}") * scale)
+            edges.append({**p, "id": f"{src}->{dst}", "estimated_events": w,
+                          "tactics": sorted(p["tactics"], key=lambda t: -p["tactics"][t])})
+            for h in (src, dst):
+                nodes[h] = nodes.get(h, 0) + w
+        edges.sort(key=lambda x: -x["estimated_events"])
+        return {
+            "nodes": [{"id": h, "label": h, "estimated_events": w} for h, w in sorted(nodes.items(), key=lambda kv: -kv[1])],
+            "edges": edges,
+            "edge_error_bound": round(self.edges.error_bound() * scale),
+        }
+
+    def result(self, rec: StageRecorder) -> Dict[str, Any]:
+        by_stratum: List[List[Any]] = []
+        weights: Dict[str, float] = {}
+        with rec.stage("preview_pipeline") as st:
+            for s, r in enumerate(self.reservoirs):
+                evs = []
+                for origin, line in r.items:
+                    evs.extend(parse_lines([line], origin))
+                n = len(r.items)
+                weights[STRATA[s]] = round(self.totals[s] / n, 3) if n else 0.0
+                for e in evs:
+                    e.raw["preview"] = {"stratum": STRATA[s], "weight": weights[STRATA[s]]}
+                by_stratum.append(evs)
+            sample = [e for evs in by_stratum for e in evs]
+            st.events = len(sample)
+            enrich_events(sample)
+            tag_brute_force(sample, self.fails)
+            map_events_to_mitre(sample)
+            tl: Timeline = build_timeline(sample)
+        return {
+            "preview": {
+                "complete": self.complete, "lines_scanned": self.lines, "bytes_scanned": self.bytes,
+                "est_lines": round(self.est_lines), "files": self.files,
+                "strata": {name: {"est_lines": round(self.totals[s]), "sampled": len(self.reservoirs[s].items),
+                                  "weight": weights[name]} for s, name in enumerate(STRATA)},
+            },
+            "timeline": _dump(tl),
+            "techniques": self._technique_estimates(by_stratum),
+            "distinct": {"hosts": self.hosts.summary(), "ips": self.ips.summary(),
+                         "lower_bound": not self.complete or self.est_lines > self.lines},
+            "graph": self._skeleton(sample),
+        }
+
+
+def run_preview(sources: List[Tuple[str, str]], sample: int = SAMPLE, seconds: float = SECONDS,
+                seed: Optional[int] = None) -> Tuple[Dict[str, Any], list]:
+    """Preview of (label, path) sources; (payload, stage samples) like the full pipeline."""
+    rec = StageRecorder()
+    pv = Preview(sample, seconds, seed)
+    with rec.stage("preview_scan", nbytes=sum(os.path.getsize(p) for _, p in sources)) as st:
+        for label, path in sources:
+            pv.add_source(label, path)
+        st.events = pv.lines
+    return pv.result(rec), rec.samples
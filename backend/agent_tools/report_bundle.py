@@ -0,0 +1,210 @@
+"""
+Offline report export: a zip holding a static, self-contained viewer.
+
+    index.html                 viewer shell (no external assets)
+    manifest.js                sections, columns, row counts, chunk layout
+    data/<section>-NNNNN.js    CHUNK_ROWS rows each, gzip + base64
+
+Rows are stored column-positional (lists, not dicts) and compressed per
+chunk. The page only loads the chunk behind the page being viewed, through
+<script> tags (works from file:// where fetch() does not) and inflates it
+with the browser's DecompressionStream, so a 1M-event case opens at once.
+"""
+import base64
+import gzip
+import io
+import json
+import zipfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+CHUNK_ROWS = 5000
+
+# section -> (title, columns, row extractor)
+SECTIONS: Dict[str, Tuple[str, Sequence[str], Callable[[Dict[str, Any]], List[Any]]]] = {
+    "timeline": ("Timeline", ("Timestamp", "Event", "Idx", "Full raw"),
+                 lambda t: [t.get("timestamp"), t.get("summary"), t.get("idx"),
+                            t.get("full") if t.get("truncated") else None]),
+    "iocs": ("IOCs", ("Type", "Value", "Event Idx"),
+             lambda i: [i.get("type"), i.get("value"), i.get("event_idx")]),
+    "mitre": ("MITRE ATT&CK", ("Event Idx", "Techniques"),
+              lambda m: [m.get("event_idx"), ", ".join(x.get("id", "") for x in (m.get("techniques") or []))]),
+}
+
+
+def _chunks(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    buf: List[Any] = []
+    for r in rows:
+        buf.append(r)
+        if len(buf) >= size:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
+
+
+def _script(call: str, *args: Any) -> bytes:
+    return f"{call}({', '.join(json.dumps(a) for a in args)});\n".encode("utf-8")
+
+
+def _encode_chunk(rows: List[List[Any]]) -> str:
+    raw = json.dumps(rows, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.b64encode(gzip.compress(raw, compresslevel=6, mtime=0)).decode("ascii")
+
+
+def build_bundle(
+    timeline: List[Dict[str, Any]],
+    iocs: List[Dict[str, Any]],
+    mitre: List[Dict[str, Any]],
+    title: str = "ForensicMind Report",
+    chunk_rows: int = CHUNK_ROWS,
+) -> bytes:
+    """Zip archive (bytes) of the static viewer plus chunked, compressed data."""
+    data = {"timeline": timeline, "iocs": iocs, "mitre": mitre}
+    manifest: Dict[str, Any] = {
+        "title": title,
+        "generated": datetime.utcnow().isoformat() + "Z",
+        "chunk_rows": chunk_rows,
+        "sections": [],
+    }
+    out = io.BytesIO()
+    # chunks are already gzip'd; deflate still wins back most of the base64 overhead
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for key, (label, columns, extract) in SECTIONS.items():
+            rows = data[key]
+            n_chunks = 0
+            for i, chunk in enumerate(_chunks((extract(r) for r in rows), chunk_rows)):
+                zf.writestr(f"data/{key}-{i:05d}.js", _script("__chunk", key, i, _encode_chunk(chunk)))
+                n_chunks += 1
+            manifest["sections"].append({
+                "key": key, "title": label, "columns": list(columns),
+                "rows": len(rows), "chunks": n_chunks,
+            })
+        zf.writestr("manifest.js", _script("__manifest", manifest))
+        zf.writestr("index.html", VIEWER_HTML.replace("__TITLE__", _html_text(title)))
+    return out.getvalue()
+
+
+def _html_text(s: str) -> str:
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+VIEWER_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>__TITLE__</title>
+<style>
+  body { font-family: system-ui, sans-serif; margin: 16px; }
+  .mono { font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; font-size:12px; }
+  table { border-collapse: collapse; width: 100%; }
+  th, td { border: 1px solid #eee; padding: 6px 8px; text-align: left; vertical-align: top; }
+  th { background: #fafafa; }
+  nav button.on { font-weight: bold; }
+  #pager { margin: 8px 0; }
+  pre { white-space: pre-wrap; margin: 0; }
+</style></head>
+<body>
+<h2>__TITLE__</h2>
+<p id="meta"></p>
+<nav id="tabs"></nav>
+<div id="pager">
+  <button id="prev">&larr;</button> page <input id="page" type="number" min="1" style="width:6em"> of <span id="pages"></span>
+  <button id="next">&rarr;</button> <span id="status"></span>
+</div>
+<table class="mono"><thead id="head"></thead><tbody id="body"></tbody></table>
+<script>
+const PAGE = 200, KEEP = 8;
+let M = null, sec = null, page = 0;
+const cache = new Map(), waiting = new Map();
+
+window.__manifest = m => { M = m; };
+window.__chunk = (key, i, b64) => {
+  const id = key + ":" + i, w = waiting.get(id);
+  if (w) { waiting.delete(id); inflate(b64).then(w.resolve, w.reject); }
+};
+
+async function inflate(b64) {
+  const bin = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+  const stream = new Blob([bin]).stream().pipeThrough(new DecompressionStream("gzip"));
+  return JSON.parse(await new Response(stream).text());
+}
+
+function load(key, i) {
+  const id = key + ":" + i;
+  if (cache.has(id)) { const v = cache.get(id); cache.delete(id); cache.set(id, v); return v; }
+  const p = new Promise((resolve, reject) => {
+    waiting.set(id, { resolve, reject });
+    const s = document.createElement("script");
+    s.src = "data/" + key + "-" + String(i).padStart(5, "0") + ".js";
+    s.onerror = () => reject(new Error("missing " + s.src));
+    s.onload = () => s.remove();
+    document.head.appendChild(s);
+  });
+  cache.set(id, p);
+  while (cache.size > KEEP) cache.delete(cache.keys().next().value);
+  return p;
+}
+
+function cell(tr, v, full) {
+  const td = document.createElement("td");
+  if (full) {
+    const d = document.createElement("details"), s = document.createElement("summary"), pre = document.createElement("pre");
+    s.textContent = "Show full raw"; pre.textContent = v; d.append(s, pre); td.append(d);
+  } else {
+    td.textContent = v == null ? "" : v;
+  }
+  tr.append(td);
+}
+
+async function show() {
+  const pages = Math.max(1, Math.ceil(sec.rows / PAGE));
+  page = Math.min(Math.max(page, 0), pages - 1);
+  document.getElementById("page").value = page + 1;
+  document.getElementById("pages").textContent = pages;
+  const status = document.getElementById("status");
+  const body = document.getElementById("body");
+  const from = page * PAGE, to = Math.min(sec.rows, from + PAGE);
+  status.textContent = "loading…";
+  const rows = [];
+  for (let c = Math.floor(from / M.chunk_rows); c * M.chunk_rows < to; c++) {
+    const chunk = await load(sec.key, c);
+    const lo = Math.max(from - c * M.chunk_rows, 0), hi = Math.min(to - c * M.chunk_rows, chunk.length);
+    rows.push(...chunk.slice(lo, hi));
+  }
+  body.replaceChildren();
+  const fullCol = sec.columns.indexOf("Full raw");
+  for (const r of rows) {
+    const tr = document.createElement("tr");
+    r.forEach((v, j) => cell(tr, v, j === fullCol && v != null));
+    body.append(tr);
+  }
+  if (!rows.length) body.innerHTML = "<tr><td>No rows</td></tr>";
+  status.textContent = sec.rows ? `rows ${from + 1}–${to} of ${sec.rows}` : "";
+}
+
+function select(s) {
+  sec = s; page = 0;
+  document.querySelectorAll("#tabs button").forEach(b => b.classList.toggle("on", b.dataset.key === s.key));
+  const tr = document.createElement("tr");
+  for (const c of s.columns) { const th = document.createElement("th"); th.textContent = c; tr.append(th); }
+  document.getElementById("head").replaceChildren(tr);
+  show();
+}
+
+const boot = document.createElement("script");
+boot.src = "manifest.js";
+boot.onload = () => {
+  document.getElementById("meta").textContent = "Generated " + M.generated + " · " +
+    M.sections.map(s => s.rows + " " + s.title).join(" · ");
+  for (const s of M.sections) {
+    const b = document.createElement("button");
+    b.textContent = s.title + " (" + s.rows + ")"; b.dataset.key = s.key; b.onclick = () => select(s);
+    document.getElementById("tabs").append(b);
+  }
+  select(M.sections[0]);
+};
+document.head.appendChild(boot);
+document.getElementById("prev").onclick = () => { page--; show(); };
+document.getElementById("next").onclick = () => { page++; show(); };
+document.getElementById("page").onchange = e => { page = (+e.target.value || 1) - 1; show(); };
+</script>
+</body></html>
+"""
@@ -0,0 +1,176 @@
+"""
+Incremental HTML report rendering.
+
+The report is produced as a generator of HTML chunks (one per page of rows)
+so it can be sent with a StreamingResponse: the first bytes leave before
+the last row is rendered and memory stays flat for 100k-row timelines.
+
+Large sections are split into collapsible <details> pages of PAGE_SIZE rows;
+only the first page of each section starts open.
+
+Escaping is done once per page: every cell value of the page is joined with
+a unit separator, escaped with one replace chain over the whole buffer and
+split back, instead of three str.replace calls per field.
+"""
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+PAGE_SIZE = 500
+_SEP = "\x1f"
+
+STYLE = """
+<style>
+  .mono { font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; font-size:12px; }
+  table { border-collapse: collapse; width: 100%; }
+  th, td { border: 1px solid #eee; padding: 6px 8px; text-align: left; }
+  th { background: #fafafa; }
+  details.page > summary { cursor: pointer; margin: 6px 0; color: #555; }
+  .note { color: #a15c00; }
+</style>
+"""
+
+
+def escape(s: Any) -> str:
+    s = "" if s is None else str(s)
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def escape_many(values: Sequence[Any]) -> List[str]:
+    """Escape a batch of values with a single pass over one joined buffer."""
+    raw = [("" if v is None else str(v)) for v in values]
+    buf = _SEP.join(raw)
+    if buf.count(_SEP) != max(len(raw) - 1, 0):
+        # a value contains the separator itself; fall back to per-value escaping
+        return [escape(v) for v in raw]
+    return escape(buf).split(_SEP) if raw else []
+
+
+def _pages(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    page: List[Any] = []
+    for r in rows:
+        page.append(r)
+        if len(page) >= size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def _section(
+    title: str,
+    header: Sequence[str],
+    rows: Iterable[Any],
+    total: int,
+    cells: Callable[[Any], Sequence[Any]],
+    render: Callable[[List[str]], str],
+    empty: str,
+    page_size: int,
+) -> Iterator[str]:
+    """Yield one section: a heading plus a <details> table per page of rows."""
+    width = len(header)
+    head = "<tr>" + "".join(f"<th>{h}</th>" for h in header) + "</tr>"
+    yield f"<h3>{title}</h3>\n"
+    if not total:
+        yield f"<table>{head}<tr><td colspan=\"{width}\">{empty}</td></tr></table>\n"
+        return
+    start = 0
+    for page in _pages(rows, page_size):
+        flat: List[Any] = []
+        for r in page:
+            flat.extend(cells(r))
+        esc = escape_many(flat)
+        n = len(esc) // len(page)
+        body = "\n".join(render(esc[i:i + n]) for i in range(0, len(esc), n))
+        opened = " open" if start == 0 else ""
+        yield (
+            f"<details class=\"page\"{opened}><summary>Rows {start + 1}&ndash;{start + len(page)} of {total}</summary>"
+            f"<table>{head}\n{body}\n</table></details>\n"
+        )
+        start += len(page)
+
+
+def _note(shown: int, total: int, what: str) -> str:
+    if total <= shown:
+        return ""
+    return f"<p class=\"note\">Showing the first {shown} of {total} {what}; stream the full report from /report/stream.</p>\n"
+
+
+def _timeline_row(c: List[str]) -> str:
+    ts, short, idx, full = c
+    if full:
+        return (
+            f"<tr><td class='mono'>{ts}</td>"
+            f"<td class='mono'><div>{short}</div>"
+            f"<details style='margin-top:6px'><summary>Show full raw</summary>"
+            f"<pre style='white-space:pre-wrap'>{full}</pre></details></td>"
+            f"<td>{idx}</td></tr>"
+        )
+    return f"<tr><td class='mono'>{ts}</td><td class='mono'>{short}</td><td>{idx}</td></tr>"
+
+
+def _technique_ids(m: Dict[str, Any]) -> str:
+    return ", ".join(x.get("id", "") for x in (m.get("techniques") or []))
+
+
+def iter_fm_report(
+    timeline: List[Dict[str, Any]],
+    iocs: List[Dict[str, Any]],
+    mitre: List[Dict[str, Any]],
+    limits: Optional[Dict[str, int]] = None,
+    page_size: int = PAGE_SIZE,
+) -> Iterator[str]:
+    """ForensicMind technical report (IOCs, MITRE mapping, timeline) as HTML chunks.
+
+    `limits` caps rows per section ({"iocs": n, "mitre": n, "timeline": n});
+    capped sections say so explicitly instead of dropping rows silently.
+    """
+    limits = limits or {}
+    n_ioc = min(len(iocs), limits.get("iocs", len(iocs)))
+    n_mitre = min(len(mitre), limits.get("mitre", len(mitre)))
+    n_tl = min(len(timeline), limits.get("timeline", len(timeline)))
+
+    yield STYLE
+    yield "<h2>ForensicMind Report</h2>\n"
+    yield f"<p><strong>Generated:</strong> {datetime.utcnow().isoformat()}Z</p>\n"
+
+    yield from _section(
+        "Indicators of Compromise (IOCs)", ("Type", "Value", "Event Idx"),
+        (iocs[i] for i in range(n_ioc)), n_ioc,
+        lambda i: (i.get("type"), i.get("value"), i.get("event_idx")),
+        lambda c: f"<tr><td>{c[0]}</td><td>{c[1]}</td><td>{c[2]}</td></tr>",
+        "None", page_size,
+    )
+    yield _note(n_ioc, len(iocs), "IOCs")
+
+    yield from _section(
+        "MITRE ATT&amp;CK Mapping", ("Event Idx", "Techniques"),
+        (mitre[i] for i in range(n_mitre)), n_mitre,
+        lambda m: (m.get("event_idx"), _technique_ids(m)),
+        lambda c: f"<tr><td>{c[0]}</td><td>{c[1]}</td></tr>",
+        "None", page_size,
+    )
+    yield _note(n_mitre, len(mitre), "MITRE mappings")
+
+    yield from _section(
+        "Timeline", ("Timestamp", "Event (short; expand for full)", "Idx"),
+        (timeline[i] for i in range(n_tl)), n_tl,
+        lambda t: (t.get("timestamp"), t.get("summary"), t.get("idx"),
+                   t.get("full") if t.get("truncated") else ""),
+        _timeline_row,
+        "No events", page_size,
+    )
+    yield _note(n_tl, len(timeline), "timeline rows")
+
+
+def iter_local_report(timeline: Any, page_size: int = PAGE_SIZE) -> Iterator[str]:
+    """agent_tools Timeline (pydantic) as the local-fallback report, in chunks."""
+    events = timeline.events
+    yield STYLE
+    yield "<h1>ForensicMind Report (Local Fallback)</h1>\n"
+    yield from _section(
+        "Timeline", ("Step", "Time", "Source", "Target", "Tactic", "Technique", "Summary"),
+        events, len(events),
+        lambda e: (e.stepNum, e.time, e.source, e.target, e.tactic or "-", e.technique or "-", e.summary),
+        lambda c: "<tr><td>" + "</td><td>".join(c) + "</td></tr>",
+        "No events", page_size,
+    )
@@ -0,0 +1,268 @@
+"""
+Sharded ingest: a coordinator partitions input by source host and fans it out
+to stateless worker processes, then merges their timelines and graphs.
+
+Partitioning hashes the source host (second whitespace token of a line, the
+`src` in both parser formats) with crc32, so every event of one source lands
+on the same worker and its anomaly counters stay local; nothing is shared
+between workers.
+
+Workers talk to the coordinator only through queues of JSON-able messages,
+so the local multiprocessing queues used here can be swapped for a real
+broker (one topic per worker + a results topic) to run workers on other
+nodes:
+
+    coordinator -> worker i   {"op": "batch", "job", "origin", "lines": [...]}
+                              {"op": "flush", "job"}
+                              {"op": "abort", "job"}     (drop the job, no answer)
+                              {"op": "stop"}
+    worker -> coordinator     {"op": "ready", "worker"}   (once, after start-up)
+                              {"op": "result", "job", "worker", "events": [...], "stats": {...}}
+                              {"op": "error", "job", "worker", "error"}
+
+A worker holds state only for the jobs in flight and drops it on flush, or on
+abort when the coordinator gives up mid-partition (unreadable input, dead peer).
+Env:
+  SENTINEL_INGEST_SHARDS      worker processes (0/1 = in-process pipeline)
+  SENTINEL_SHARD_BATCH        lines per batch message (default 2000)
+"""
+import heapq
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from schemas.models import Event
+    from metrics import StageRecorder
+except Exception:
+    from backend.schemas.models import Event  # type: ignore
+    from backend.metrics import StageRecorder  # type: ignore
+
+from .archive import _lines, streams
+from .parser import parse_lines
+from .enrich import enrich_events
+from .anomaly import count_failures
+from .mitre_map_ibmrag import map_events_to_mitre
+from .checkpoint import finish_rules
+from .timeline import build_timeline
+from .graphify import timeline_to_graph
+
+SHARDS = int(os.getenv("SENTINEL_INGEST_SHARDS", "0"))
+BATCH = int(os.getenv("SENTINEL_SHARD_BATCH", "2000"))
+QUEUE_DEPTH = 16
+RESULT_TIMEOUT = 1.0
+
+
+def _dump(model):
+    return model.model_dump() if hasattr(model, "model_dump") else model.dict()
+
+
+_construct = getattr(Event, "model_construct", None) or Event.construct
+
+
+def partition_key(line: str) -> str:
+    parts = line.split(None, 2)
+    return parts[1].split(":", 1)[0] if len(parts) > 1 else ""
+
+
+def shard_of(key: str, n: int) -> int:
+    return zlib.crc32(key.encode("utf-8", "ignore")) % n
+
+
+# ---------- worker ----------
+
+def _worker_main(idx: int, inbox: "mp.Queue", outbox: "mp.Queue") -> None:
+    map_events_to_mitre([])  # build the MITRE index before the first batch
+    outbox.put({"op": "ready", "job": None, "worker": idx})
+    jobs: Dict[str, Dict[str, Any]] = {}
+    while True:
+        msg = inbox.get()
+        if msg["op"] == "stop":
+            return
+        job = msg["job"]
+        if msg["op"] == "abort":
+            jobs.pop(job, None)
+            continue
+        st = jobs.setdefault(job, {"events": [], "counts": {}, "busy": 0.0, "lines": 0, "error": None})
+        if msg["op"] == "batch":
+            if st["error"]:
+                continue
+            t0 = time.perf_counter()
+            try:
+                evs = list(parse_lines(msg["lines"], msg["origin"]))
+                enrich_events(evs)
+                count_failures(evs, st["counts"])
+                map_events_to_mitre(evs)
+                st["events"].extend(evs)
+            except Exception as e:
+                st["error"] = f"{type(e).__name__}: {e}"
+            st["lines"] += len(msg["lines"])
+            st["busy"] += time.perf_counter() - t0
+        elif msg["op"] == "flush":
+            jobs.pop(job, None)
+            if st["error"]:
+                outbox.put({"op": "error", "job": job, "worker": idx, "error": st["error"]})
+                continue
+            t0 = time.perf_counter()
+            evs = finish_rules(st["events"], st["counts"])
+            evs.sort(key=lambda e: e.time)
+            st["busy"] += time.perf_counter() - t0
+            outbox.put({"op": "result", "job": job, "worker": idx, "events": [_dump(e) for e in evs],
+                        "stats": {"lines": st["lines"], "events": len(evs), "sources": len(st["counts"]),
+                                  "busy_s": round(st["busy"], 4)}})
+
+
+# ---------- coordinator ----------
+
+class ShardPool:
+    """N worker processes with one inbox each and a shared outbox (local queue stand-in)."""
+
+    def __init__(self, workers: int):
+        self.n = max(1, workers)
+        # spawn, not fork: the API process runs threads (uvicorn, pools)
+        ctx = mp.get_context("spawn")
+        self.inboxes = [ctx.Queue(maxsize=QUEUE_DEPTH) for _ in range(self.n)]
+        self.outbox = ctx.Queue()
+        self.procs = [ctx.Process(target=_worker_main, args=(i, q, self.outbox), daemon=True, name=f"shard-{i}")
+                      for i, q in enumerate(self.inboxes)]
+        for p in self.procs:
+            p.start()
+        self._lock = threading.Lock()  # one job at a time on the shared outbox
+        ready = 0
+        while ready < self.n:
+            try:
+                ready += self.outbox.get(timeout=RESULT_TIMEOUT)["op"] == "ready"
+            except queue.Empty:
+                self._check_alive()
+
+    def _send(self, i: int, msg: Dict[str, Any]) -> None:
+        while True:
+            try:
+                self.inboxes[i].put(msg, timeout=RESULT_TIMEOUT)
+                return
+            except queue.Full:
+                self._check_alive()
+
+    def _abort(self, job: str) -> None:
+        """Best effort: tell every live worker to forget `job`."""
+        for i, p in enumerate(self.procs):
+            if not p.is_alive():
+                continue
+            try:
+                self.inboxes[i].put({"op": "abort", "job": job}, timeout=RESULT_TIMEOUT * 5)
+            except queue.Full:
+                pass
+
+    def _check_alive(self) -> None:
+        dead = [p.name for p in self.procs if not p.is_alive()]
+        if dead:
+            raise RuntimeError(f"shard workers died: {', '.join(dead)}")
+
+    def run(self, sources: List[Tuple[str, str]], batch: int = BATCH) -> Tuple[Dict[str, Any], list]:
+        """Partition (label, path) sources across workers; (payload, stage samples) like /ingest."""
+        with self._lock:
+            return self._run(sources, batch)
+
+    def _run(self, sources: List[Tuple[str, str]], batch: int) -> Tuple[Dict[str, Any], list]:
+        rec = StageRecorder()
+        job = uuid.uuid4().hex
+        n = self.n
+        nbytes = sum(os.path.getsize(p) for _, p in sources)
+        with rec.stage("partition", nbytes=nbytes) as s:
+            lines = 0
+            try:
+                for label, path in sources:
+                    for origin, fh in streams(path, label):
+                        bufs: List[List[str]] = [[] for _ in range(n)]
+                        for line in _lines(fh):
+                            w = shard_of(partition_key(line), n)
+                            b = bufs[w]
+                            b.append(line)
+                            if len(b) >= batch:
+                                self._send(w, {"op": "batch", "job": job, "origin": origin, "lines": b})
+                                bufs[w] = []
+                            lines += 1
+                        for w, b in enumerate(bufs):
+                            if b:
+                                self._send(w, {"op": "batch", "job": job, "origin": origin, "lines": b})
+            except BaseException:
+                # workers already hold batches of this job: make them drop it
+                self._abort(job)
+                raise
+            for w in range(n):
+                self._send(w, {"op": "flush", "job": job})
+            s.events = lines
+
+        results: Dict[int, Dict[str, Any]] = {}
+        with rec.stage("shard_wait"):
+            while len(results) < n:
+                try:
+                    msg = self.outbox.get(timeout=RESULT_TIMEOUT)
+                except queue.Empty:
+                    self._check_alive()
+                    continue
+                if msg["job"] != job:
+                    continue  # late answer of an abandoned job
+                if msg["op"] == "error":
+                    raise RuntimeError(f"shard {msg['worker']}: {msg['error']}")
+                results[msg["worker"]] = msg
+
+        total = sum(r["stats"]["events"] for r in results.values())
+        with rec.stage("merge", events=total):
+            # each worker's list is already time-sorted
+            # workers built these from validated Events: skip re-validation
+            events = [_construct(**d) for d in heapq.merge(*(r["events"] for r in results.values()),
+                                                           key=lambda d: d["time"])]
+        with rec.stage("timeline", events=total):
+            tl = build_timeline(events)
+        with rec.stage("graphify", events=total):
+            graph = timeline_to_graph(tl)
+        files: Dict[str, int] = {}
+        for e in tl.events:
+            f = e.raw.get("file")
+            files[f] = files.get(f, 0) + 1
+        shards = [{"worker": w, **results[w]["stats"]} for w in sorted(results)]
+        return {"timeline": _dump(tl), "graph": _dump(graph), "files": files, "shards": shards}, rec.samples
+
+    def close(self) -> None:
+        for i in range(self.n):
+            try:
+                self.inboxes[i].put({"op": "stop"}, timeout=RESULT_TIMEOUT)
+            except queue.Full:
+                pass
+        for p in self.procs:
+            p.join(timeout=2)
+            if p.is_alive():
+                p.terminate()
+
+
+_pool: Optional[ShardPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers: int = SHARDS) -> ShardPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.n != workers or not all(p.is_alive() for p in _pool.procs):
+            if _pool is not None:
+                _pool.close()
+            _pool = ShardPool(workers)
+        return _pool
+
+
+def run_sharded(sources: List[Tuple[str, str]]) -> Tuple[Dict[str, Any], list]:
+    """Drop-in for ingest_router.run_ingest_pipeline using the shared worker pool."""
+    return get_pool().run(sources)
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,581 @@
+"""
+Sigma rules for the event pipeline.
+
+Rules are YAML files under SENTINEL_SIGMA_RULES (default data/sigma). Each is
+compiled once into a JSON-able IR (one combined regex per field test, the
+condition as an and/or/not tree) which is cached on disk keyed by the file's
+SHA-1, so worker processes and restarts skip YAML parsing and condition
+parsing. The IR is then turned into predicate closures.
+
+    engine = get_engine()
+    engine.apply(events)        # raw["sigma"] = matches; ATT&CK tags -> tactic/technique
+
+Pruning: for every rule the compiler derives anchors, (field, literal) pairs
+of which at least one must occur in the event for the rule to match (e.g.
+`CommandLine|contains: powershell` -> ("summary", "powershell")). Per batch,
+one overlapping-match regex per field finds the anchors present in an event,
+and only those rules (plus the few without anchors) are evaluated.
+
+Supported: selections as maps or lists of maps, keyword lists, wildcards
+(* ?), modifiers contains / startswith / endswith / all / re / cidr, null
+values, and conditions with and / or / not / parentheses / `1 of x*` /
+`all of them`. Sigma field names map onto Event via FIELD_ALIASES; a rule
+that references unknown fields simply never matches on them.
+
+Env:
+  SENTINEL_SIGMA          1 | 0  (default 1)
+  SENTINEL_SIGMA_RULES    rules directory (default data/sigma)
+  SENTINEL_SIGMA_CACHE    compiled-rule cache (default data/out/sigma_cache.json)
+"""
+import fnmatch
+import hashlib
+import ipaddress
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+try:
+    from schemas.models import Event
+except Exception:
+    from backend.schemas.models import Event  # type: ignore
+
+_DATA = Path(__file__).resolve().parents[2] / "data"
+ENABLED = os.getenv("SENTINEL_SIGMA", "1") == "1"
+RULES_DIR = os.getenv("SENTINEL_SIGMA_RULES", str(_DATA / "sigma"))
+CACHE_PATH = os.getenv("SENTINEL_SIGMA_CACHE", str(_DATA / "out" / "sigma_cache.json"))
+
+COMPILER_VERSION = 1
+MIN_ANCHOR = 3
+LEVELS = {"critical": 4, "high": 3, "medium": 2, "low": 1, "informational": 0}
+
+# Sigma field (lower-cased) -> event field
+FIELD_ALIASES = {
+    "message": "summary", "msg": "summary", "summary": "summary", "commandline": "summary",
+    "command": "summary", "image": "summary", "details": "summary",
+    "source": "source", "src": "source", "src_host": "source", "host": "source", "hostname": "source",
+    "computer": "source", "computername": "source", "sourcehostname": "source", "workstation": "source",
+    "target": "target", "dst": "target", "dst_host": "target", "destination": "target",
+    "destinationhostname": "target",
+    "line": "line", "raw": "line", "_raw": "line", "keywords": "line",
+    "file": "file", "logfile": "file", "time": "time", "iocs": "iocs", "ioc": "iocs",
+    "tactic": "tactic", "technique": "technique",
+}
+
+TACTIC_NAMES = {
+    "reconnaissance": "Reconnaissance", "resource_development": "Resource Development",
+    "initial_access": "Initial Access", "execution": "Execution", "persistence": "Persistence",
+    "privilege_escalation": "Privilege Escalation", "defense_evasion": "Defense Evasion",
+    "credential_access": "Credential Access", "discovery": "Discovery", "lateral_movement": "Lateral Movement",
+    "collection": "Collection", "command_and_control": "Command and Control", "exfiltration": "Exfiltration",
+    "impact": "Impact",
+}
+
+_log = logging.getLogger(__name__)
+
+
+class SigmaError(ValueError):
+    pass
+
+
+def _view(e: Event) -> Dict[str, Optional[str]]:
+    """Field name -> text for one event (what rules and anchors look at)."""
+    return {
+        "summary": e.summary, "source": e.source, "target": e.target,
+        "line": e.raw.get("line") or e.summary, "file": e.raw.get("file"), "time": e.time,
+        "iocs": " ".join(e.iocs) if e.iocs else None, "tactic": e.tactic, "technique": e.technique,
+    }
+
+
+# ---------- values -> regex + anchor ----------
+
+def _wildcard(value: str) -> Tuple[str, List[str]]:
+    """Sigma wildcard string -> (regex body, literal runs)."""
+    out, runs, cur = [], [], []
+    i = 0
+    while i < len(value):
+        c = value[i]
+        if c == "\\" and i + 1 < len(value) and value[i + 1] in "*?\\":
+            cur.append(value[i + 1])
+            out.append(re.escape(value[i + 1]))
+            i += 2
+            continue
+        if c in "*?":
+            runs.append("".join(cur))
+            cur = []
+            out.append(".*" if c == "*" else ".")
+        else:
+            cur.append(c)
+            out.append(re.escape(c))
+        i += 1
+    runs.append("".join(cur))
+    return "".join(out), [r for r in runs if r]
+
+
+def _value_test(value: Any, mods: Sequence[str]) -> Tuple[str, Optional[str]]:
+    """(regex, anchor literal or None) for one value under the given modifiers."""
+    if "re" in mods:
+        return str(value), None
+    body, runs = _wildcard(str(value))
+    if "contains" in mods:
+        rx = body
+    elif "startswith" in mods:
+        rx = "^" + body
+    elif "endswith" in mods:
+        rx = body + "$"
+    else:
+        rx = "^" + body + "$"
+    best = max(runs, key=len, default="")
+    return rx, (best.lower() if len(best) >= MIN_ANCHOR else None)
+
+
+def _field_test(key: str, values: Any) -> Tuple[Dict[str, Any], Optional[List[Tuple[str, str]]]]:
+    """IR of one `field|mods: values` entry plus its anchors."""
+    name, *mods = key.split("|")
+    field = FIELD_ALIASES.get(name.lower())
+    if field is None:
+        _log.debug(f"sigma: unknown field {name!r}, it never matches")
+    vals = values if isinstance(values, list) else [values]
+    unsupported = set(mods) - {"contains", "startswith", "endswith", "all", "re", "cidr"}
+    if unsupported:
+        raise SigmaError(f"unsupported modifier(s) {sorted(unsupported)} on {name!r}")
+    if not vals or all(v is None for v in vals):
+        return {"field": field, "op": "null"}, None
+    if "cidr" in mods:
+        for v in vals:
+            ipaddress.ip_network(str(v), strict=False)  # validate at compile time
+        return {"field": field, "op": "cidr", "nets": [str(v) for v in vals]}, None
+
+    pairs = [_value_test(v, mods) for v in vals if v is not None]
+    op = "all" if "all" in mods else "any"
+    test = {"field": field, "op": op, "patterns": [p for p, _ in pairs], "ci": "re" not in mods}
+    anchors = [a for _, a in pairs]
+    if field is None:
+        return test, []  # can never match: an empty anchor set prunes the branch
+    if op == "any":
+        return test, None if any(a is None for a in anchors) else [(field, a) for a in anchors]
+    known = [a for a in anchors if a]
+    return test, [(field, max(known, key=len))] if known else None
+
+
+# ---------- anchors over the condition tree ----------
+
+def _and_anchor(children: List[Optional[List[Tuple[str, str]]]]) -> Optional[List[Tuple[str, str]]]:
+    """Any one child's anchors suffice for an AND; take the most selective."""
+    known = [c for c in children if c is not None]
+    if not known:
+        return None
+    return min(known, key=lambda c: (len(c), -min((len(lit) for _, lit in c), default=99)))
+
+
+def _or_anchor(children: List[Optional[List[Tuple[str, str]]]]) -> Optional[List[Tuple[str, str]]]:
+    if any(c is None for c in children):
+        return None
+    return sorted({a for c in children for a in c})
+
+
+def _selection(body: Any) -> Tuple[List[List[Dict[str, Any]]], Optional[List[Tuple[str, str]]]]:
+    """IR of a named selection: OR over maps, each an AND over field tests."""
+    if isinstance(body, dict):
+        body = [body]
+    if not isinstance(body, list):
+        raise SigmaError(f"selection must be a map or a list, got {type(body).__name__}")
+    if all(not isinstance(b, dict) for b in body):  # keyword list
+        test, anchor = _field_test("keywords|contains", body)
+        return [[test]], anchor
+    maps, anchors = [], []
+    for m in body:
+        if not isinstance(m, dict):
+            raise SigmaError("cannot mix keywords and maps in one selection")
+        tests = [_field_test(k, v) for k, v in m.items()]
+        maps.append([t for t, _ in tests])
+        anchors.append(_and_anchor([a for _, a in tests]))
+    return maps, _or_anchor(anchors)
+
+
+# ---------- condition parser ----------
+
+_TOKEN = re.compile(r"\s*(\(|\)|[A-Za-z0-9_*\-.]+)")
+
+
+def _tokens(cond: str) -> List[str]:
+    out, pos = [], 0
+    cond = cond.strip()
+    while pos < len(cond):
+        m = _TOKEN.match(cond, pos)
+        if not m:
+            raise SigmaError(f"bad condition near {cond[pos:]!r}")
+        out.append(m.group(1))
+        pos = m.end()
+    return out
+
+
+def parse_condition(cond: str, names: Sequence[str]) -> List[Any]:
+    """Condition string -> ["and"|"or", ...] / ["not", x] / ["sel", name] tree."""
+    toks = _tokens(cond)
+    pos = 0
+
+    def peek() -> Optional[str]:
+        return toks[pos].lower() if pos < len(toks) else None
+
+    def take() -> str:
+        nonlocal pos
+        if pos >= len(toks):
+            raise SigmaError(f"unexpected end of condition {cond!r}")
+        pos += 1
+        return toks[pos - 1]
+
+    def expr_or():
+        parts = [expr_and()]
+        while peek() == "or":
+            take()
+            parts.append(expr_and())
+        return parts[0] if len(parts) == 1 else ["or", *parts]
+
+    def expr_and():
+        parts = [expr_not()]
+        while peek() == "and":
+            take()
+            parts.append(expr_not())
+        return parts[0] if len(parts) == 1 else ["and", *parts]
+
+    def expr_not():
+        if peek() == "not":
+            take()
+            return ["not", expr_not()]
+        return atom()
+
+    def atom():
+        tok = take()
+        low = tok.lower()
+        if tok == "(":
+            node = expr_or()
+            if take() != ")":
+                raise SigmaError(f"missing ')' in {cond!r}")
+            return node
+        if low in ("1", "all", "any") and peek() == "of":
+            take()
+            pat = take()
+            hits = list(names) if pat.lower() == "them" else [n for n in names if fnmatch.fnmatchcase(n, pat)]
+            if not hits:
+                raise SigmaError(f"'{tok} of {pat}' matches no selection")
+            leaves = [["sel", n] for n in hits]
+            return leaves[0] if len(leaves) == 1 else [("and" if low == "all" else "or"), *leaves]
+        if tok not in names:
+            raise SigmaError(f"unknown selection {tok!r} in condition")
+        return ["sel", tok]
+
+    tree = expr_or()
+    if pos != len(toks):
+        raise SigmaError(f"trailing tokens in condition {cond!r}")
+    return tree
+
+
+def _tree_anchor(node: List[Any], sel_anchor: Dict[str, Optional[List[Tuple[str, str]]]]):
+    op = node[0]
+    if op == "sel":
+        return sel_anchor[node[1]]
+    if op == "not":
+        return None
+    kids = [_tree_anchor(c, sel_anchor) for c in node[1:]]
+    return _and_anchor(kids) if op == "and" else _or_anchor(kids)
+
+
+# ---------- rule -> IR ----------
+
+def _attack(tags: Sequence[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(tactic name, technique id) from `attack.*` tags."""
+    tactic = technique = None
+    for t in tags:
+        t = str(t).lower()
+        if not t.startswith("attack."):
+            continue
+        v = t[len("attack."):]
+        if re.fullmatch(r"t\d{4}(\.\d{3})?", v):
+            technique = technique or v.upper()
+        elif not re.fullmatch(r"[gs]\d{4}", v):
+            v = v.replace("-", "_")
+            tactic = tactic or TACTIC_NAMES.get(v, v.replace("_", " ").title())
+    return tactic, technique
+
+
+def compile_rule(doc: Dict[str, Any], origin: str = "") -> Dict[str, Any]:
+    """One parsed Sigma document -> JSON-able IR."""
+    det = doc.get("detection")
+    if not isinstance(det, dict) or "condition" not in det:
+        raise SigmaError("rule has no detection/condition")
+    cond = det["condition"]
+    if isinstance(cond, list):
+        cond = " or ".join(f"({c})" for c in cond)
+    if "|" in str(cond):
+        raise SigmaError("aggregation conditions (| count() ...) are not supported")
+    sels, anchors = {}, {}
+    for name, body in det.items():
+        if name in ("condition", "timeframe"):
+            continue
+        sels[name], anchors[name] = _selection(body)
+    tree = parse_condition(str(cond), list(sels))
+    tags = [str(t) for t in doc.get("tags") or []]
+    tactic, technique = _attack(tags)
+    anchor = _tree_anchor(tree, anchors)
+    return {
+        "id": str(doc.get("id") or origin), "title": str(doc.get("title") or origin),
+        "level": str(doc.get("level") or "medium").lower(), "tags": tags, "file": origin,
+        "tactic": tactic, "technique": technique,
+        "selections": sels, "condition": tree,
+        "anchors": [list(a) for a in anchor] if anchor is not None else None,
+    }
+
+
+def compile_text(text: str, origin: str = "") -> List[Dict[str, Any]]:
+    """All rules of a YAML file (multi-document files allowed)."""
+    import yaml  # PyYAML; only needed when a rule file is not in the cache
+    out = []
+    for i, doc in enumerate(d for d in yaml.safe_load_all(text) if d):
+        if isinstance(doc, dict) and "detection" in doc:
+            out.append(compile_rule(doc, f"{origin}#{i}" if i else origin))
+    return out
+
+
+# ---------- IR -> closures ----------
+
+Pred = Callable[[Dict[str, Optional[str]]], bool]
+
+
+def _test_pred(t: Dict[str, Any]) -> Pred:
+    f, op = t["field"], t["op"]
+    if f is None:
+        return lambda v: op == "null"
+    if op == "null":
+        return lambda v: not v.get(f)
+    if op == "cidr":
+        nets = [ipaddress.ip_network(n, strict=False) for n in t["nets"]]
+
+        def cidr(v):
+            try:
+                ip = ipaddress.ip_address(v.get(f) or "")
+            except ValueError:
+                return False
+            return any(ip in n for n in nets)
+        return cidr
+    flags = re.I | re.S if t["ci"] else re.S
+    if op == "any":
+        rx = re.compile("|".join(f"(?:{p})" for p in t["patterns"]), flags)
+        return lambda v: (s := v.get(f)) is not None and rx.search(s) is not None
+    rxs = [re.compile(p, flags) for p in t["patterns"]]
+    return lambda v: (s := v.get(f)) is not None and all(r.search(s) for r in rxs)
+
+
+def _selection_pred(maps: List[List[Dict[str, Any]]]) -> Pred:
+    compiled = [[_test_pred(t) for t in m] for m in maps]
+    if len(compiled) == 1 and len(compiled[0]) == 1:
+        return compiled[0][0]
+    return lambda v: any(all(p(v) for p in m) for m in compiled)
+
+
+def _tree_pred(node: List[Any], sels: Dict[str, Pred]) -> Pred:
+    op = node[0]
+    if op == "sel":
+        return sels[node[1]]
+    if op == "not":
+        inner = _tree_pred(node[1], sels)
+        return lambda v: not inner(v)
+    kids = [_tree_pred(c, sels) for c in node[1:]]
+    if op == "and":
+        return lambda v: all(k(v) for k in kids)
+    return lambda v: any(k(v) for k in kids)
+
+
+class Rule:
+    __slots__ = ("ir", "id", "title", "level", "rank", "tactic", "technique", "match")
+
+    def __init__(self, ir: Dict[str, Any]):
+        self.ir = ir
+        self.id, self.title, self.level = ir["id"], ir["title"], ir["level"]
+        self.rank = LEVELS.get(self.level, 2)
+        self.tactic, self.technique = ir["tactic"], ir["technique"]
+        sels = {n: _selection_pred(m) for n, m in ir["selections"].items()}
+        self.match: Pred = _tree_pred(ir["condition"], sels)
+
+
+# ---------- engine ----------
+
+def _technique_names() -> Dict[str, str]:
+    try:
+        from .mitre_rag import load_kb
+        return {e["technique_id"].upper(): e["name"] for e in load_kb()}
+    except Exception:
+        return {}
+
+
+class SigmaEngine:
+    def __init__(self, irs: Sequence[Dict[str, Any]], errors: Optional[Dict[str, str]] = None):
+        self.rules = [Rule(ir) for ir in irs]
+        self.errors = errors or {}
+        names = _technique_names() if any(r.technique for r in self.rules) else {}
+        # "T1059.001 Command and Scripting Interpreter", the format the MITRE mapper uses
+        self._labels = {r.id: f"{r.technique} {names.get(r.technique) or names.get(r.technique.split('.')[0]) or r.title}"
+                        for r in self.rules if r.technique}
+        self._always: List[int] = []
+        lits: Dict[str, Dict[str, Set[int]]] = {}  # field -> literal -> rule indexes
+        for i, r in enumerate(self.rules):
+            if r.ir["anchors"] is None:
+                self._always.append(i)
+            for field, lit in r.ir["anchors"] or ():
+                lits.setdefault(field, {}).setdefault(lit, set()).add(i)
+        # one overlapping scan per field; longest literal first, so the literals
+        # missed at a position are exactly the prefixes of the one captured there
+        self._scan: Dict[str, Tuple[re.Pattern, Dict[str, Set[int]]]] = {}
+        for field, by_lit in lits.items():
+            order = sorted(by_lit, key=lambda s: (-len(s), s))
+            rx = re.compile("(?=(" + "|".join(re.escape(s) for s in order) + "))", re.S)
+            closure = {s: set().union(*(by_lit[p] for p in by_lit if s.startswith(p))) for s in by_lit}
+            self._scan[field] = (rx, closure)
+        self.checked = 0
+        self.matched = 0
+
+    def candidates(self, view: Dict[str, Optional[str]]) -> List[int]:
+        found: Set[int] = set(self._always)
+        for field, (rx, closure) in self._scan.items():
+            text = view.get(field)
+            if text:
+                for lit in set(rx.findall(text.lower())):
+                    found |= closure[lit]
+        return sorted(found)
+
+    def match(self, e: Event) -> List[Rule]:
+        view = _view(e)
+        cand = self.candidates(view)
+        self.checked += len(cand)
+        hits = [self.rules[i] for i in cand if self.rules[i].match(view)]
+        self.matched += len(hits)
+        return hits
+
+    def apply(self, events: Sequence[Event]) -> Sequence[Event]:
+        """Attach matches to raw["sigma"]; the highest-level rule with a technique tag sets the mapping."""
+        if not self.rules:
+            return events
+        for e in events:
+            hits = self.match(e)
+            if not hits:
+                e.raw.pop("sigma", None)
+                continue
+            hits.sort(key=lambda r: -r.rank)
+            e.raw["sigma"] = [{"id": r.id, "title": r.title, "level": r.level, "tags": r.ir["tags"]} for r in hits]
+            top = next((r for r in hits if r.technique), None)
+            if top:  # tactic-only tags stay in raw["sigma"]: they would not fit the mapped technique
+                label = self._labels[top.id]
+                if e.technique != label:
+                    e.technique = label
+                if top.tactic and e.tactic != top.tactic:
+                    e.tactic = top.tactic
+        return events
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rules": len(self.rules), "unanchored": len(self._always), "errors": self.errors,
+                "checked": self.checked, "matched": self.matched}
+
+
+# ---------- loading + disk cache ----------
+
+def _rule_files(rules_dir: str) -> List[Path]:
+    root = Path(rules_dir)
+    if not root.is_dir():
+        return []
+    return sorted(p for p in root.rglob("*") if p.suffix in (".yml", ".yaml") and p.is_file())
+
+
+def _load_cache(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        return data["files"] if data.get("version") == COMPILER_VERSION else {}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _save_cache(path: str, files: Dict[str, Any]) -> None:
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": COMPILER_VERSION, "files": files}, fh)
+        os.replace(tmp, path)
+    except OSError as e:
+        _log.warning(f"sigma: could not write rule cache {path}: {e}")
+
+
+def load_engine(rules_dir: str = RULES_DIR, cache_path: Optional[str] = CACHE_PATH) -> SigmaEngine:
+    """Compile every rule file, reusing cached IR for files whose SHA-1 is unchanged."""
+    cache = _load_cache(cache_path) if cache_path else {}
+    files: Dict[str, Any] = {}
+    irs: List[Dict[str, Any]] = []
+    errors: Dict[str, str] = {}
+    dirty = False
+    for p in _rule_files(rules_dir):
+        rel = p.relative_to(rules_dir).as_posix()
+        blob = p.read_bytes()
+        sha = hashlib.sha1(blob).hexdigest()
+        hit = cache.get(rel)
+        if hit and hit.get("sha1") == sha:
+            entry = hit
+        else:
+            dirty = True
+            try:
+                entry = {"sha1": sha, "rules": compile_text(blob.decode("utf-8-sig"), rel)}
+            except Exception as e:  # bad rule files are reported, not fatal
+                entry = {"sha1": sha, "rules": [], "error": f"{type(e).__name__}: {e}"}
+        if entry.get("error"):
+            errors[rel] = entry["error"]
+        files[rel] = entry
+        irs.extend(entry["rules"])
+    if cache_path and (dirty or set(files) != set(cache)):
+        _save_cache(cache_path, files)
+    for rel, err in errors.items():
+        _log.warning(f"sigma: skipped {rel}: {err}")
+    return SigmaEngine(irs, errors)
+
+
+_engine: Optional[Tuple[Tuple, SigmaEngine]] = None
+_engine_lock = threading.Lock()
+
+
+def _signature(rules_dir: str) -> Tuple:
+    return tuple((p.as_posix(), p.stat().st_mtime_ns, p.stat().st_size) for p in _rule_files(rules_dir))
+
+
+def get_engine() -> SigmaEngine:
+    """Process-wide engine, recompiled when a rule file is added, changed or removed."""
+    global _engine
+    sig = _signature(RULES_DIR)
+    with _engine_lock:
+        if _engine is None or _engine[0] != sig:
+            _engine = (sig, load_engine())
+        return _engine[1]
+
+
+_ruleset: Optional[Tuple[Tuple, str]] = None
+
+
+def ruleset_signature() -> str:
+    """Content hash of the active rule set (compiler version + every rule file); "off" when disabled."""
+    global _ruleset
+    if not ENABLED:
+        return "off"
+    sig = _signature(RULES_DIR)
+    cached = _ruleset
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    h = hashlib.sha1(f"v{COMPILER_VERSION}".encode())
+    for p in _rule_files(RULES_DIR):
+        h.update(p.relative_to(RULES_DIR).as_posix().encode("utf-8") + b"\0")
+        h.update(hashlib.sha1(p.read_bytes()).digest())
+    _ruleset = (sig, h.hexdigest())
+    return _ruleset[1]
+
+
+def apply_sigma(events: Sequence[Event]) -> Sequence[Event]:
+    return get_engine().apply(events) if ENABLED else events
@@ -0,0 +1,111 @@
+"""
+Small streaming summaries for one pass over huge inputs (see preview.py).
+
+  Reservoir       uniform sample of k items (Vitter's Algorithm L: one random
+                  draw per *replacement*, not per item)
+  CountMinSketch  frequency estimates, overestimate <= eps * N w.p. 1 - delta
+  HyperLogLog     distinct counts, relative standard error 1.04 / sqrt(2^p)
+
+Hashes come from the built-in hash(): fast and well mixed for str, but salted
+per process, so sketches are not meant to be merged across processes.
+"""
+import math
+import random
+from typing import Any, Dict, List, Optional
+
+_MASK64 = (1 << 64) - 1
+
+
+class Reservoir:
+    def __init__(self, k: int, rng: Optional[random.Random] = None):
+        self.k = max(1, k)
+        self.items: List[Any] = []
+        self.seen = 0
+        self._rng = rng or random.Random()
+        self._w = 1.0
+        self._next = 0
+
+    def _skip(self) -> None:
+        self._w *= math.exp(math.log(self._rng.random() or 1e-300) / self.k)
+        self._next += int(math.log(self._rng.random() or 1e-300) / math.log1p(-self._w)) + 1
+
+    def add(self, item: Any) -> None:
+        self.seen += 1
+        if len(self.items) < self.k:
+            self.items.append(item)
+            if len(self.items) == self.k:
+                self._next = self.k
+                self._skip()
+        elif self.seen == self._next:
+            self.items[self._rng.randrange(self.k)] = item
+            self._skip()
+
+
+class CountMinSketch:
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width, self.depth = width, depth
+        self.table = [0] * (width * depth)
+        self.total = 0
+
+    def _cells(self, key: str):
+        h = hash(key) & _MASK64
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1  # double hashing
+        w = self.width
+        return [i * w + (h1 + i * h2) % w for i in range(self.depth)]
+
+    def add(self, key: str, n: int = 1) -> None:
+        t = self.table
+        for c in self._cells(key):
+            t[c] += n
+        self.total += n
+
+    def estimate(self, key: str) -> int:
+        t = self.table
+        return min(t[c] for c in self._cells(key))
+
+    @property
+    def epsilon(self) -> float:
+        return math.e / self.width
+
+    @property
+    def delta(self) -> float:
+        return math.exp(-self.depth)
+
+    def error_bound(self) -> float:
+        """Max overestimate of any key, holding with probability 1 - delta."""
+        return self.epsilon * self.total
+
+
+class HyperLogLog:
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+        self._rest_bits = 64 - p
+
+    def add(self, value: str) -> None:
+        h = hash(value) & _MASK64
+        idx = h >> self._rest_bits
+        rest = h & ((1 << self._rest_bits) - 1)
+        rank = self._rest_bits - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def estimate(self) -> float:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        e = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if e <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # small-range correction (linear counting)
+        return e
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def summary(self) -> Dict[str, Any]:
+        est = self.estimate()
+        return {"estimate": round(est), "rel_error": round(self.relative_error, 4),
+                "low": max(0, round(est * (1 - 2 * self.relative_error))),
+                "high": round(est * (1 + 2 * self.relative_error))}
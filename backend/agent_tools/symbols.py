@@ -0,0 +1,44 @@
+"""
+Shared string pool for host names.
+
+The parser interns host strings through HOSTS so millions of parsed events
+share one copy of each host instead of one each. HOSTS is an InternPool capped
+at SENTINEL_SYMBOLS_MAX entries and emptied when full. That is safe because it
+hands out strings, not codes.
+"""
+import os
+import sys
+from typing import Any, Dict, Hashable
+
+POOL_MAX = int(os.getenv("SENTINEL_SYMBOLS_MAX", "100000"))
+
+
+def _canonical(value: Hashable) -> Hashable:
+    # only str can be interned; None / ints / other JSON scalars are kept as they are
+    return sys.intern(value) if type(value) is str else value
+
+
+class InternPool:
+    """Bounded string pool: intern() returns one shared copy per value; emptied once max_size is reached."""
+
+    def __init__(self, name: str = "", max_size: int = POOL_MAX):
+        self.name = name
+        self.max_size = max(1, max_size)
+        self._pool: Dict[Hashable, Any] = {}
+        self.resets = 0
+
+    def __len__(self) -> int:
+        return len(self._pool)
+
+    def intern(self, value: Hashable) -> Any:
+        hit = self._pool.get(value)
+        if hit is not None:
+            return hit
+        if len(self._pool) >= self.max_size:
+            self._pool = {}
+            self.resets += 1
+        value = self._pool[value] = _canonical(value)
+        return value
+
+
+HOSTS = InternPool("hosts")
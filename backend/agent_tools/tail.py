@@ -0,0 +1,142 @@
+"""
+Follow growing log files (tail -F) with persistent offset checkpoints.
+
+Polling based (portable, no inotify dependency): each poll() stats the path,
+reads whatever was appended since the last offset and returns only complete
+lines; a trailing partial line waits for the next poll.
+
+Rotation (the path now points to a different inode) is handled by draining
+the old handle first and then reading the new file from offset 0;
+truncation (size below the offset) restarts from 0. Offsets are stored per
+path in a small JSON checkpoint file, so a restart resumes where it stopped
+instead of re-reading the file.
+
+poll() does not move the checkpoint: it returns the lines plus a mark, and the
+caller commit()s the mark once the lines are fully handled, or rewind()s to
+re-read them. A crash mid-batch therefore replays the batch on restart
+instead of skipping it.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+READ_CHUNK = 1 << 20
+
+
+class CheckpointStore:
+    """{path: {"inode", "offset"}} persisted as JSON (atomic replace)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self.data: Dict[str, Dict[str, int]] = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            self.data = {}
+
+    def get(self, key: str) -> Optional[Tuple[int, int]]:
+        v = self.data.get(key)
+        return (v["inode"], v["offset"]) if v else None
+
+    def put(self, key: str, inode: int, offset: int) -> None:
+        with self._lock:
+            self.data[key] = {"inode": inode, "offset": offset}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.data, indent=1), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+
+class FileFollower:
+    def __init__(self, path: Path, checkpoints: Optional[CheckpointStore] = None, from_start: bool = False):
+        self.path = Path(path)
+        self.key = str(self.path.resolve())
+        self.checkpoints = checkpoints
+        self.from_start = from_start
+        self._fh = None
+        self._inode: Optional[int] = None
+        self.offset = 0
+        self._partial = b""
+        self.rotations = 0
+        self.truncations = 0
+        self.committed: Optional[Tuple[int, int]] = None  # (inode, offset) last handed to commit()
+
+    def _open(self, st: os.stat_result, offset: int) -> None:
+        self._fh = open(self.path, "rb")
+        self._fh.seek(offset)
+        self._inode = st.st_ino
+        self.offset = offset
+        self._partial = b""
+        if self.committed is None or self.committed[0] != st.st_ino:
+            self.committed = (st.st_ino, offset)
+
+    def _start_offset(self, st: os.stat_result) -> int:
+        saved = self.checkpoints.get(self.key) if self.checkpoints else None
+        if saved and saved[0] == st.st_ino and saved[1] <= st.st_size:
+            return saved[1]
+        return 0 if self.from_start or saved else st.st_size
+
+    def _read_all(self) -> List[str]:
+        out: List[str] = []
+        while True:
+            block = self._fh.read(READ_CHUNK)
+            if not block:
+                break
+            self.offset += len(block)
+            parts = (self._partial + block).split(b"\n")
+            self._partial = parts.pop()
+            out.extend(p.decode("utf-8", errors="ignore") for p in parts)
+        return out
+
+    def poll(self) -> Tuple[List[str], Optional[Tuple[int, int]]]:
+        """(complete lines appended since the previous poll, mark to commit() once they are handled)."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return [], None
+        lines: List[str] = []
+        if self._fh is None:
+            self._open(st, self._start_offset(st))
+        elif st.st_ino != self._inode:
+            # rotated: finish the old file, then start the new one from the top
+            lines.extend(self._read_all())
+            if self._partial:
+                lines.append(self._partial.decode("utf-8", errors="ignore"))
+            self._fh.close()
+            self.rotations += 1
+            self._open(st, 0)
+        elif st.st_size < self.offset:
+            self.truncations += 1
+            self._fh.close()
+            self._open(st, 0)
+        lines.extend(self._read_all())
+        # the mark sits at the last complete line, never inside a partial one
+        return lines, (self._inode, self.offset - len(self._partial))
+
+    def commit(self, mark: Optional[Tuple[int, int]]) -> None:
+        """Persist a mark from poll(): everything before it has been handled."""
+        if mark is None or mark == self.committed:
+            return
+        self.committed = mark
+        if self.checkpoints:
+            self.checkpoints.put(self.key, *mark)
+
+    def rewind(self) -> None:
+        """Re-read from the last committed mark on the next poll (same file only; a rotated-away file is gone)."""
+        if self._fh is None or self.committed is None or self.committed[0] != self._inode:
+            return
+        self._fh.seek(self.committed[1])
+        self.offset = self.committed[1]
+        self._partial = b""
+
+    def status(self) -> Dict[str, object]:
+        return {"path": str(self.path), "offset": self.offset - len(self._partial), "inode": self._inode,
+                "committed": self.committed[1] if self.committed else None,
+                "rotations": self.rotations, "truncations": self.truncations}
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
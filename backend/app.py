@@ -1,5 +1,6 @@
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 import logging
 from pathlib import Path
 import json
@@ -8,92 +9,58 @@ from pydantic import BaseModel
 from datetime import datetime
 import re
 import os
-from collections import Counter
+import time
+import importlib
+import threading
+from collections import Counter, OrderedDict
 
-# ================================
-# IBM watsonx.ai / Granite (version-safe)
-# ================================
-WX_AVAILABLE = True
-WX_IMPORT_ERR: Optional[Exception] = None
-WX_MODE = None  # "model" or "model_inference"
+try:
+    import execution
+    import http_cache
+    import profiling
+    import warmup
+    from metrics import observe_route, route_latency_summary, stage, metered, render_prometheus
+except Exception:
+    from backend import execution, http_cache, profiling, warmup  # type: ignore
+    from backend.metrics import observe_route, route_latency_summary, stage, metered, render_prometheus  # type: ignore
 
 try:
-    # Preferred (modern) SDK path
-    from ibm_watsonx_ai import Credentials
-    from ibm_watsonx_ai.foundation_models import Model  # modern entry point
-    WX_MODE = "model"
-except Exception as _e1:
+    from agent_tools.graph_summary import graph_at_level
+    from agent_tools.report_stream import iter_fm_report
+    from agent_tools.report_bundle import build_bundle
+    from agent_tools import llm_client
+    from agent_tools.parser import parse_stats
+except Exception:
+    from backend.agent_tools.graph_summary import graph_at_level  # type: ignore
+    from backend.agent_tools.report_stream import iter_fm_report  # type: ignore
+    from backend.agent_tools.report_bundle import build_bundle  # type: ignore
+    from backend.agent_tools import llm_client  # type: ignore
+    from backend.agent_tools.parser import parse_stats  # type: ignore
+
+
+def _agent_tool(name: str):
+    """agent_tools.<name>, imported on first use (numpy-backed graph modules stay out of cold start)."""
     try:
-        # Fallback for older SDKs that exposed ModelInference
-        from ibm_watsonx_ai import Credentials, ModelInference
-        WX_MODE = "model_inference"
-    except Exception as _e2:
-        WX_AVAILABLE = False
-        WX_IMPORT_ERR = _e1 or _e2
-
-WATSONX_API_KEY    = os.getenv("WATSONX_API_KEY", "")
-WATSONX_PROJECT_ID = os.getenv("WATSONX_PROJECT_ID", "")
-# Default to EU-GB per your values (override via env if needed)
-WATSONX_BASE_URL   = os.getenv("WATSONX_BASE_URL", "https://eu-gb.ml.cloud.ibm.com")
-# Common Granite chat model (override if your account uses a different ID)
-WATSONX_MODEL_ID   = os.getenv("WATSONX_MODEL_ID", "ibm/granite-13b-chat-v2")
+        return importlib.import_module(f"agent_tools.{name}")
+    except ImportError:
+        return importlib.import_module(f"backend.agent_tools.{name}")
 
 
+# ================================
+# IBM watsonx.ai / Granite (shared pooled client, see agent_tools/llm_client.py)
+# ================================
 def _wx_is_configured() -> bool:
-    return WX_AVAILABLE and bool(WATSONX_API_KEY and WATSONX_PROJECT_ID)
+    return llm_client.is_configured()
 
 
 def _wx_generate(prompt: str, model_id: Optional[str] = None) -> str:
-    """Generate text with Granite across SDK variants; returns text or an error marker."""
-    if not _wx_is_configured():
-        if not WX_AVAILABLE:
-            return f"(Granite disabled: SDK not available: {WX_IMPORT_ERR})"
-        return "(Granite disabled: missing API key/project id)"
-
+    """Generate text with Granite; returns text or an error marker."""
+    client = llm_client.get_client()
+    if not client.enabled:
+        return f"(Granite disabled: {client.reason})"
     try:
-        creds = Credentials(api_key=WATSONX_API_KEY, url=WATSONX_BASE_URL)
-        mdl_id = model_id or WATSONX_MODEL_ID
-
-        params = {
-            "decoding_method": "greedy",
-            "max_new_tokens": 600,
-            "temperature": 0.2,
-        }
-
-        if WX_MODE == "model":
-            model = Model(
-                model_id=mdl_id,
-                credentials=creds,
-                project_id=WATSONX_PROJECT_ID,
-                params=params,
-            )
-            out = model.generate_text(prompt=prompt) if hasattr(model, "generate_text") else model.generate(prompt=prompt)
-            if isinstance(out, dict):
-                res = out.get("results") or []
-                if isinstance(res, list) and res and isinstance(res[0], dict):
-                    return res[0].get("generated_text") or res[0].get("text") or ""
-                return out.get("generated_text", "")
-            return str(out)
-
-        elif WX_MODE == "model_inference":
-            mi = ModelInference(
-                model_id=mdl_id,
-                credentials=creds,
-                project_id=WATSONX_PROJECT_ID,
-                params=params,
-            )
-            out = mi.generate_text(prompt=prompt)
-            if isinstance(out, dict):
-                res = out.get("results") or []
-                if isinstance(res, list) and res and isinstance(res[0], dict):
-                    return res[0].get("generated_text") or res[0].get("text") or ""
-                return out.get("generated_text", "")
-            return str(out)
-
-        else:
-            return "(Granite disabled: unknown SDK mode)"
-
-    except Exception as e:
+        return client.generate(prompt, model_id)
+    except llm_client.LLMError as e:
         return f"(Granite generation failed: {e})"
 
 
@@ -230,6 +197,26 @@ app.add_middleware(
     allow_methods=["*"], allow_headers=["*"]
 )
 
+# Per-route latency histograms (see /stats/latency)
+# plus opt-in profiling (SENTINEL_PROFILING=1 and `X-Profile: 1`).
+@app.middleware("http")
+async def _route_latency(request: Request, call_next):
+    t0 = time.perf_counter()
+    session = profiling.ProfileSession() if profiling.wants_profile(request.headers, request.query_params) else None
+    token = profiling.start(session) if session else None
+    try:
+        if session is None:
+            return await call_next(request)
+        with session:
+            response = await call_next(request)
+        response.headers["X-Profile"] = session.header_value()
+        return response
+    finally:
+        if token is not None:
+            profiling.reset(token)
+        route = request.scope.get("route")
+        observe_route(request.method, getattr(route, "path", "<unmatched>"), time.perf_counter() - t0)
+
 # Data locations / constants
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"            # put your logs here (next to app.py)
@@ -442,72 +429,13 @@ def fm_make_timeline(payload: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _html_escape(s: Any) -> str:
-    s = "" if s is None else str(s)
-    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+# the JSON /report keeps the page bounded; /report/stream renders everything
+REPORT_LIMITS = {"iocs": 500, "mitre": 500, "timeline": 1000}
 
 
 def fm_report_html(timeline: List[Dict[str, Any]], iocs: List[Dict[str, Any]], mitre: List[Dict[str, Any]]) -> str:
-    """Server-rendered technical report with expanders for long lines."""
-    ioc_rows = "\n".join(
-        f"<tr><td>{_html_escape(i.get('type'))}</td><td>{_html_escape(i.get('value'))}</td><td>{_html_escape(i.get('event_idx'))}</td></tr>"
-        for i in iocs[:500]
-    ) or '<tr><td colspan="3">None</td></tr>'
-
-    mitre_rows = "\n".join(
-        f"<tr><td>{_html_escape(m.get('event_idx'))}</td><td>{_html_escape(', '.join([x.get('id','') for x in (m.get('techniques') or [])]))}</td></tr>"
-        for m in mitre[:500]
-    ) or '<tr><td colspan="2">None</td></tr>'
-
-    tl_rows_parts: List[str] = []
-    for t in timeline[:1000]:
-        ts = _html_escape(t.get("timestamp"))
-        idx = _html_escape(t.get("idx"))
-        short = _html_escape(t.get("summary"))
-        if t.get("truncated") and t.get("full"):
-            full = _html_escape(t.get("full"))
-            tl_rows_parts.append(
-                f"<tr><td class='mono'>{ts}</td>"
-                f"<td class='mono'><div>{short}</div>"
-                f"<details style='margin-top:6px'><summary>Show full raw</summary>"
-                f"<pre style='white-space:pre-wrap'>{full}</pre></details></td>"
-                f"<td>{idx}</td></tr>"
-            )
-        else:
-            tl_rows_parts.append(
-                f"<tr><td class='mono'>{ts}</td><td class='mono'>{short}</td><td>{idx}</td></tr>"
-            )
-    tl_rows = "\n".join(tl_rows_parts) or '<tr><td colspan="3">No events</td></tr>'
-
-    html = f"""
-    <style>
-      .mono {{ font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; font-size:12px; }}
-      table {{ border-collapse: collapse; width: 100%; }}
-      th, td {{ border: 1px solid #eee; padding: 6px 8px; text-align: left; }}
-      th {{ background: #fafafa; }}
-    </style>
-    <h2>ForensicMind Report</h2>
-    <p><strong>Generated:</strong> {datetime.utcnow().isoformat()}Z</p>
-
-    <h3>Indicators of Compromise (IOCs)</h3>
-    <table>
-      <tr><th>Type</th><th>Value</th><th>Event Idx</th></tr>
-      {ioc_rows}
-    </table>
-
-    <h3>MITRE ATT&CK Mapping</h3>
-    <table>
-      <tr><th>Event Idx</th><th>Techniques</th></tr>
-      {mitre_rows}
-    </table>
-
-    <h3>Timeline</h3>
-    <table>
-      <tr><th>Timestamp</th><th>Event (short; expand for full)</th><th>Idx</th></tr>
-      {tl_rows}
-    </table>
-    """
-    return html
+    """Server-rendered technical report with expanders for long lines (capped, see REPORT_LIMITS)."""
+    return "".join(iter_fm_report(timeline, iocs, mitre, limits=REPORT_LIMITS))
 
 
 # ================================
@@ -520,27 +448,32 @@ _uvlog = logging.getLogger("uvicorn.error")
 def fm_parse_endpoint(inp: FMLogsIn):
     if not inp.logs.strip():
         raise HTTPException(status_code=400, detail="Empty logs.")
-    events = fm_parse_lines(inp.logs)
+    with stage("parse", nbytes=len(inp.logs)) as st:
+        events = fm_parse_lines(inp.logs)
+        st.events = len(events)
     return {"events": events}
 
 
 @app.post("/enrich")
 def fm_enrich_endpoint(e1: FMEventsIn):
-    return fm_enrich(e1.events)
+    with stage("enrich", events=len(e1.events)):
+        return fm_enrich(e1.events)
 
 
 @app.post("/mitre-map")
 def fm_mitre_endpoint(payload: Dict[str, Any]):
     if "events" not in payload:
         raise HTTPException(status_code=400, detail="Missing 'events'.")
-    return fm_mitre_map(payload)
+    with stage("mitre", events=len(payload["events"])):
+        return fm_mitre_map(payload)
 
 
 @app.post("/timeline")
 def fm_timeline_endpoint(payload: Dict[str, Any]):
     if "events" not in payload:
         raise HTTPException(status_code=400, detail="Missing 'events'.")
-    return fm_make_timeline(payload)
+    with stage("timeline", events=len(payload["events"])):
+        return fm_make_timeline(payload)
 
 
 @app.post("/report")
@@ -561,19 +494,45 @@ def fm_report_endpoint(payload: Dict[str, Any]):
     iocs = payload.get("iocs", [])
     mitre = payload.get("mitre", [])
 
-    html = fm_report_html(timeline, iocs, mitre)
+    with stage("report", events=len(timeline)) as st:
+        html = fm_report_html(timeline, iocs, mitre)
+        st.bytes = len(html)
 
     ai = {"enabled": False, "easy": "", "soc": "", "easy_mitre": ""}
     if _wx_is_configured():
         prompts = _build_prompts_for_report(timeline, iocs, mitre)
         ai["enabled"] = True
-        ai["easy"] = _wx_generate(prompts["easy"])
-        ai["soc"]  = _wx_generate(prompts["soc"])
-        ai["easy_mitre"] = _wx_generate(prompts["easy_mitre"])  # NEW: Granite Easy Summary focused on MITRE
+        keys = ("easy", "soc", "easy_mitre")  # easy_mitre: Granite Easy Summary focused on MITRE
+        outs = llm_client.get_client().generate_many([prompts[k] for k in keys])
+        for k, out in zip(keys, outs):
+            ai[k] = f"(Granite generation failed: {out})" if isinstance(out, Exception) else out
 
     return {"html": html, "ai": ai}
 
 
+@app.post("/report/stream")
+def fm_report_stream_endpoint(payload: Dict[str, Any]):
+    """Full-size technical report (no row caps), streamed as HTML chunks."""
+    timeline = payload.get("timeline", [])
+    chunks = iter_fm_report(timeline, payload.get("iocs", []), payload.get("mitre", []))
+    return StreamingResponse(metered("report", chunks, events=len(timeline)), media_type="text/html; charset=utf-8")
+
+
+@app.post("/report/export")
+async def fm_report_export_endpoint(payload: Dict[str, Any]):
+    """Offline bundle (zip): static viewer + gzip'd row chunks it loads lazily."""
+    timeline = payload.get("timeline", [])
+    with stage("report_export", events=len(timeline)) as st:
+        blob = await execution.run_heavy(
+            build_bundle, timeline, payload.get("iocs", []), payload.get("mitre", []),
+            payload.get("title") or "ForensicMind Report",
+        )
+        st.bytes = len(blob)
+    name = f"forensicmind-report-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.zip"
+    return Response(blob, media_type="application/zip",
+                    headers={"Content-Disposition": f'attachment; filename="{name}"'})
+
+
 @app.post("/graph-write")
 def fm_graph_write_endpoint(payload: Dict[str, Any]):
     # pretend to write to a graph DB; acknowledge
@@ -585,7 +544,26 @@ def fm_graph_write_endpoint(payload: Dict[str, Any]):
 # ================================
 @app.get("/health")
 def health():
-    return {"ok": True}
+    return {"ok": True, "warmup": warmup.status()["state"]}
+
+
+@app.get("/stats/latency")
+def stats_latency():
+    """Per-route latency histograms plus heavy-job pool, LLM client, response cache and parser state."""
+    return {"routes": route_latency_summary(), "executor": execution.stats(), "llm": llm_client.get_client().stats(),
+            "http_cache": http_cache.stats(), "parser": parse_stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text exposition: stage timings/counters, route latencies, pool gauges."""
+    ex = execution.stats()
+    gauges = {f"sentinel_heavy_jobs_{k}": ex[k] for k in ("running", "queued", "rejected", "completed")}
+    lc = llm_client.get_client().stats()
+    gauges.update({f"sentinel_llm_{k}": lc[k] for k in ("requests", "calls", "coalesced", "retries", "failures", "throttled_s")})
+    ps = parse_stats()
+    gauges.update({f"sentinel_parser_{k}_lines": ps[k] for k in ("fast", "regex", "blank", "unparsed")})
+    return PlainTextResponse(render_prometheus(gauges), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/log-types")
@@ -593,21 +571,237 @@ def log_types():
     return list(LOG_TYPES)
 
 
-@app.get("/graph")
-def graph(type: str = Query("application", description="application|system|network")):
+def _graph_version(path: Path) -> str:
+    """Cheap content version for a log file (mtime + size)."""
+    try:
+        st = path.stat()
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    except OSError:
+        return "missing"
+
+
+_graph_cache: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+_engine_cache: Dict[str, Tuple[str, Any]] = {}
+
+
+def _check_type(type: str) -> str:
     t = type.lower()
     if t not in LOG_TYPES:
         raise HTTPException(status_code=400, detail=f"Invalid type '{type}'. Use one of {LOG_TYPES}.")
+    return t
+
 
+def _load_type_graph(t: str) -> Tuple[Dict[str, Any], str]:
+    """Graph for a log type, rebuilt only when the underlying file changes."""
     path = LOG_FILE_MAP[t]
+    version = _graph_version(path)
+    hit = _graph_cache.get(t)
+    if hit and hit[0] == version:
+        return hit[1], version
+
     events = _read_jsonl(path)
     using_fallback = not bool(events)
+    with stage("graphify", events=len(events)):
+        g = _build_graph_from_events(events) if events else _fallback_sample_graph()
+    g["meta"] = {"type": t, "file": str(path), "events": len(events), "fallback": using_fallback, "version": version}
+    _graph_cache[t] = (version, g)
+    return g, version
 
-    g = _build_graph_from_events(events) if events else _fallback_sample_graph()
-    g["meta"] = {"type": t, "file": str(path), "events": len(events), "fallback": using_fallback}
 
-    _uvlog.info(f"/graph type={t} file={path} events={len(events)} fallback={using_fallback}")
-    return g
+def _type_engine(t: str):
+    g, version = _load_type_graph(t)
+    hit = _engine_cache.get(t)
+    if hit and hit[0] == version:
+        return hit[1]
+    eng = _agent_tool("graph_engine").GraphEngine(g)
+    _engine_cache[t] = (version, eng)
+    return eng
+
+
+class _ViewCache:
+    """Small LRU of derived views: key -> (source version, value).
+
+    key[0] is the source (log type); storing a view of a new version drops that
+    source's views of older versions, and at most `size` keys are kept, so
+    client-chosen parameters cannot grow it.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._items: "OrderedDict[Tuple[Any, ...], Tuple[Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[Any, ...], version: Any) -> Any:
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is None or hit[0] != version:
+                return None
+            self._items.move_to_end(key)
+            return hit[1]
+
+    def put(self, key: Tuple[Any, ...], version: Any, value: Any) -> None:
+        with self._lock:
+            for k in [k for k, (v, _) in self._items.items() if k[0] == key[0] and v != version]:
+                del self._items[k]
+            self._items[key] = (version, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+VIEW_CACHE_SIZE = int(os.getenv("SENTINEL_VIEW_CACHE", "32"))
+_summary_cache = _ViewCache(VIEW_CACHE_SIZE)
+_layout_cache = _ViewCache(VIEW_CACHE_SIZE)
+
+
+def _graph_view(
+    t: str, level: int, group: str, cluster: Optional[str], min_nodes: int, expanded: Tuple[str, ...] = (),
+) -> Tuple[Dict[str, Any], str]:
+    g, version = _load_type_graph(t)
+    if level == 2 and not cluster:
+        return g, version
+
+    ck = (t, level, group, cluster or "", min_nodes, expanded)
+    hit = _summary_cache.get(ck, version)
+    if hit is not None:
+        return hit, version
+    try:
+        out = graph_at_level(g, level, by=group, cluster=cluster, min_nodes=min_nodes, expanded=expanded)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if out is None:
+        raise HTTPException(status_code=404, detail=f"Unknown cluster '{cluster}'.")
+    out["meta"] = {**g["meta"], "level": level, "group": group, "raw_edges": len(g["edges"])}
+    _summary_cache.put(ck, version, out)
+    return out, version
+
+
+@app.get("/graph")
+def graph(
+    request: Request,
+    type: str = Query("application", description="application|system|network"),
+    level: int = Query(2, ge=0, le=2, description="0=super-nodes, 1=collapsed parallel edges, 2=raw"),
+    group: str = Query("community", description="super-node grouping for level 0: community|subnet"),
+    cluster: Optional[str] = Query(None, description="expand one super-node id (from level 0)"),
+    min_nodes: int = Query(50, ge=0, description="level 0 only clusters graphs larger than this"),
+    layout: Optional[str] = Query(None, description="precomputed node positions: force|layered"),
+    expanded: Optional[str] = Query(None, description="comma-separated super-node ids to keep unfolded (level 0 / cluster)"),
+):
+    t = _check_type(type)
+    version = _graph_version(LOG_FILE_MAP[t])
+    _uvlog.info(f"/graph type={t} level={level} layout={layout} version={version}")
+    # ETag / 304 and compressed variants (http_cache); the view is only built on a cache miss
+    opened = tuple(sorted({c for c in (expanded or "").split(",") if c}))
+    key = ("graph", t, level, group, cluster or "", min_nodes, layout or "", opened)
+    return http_cache.respond(
+        request, key, version, lambda: _graph_payload(t, level, group, cluster, min_nodes, layout, opened)
+    )
+
+
+def _graph_payload(
+    t: str, level: int, group: str, cluster: Optional[str], min_nodes: int, layout: Optional[str],
+    expanded: Tuple[str, ...] = (),
+) -> Dict[str, Any]:
+    out, version = _graph_view(t, level, group, cluster, min_nodes, expanded)
+    meta = out["meta"]
+    if not layout:
+        return out
+
+    lk = (t, level, group, cluster or "", min_nodes, layout, expanded)
+    hit = _layout_cache.get(lk, version)
+    if hit is not None:
+        return hit
+    t0 = time.perf_counter()
+    try:
+        positions = _agent_tool("layout").compute_layout(out, layout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    laid = _agent_tool("layout").with_positions(out, positions)
+    laid["meta"] = {**meta, "layout": layout, "layout_ms": round((time.perf_counter() - t0) * 1000, 1)}
+    _layout_cache.put(lk, version, laid)
+    return laid
+
+
+# ================================
+# API routes: server-side graph analytics
+# ================================
+@app.get("/graph/path")
+def graph_path(
+    src: str,
+    dst: str,
+    after: int = Query(0, description="only use edges with stepNum >= after"),
+    type: str = Query("application", description="application|system|network"),
+):
+    """Time-respecting (non-decreasing stepNum) earliest-arrival attack path src -> dst."""
+    t0 = time.perf_counter()
+    res = _type_engine(_check_type(type)).shortest_path(src, dst, after)
+    res["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    return res
+
+
+@app.get("/graph/blast-radius")
+def graph_blast_radius(
+    node: str,
+    after: int = Query(0, description="compromise time (stepNum)"),
+    type: str = Query("application", description="application|system|network"),
+):
+    """Everything reachable from a compromised node using edges at/after `after`."""
+    t0 = time.perf_counter()
+    res = _type_engine(_check_type(type)).blast_radius(node, after)
+    res["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    return res
+
+
+@app.get("/graph/central")
+def graph_central(
+    k: int = Query(10, ge=1, le=1000),
+    metric: str = Query("pagerank", description="pagerank|degree"),
+    type: str = Query("application", description="application|system|network"),
+):
+    t0 = time.perf_counter()
+    eng = _type_engine(_check_type(type))
+    try:
+        top = eng.top_central(k, metric)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"metric": metric, "nodes": top, "elapsed_ms": round((time.perf_counter() - t0) * 1000, 3)}
+
+
+# window/step_seconds are free floats: a few recent parameter sets per set of types
+_correlate_cache = _ViewCache(int(os.getenv("SENTINEL_CORRELATE_CACHE", "8")))
+
+
+def _correlate_types(types: List[str], window: float, min_sources: int, step_seconds: float, max_events: int) -> Dict[str, Any]:
+    streams = {t: _read_jsonl(LOG_FILE_MAP[t]) for t in types}
+    return _agent_tool("correlate").correlate(streams, window=window, min_sources=min_sources,
+                                               step_seconds=step_seconds, max_events=max_events)
+
+
+@app.get("/correlate")
+async def correlate_sources(
+    types: str = Query(",".join(LOG_TYPES), description="comma-separated log types to join"),
+    window: float = Query(300, gt=0, description="max seconds between linked events"),
+    min_sources: int = Query(2, ge=1, description="only incidents spanning this many log types"),
+    step_seconds: float = Query(60, gt=0, description="seconds per stepNum for logs without timestamps"),
+    max_events: int = Query(200, ge=1, le=10000, description="events listed per incident"),
+):
+    """Incident chains across log types: events sharing a host/IP/user within `window` seconds."""
+    ts = list(dict.fromkeys(_check_type(t.strip()) for t in types.split(",") if t.strip()))
+    if not ts:
+        raise HTTPException(status_code=400, detail=f"No log types given. Use any of {LOG_TYPES}.")
+    versions = tuple(_graph_version(LOG_FILE_MAP[t]) for t in ts)
+    ck = (tuple(ts), window, min_sources, step_seconds, max_events)
+    hit = _correlate_cache.get(ck, versions)
+    if hit is not None:
+        return hit
+    with stage("correlate") as st:
+        out = await execution.run_heavy(_correlate_types, ts, window, min_sources, step_seconds, max_events)
+        st.events = out["stats"]["events"]
+    _correlate_cache.put(ck, versions, out)
+    return out
 
 
 # ================================
@@ -620,6 +814,20 @@ try:
 except Exception as e:
     print("[app] WARN: ingest_router not loaded ->", e)
 
+try:
+    from ioc_router import router as ioc_router
+    app.include_router(ioc_router)
+    print("[app] ioc_router loaded")
+except Exception as e:
+    print("[app] WARN: ioc_router not loaded ->", e)
+
+try:
+    from cases_router import router as cases_router
+    app.include_router(cases_router)
+    print("[app] cases_router loaded")
+except Exception as e:
+    print("[app] WARN: cases_router not loaded ->", e)
+
 try:
     from timeline_router import router as timeline_router
     app.include_router(timeline_router)
@@ -641,6 +849,13 @@ try:
 except Exception as e:
     print("[app] WARN: neptune_router not loaded ->", e)
 
+try:
+    from live_router import router as live_router
+    app.include_router(live_router)
+    print("[app] live_router loaded")
+except Exception as e:
+    print("[app] WARN: live_router not loaded ->", e)
+
 
 # ================================
 # Startup banner + data dir check
@@ -670,10 +885,22 @@ async def _startup_banner_and_check():
     for i, url in enumerate(FRONTEND_LINKS, 1):
         lines.append(f"  {i}. {url}")
     lines.append("")
-    if not _wx_is_configured():
-        lines.append("ℹ Granite summaries: DISABLED (set WATSONX_* env vars and install/update ibm-watsonx-ai)")
-        if WX_IMPORT_ERR:
-            lines.append(f"   - SDK import error: {WX_IMPORT_ERR}")
-    else:
-        lines.append(f"✅ Granite enabled → base={WATSONX_BASE_URL} model={WATSONX_MODEL_ID}")
+    lines.append(("ℹ " if llm_client.configured_mode()[0] == "off" else "✅ ") + llm_client.describe())
     _uvlog.info("\n".join(lines))
+
+
+# Built lazily on first use; warmed in the background once the port is open.
+warmup.register("mitre_index", lambda: _agent_tool("mitre_map_ibmrag").map_events_to_mitre([]))
+warmup.register("graphs", lambda: [_type_engine(t) for t in LOG_TYPES])
+warmup.register("llm", lambda: llm_client.get_client().warm())
+warmup.register("neptune", lambda: _agent_tool("neptune_client").warm())
+
+
+@app.on_event("startup")
+async def _start_warmup():
+    warmup.start()
+
+
+@app.on_event("shutdown")
+def _shutdown_executor():
+    execution.shutdown()
@@ -0,0 +1,77 @@
+"""
+Local stand-in model server for the LLM client (agent_tools.llm_client).
+
+Speaks the `http` backend protocol: POST /generate {"prompt", "model_id",
+"parameters"} -> {"text"}. Latency and a share of 429/503 answers can be
+injected to exercise rate limiting, retries and coalescing without watsonx.
+
+    python -m bench.llm_stub --port 8089 --latency 0.3 --fail 0.1
+    SENTINEL_LLM_URL=http://127.0.0.1:8089 uvicorn app:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+class _Handler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail = 0.0
+    calls = 0
+    _lock = threading.Lock()
+
+    def log_message(self, *args) -> None:  # keep benchmark output clean
+        pass
+
+    def _send(self, code: int, body: dict, headers: Optional[dict] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        self._send(200, {"calls": _Handler.calls})
+
+    def do_POST(self) -> None:
+        if self.path != "/generate":
+            return self._send(404, {"error": "not found"})
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        with _Handler._lock:
+            _Handler.calls += 1
+        time.sleep(self.latency)
+        if random.random() < self.fail:
+            code = random.choice((429, 503))
+            return self._send(code, {"error": "injected"}, {"Retry-After": "0.1"} if code == 429 else None)
+        prompt = body.get("prompt", "")
+        self._send(200, {"text": f"[stub {body.get('model_id')}] {len(prompt)} chars: {prompt[:80]}"})
+
+
+def serve(port: int = 8089, latency: float = 0.0, fail: float = 0.0) -> ThreadingHTTPServer:
+    """Start the stub in a background thread (handy from tests/benchmarks)."""
+    handler = type("Handler", (_Handler,), {"latency": latency, "fail": fail})
+    srv = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Stand-in LLM server for SentinelMind")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    ap.add_argument("--fail", type=float, default=0.0, help="share of requests answered 429/503")
+    args = ap.parse_args(argv)
+    _Handler.latency, _Handler.fail = args.latency, args.fail
+    print(f"llm stub on http://127.0.0.1:{args.port} (latency={args.latency}s fail={args.fail})")
+    ThreadingHTTPServer(("127.0.0.1", args.port), _Handler).serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
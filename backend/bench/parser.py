@@ -0,0 +1,123 @@
+"""
+Line parser micro-benchmark: split fast path vs the regex-only parser.
+
+Run from backend/:
+
+    python -m bench.parser --events 200000 --repeat 3 --junk 0.02
+
+The baseline is the previous parser (PAT_ARROW then PAT_SIMPLE on every
+line, uuid4 ids, validated Event(**...)). Both run on the same synthetic log
+with a fraction of `--junk` lines mixed in (unparseable, arrow-without-spaces
+and tab-separated lines, so the regex fallback is exercised too). The
+benchmark checks that both parsers produce the same (time, source, target,
+summary) sequence and reports the best of `--repeat` runs, once as is and
+once with the cyclic GC paused. Collections over the growing event list cost
+both parsers the same, so the second pair shows the parser's own cost.
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from bench.synthlog import SynthConfig, generate_text
+
+JUNK = ("-- MARK --", "kernel: [12.34] eth0 link up", "2025-08-25T10:00:00Z web01->db02: scp dump.sql",
+        "2025-08-25T10:00:00Z\tweb01\t:\tsession opened")
+
+
+def _baseline(lines: Iterable[str]) -> List[Any]:
+    from agent_tools.parser import PAT_ARROW, PAT_SIMPLE
+    from agent_tools.symbols import HOSTS
+    from schemas.models import Event
+    out = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        s = line.strip()
+        if not s:
+            continue
+        m = PAT_ARROW.match(s)
+        if m:
+            t, src, dst, msg = m.groups()
+        else:
+            m2 = PAT_SIMPLE.match(s)
+            if not m2:
+                continue
+            t, src, msg = m2.groups()
+            dst = src
+        src, dst = HOSTS.intern(src), HOSTS.intern(dst)
+        out.append(Event(id=str(uuid.uuid4()), time=t, source=src, target=dst, summary=msg, raw={"line": line}))
+    return out
+
+
+def _fast(lines: Iterable[str]) -> List[Any]:
+    from agent_tools.parser import parse_lines
+    return list(parse_lines(lines))
+
+
+def _best(fn, lines: List[str], repeat: int, collect: bool = True):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        out = None
+        gc.collect()
+        if not collect:
+            gc.disable()
+        try:
+            t0 = time.perf_counter()
+            out = fn(lines)
+            best = min(best, time.perf_counter() - t0)
+        finally:
+            gc.enable()
+    return best, out
+
+
+def run(events: int, repeat: int = 3, junk: float = 0.02, seed: int = 1337) -> Dict[str, Any]:
+    from agent_tools.parser import parse_stats
+    lines = generate_text(SynthConfig(events=events, seed=seed)).splitlines()
+    rng = random.Random(seed)
+    for _ in range(int(len(lines) * junk)):
+        lines.insert(rng.randrange(len(lines) + 1), rng.choice(JUNK))
+    before = parse_stats()
+    base_s, base = _best(_baseline, lines, repeat)
+    fast_s, fast = _best(_fast, lines, repeat)
+    after = parse_stats()
+    key = lambda evs: [(e.time, e.source, e.target, e.summary) for e in evs]
+    match, events = key(base) == key(fast), len(fast)
+    per_run = {k: (after[k] - before[k]) // repeat for k in ("fast", "regex", "unparsed")}
+    base = fast = None
+    base_nogc, _ = _best(_baseline, lines, repeat, collect=False)
+    fast_nogc, _ = _best(_fast, lines, repeat, collect=False)
+    n = len(lines)
+    return {
+        "lines": n, "events": events,
+        "baseline_s": round(base_s, 3), "fast_s": round(fast_s, 3),
+        "baseline_lines_per_s": round(n / base_s), "fast_lines_per_s": round(n / fast_s),
+        "speedup": round(base_s / fast_s, 2),
+        "baseline_nogc_s": round(base_nogc, 3), "fast_nogc_s": round(fast_nogc, 3),
+        "speedup_nogc": round(base_nogc / fast_nogc, 2), "match": match, **per_run,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the fast-path line parser against the regex-only parser")
+    ap.add_argument("--events", type=int, default=200000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--junk", type=float, default=0.02, help="fraction of non-canonical lines mixed in")
+    ap.add_argument("--seed", type=int, default=1337)
+    args = ap.parse_args(argv)
+
+    r = run(args.events, args.repeat, args.junk, args.seed)
+    print(f"lines {r['lines']:,}  events {r['events']:,}  (fast path {r['fast']:,}, regex {r['regex']:,}, "
+          f"unparsed {r['unparsed']:,})")
+    print(f"{'parser':<10}{'seconds':>10}{'lines/s':>14}")
+    print(f"{'regex':<10}{r['baseline_s']:>10.3f}{r['baseline_lines_per_s']:>14,}")
+    print(f"{'fast':<10}{r['fast_s']:>10.3f}{r['fast_lines_per_s']:>14,}")
+    print(f"speedup {r['speedup']}x (gc paused: {r['baseline_nogc_s']:.3f}s vs {r['fast_nogc_s']:.3f}s, "
+          f"{r['speedup_nogc']}x)  match {r['match']}")
+    return 0 if r["match"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
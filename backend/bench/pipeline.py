@@ -0,0 +1,192 @@
+"""
+Pipeline benchmark: times every stage on a synthetic log and writes JSON.
+
+Run from backend/:
+
+    python -m bench.pipeline --events 50000 --out bench_results.json
+    python -m bench.pipeline --events 50000 --baseline bench_results.json
+
+Each stage is timed on its own (perf_counter) and then re-run under
+tracemalloc for allocation numbers, so tracing overhead never pollutes the
+timings. Peak RSS is the process high-water mark after the stage.
+With --baseline, stages slower than --tolerance (default 10%) are listed
+and the exit code is 1.
+"""
+import argparse
+import copy
+import gc
+import json
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from bench.synthlog import SynthConfig, generate_text
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _measure(name: str, fn: Callable[[], Any], events: int, repeat: int, alloc: bool,
+             prepare: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    best = float("inf")
+    for _ in range(repeat):
+        if prepare:
+            prepare()
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    row: Dict[str, Any] = {
+        "stage": name,
+        "events": events,
+        "seconds": round(best, 6),
+        "events_per_sec": round(events / best, 1) if best > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    if alloc:
+        if prepare:
+            prepare()
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        current, peak = tracemalloc.get_traced_memory()
+        blocks = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+        tracemalloc.stop()
+        row.update({"alloc_peak_mb": round(peak / 2 ** 20, 2),
+                    "alloc_retained_mb": round(current / 2 ** 20, 2),
+                    "alloc_blocks": blocks})
+    return row
+
+
+def run(events: int = 10000, noise: float = 0.7, hosts: int = 50, seed: int = 1337,
+        repeat: int = 1, alloc: bool = True) -> Dict[str, Any]:
+    # imported here so `--help` stays fast and the generator is usable alone
+    import app as fm
+    from agent_tools.parser import parse_logs
+    from agent_tools.enrich import enrich_events
+    from agent_tools.anomaly import apply_rules
+    from agent_tools.mitre_map_ibmrag import map_events_to_mitre
+    from agent_tools.timeline import build_timeline
+    from agent_tools.graphify import timeline_to_graph
+    from agent_tools.granite_report_ibm import _local_html
+
+    text = generate_text(SynthConfig(events=events, noise=noise, hosts=hosts, seed=seed))
+    n = text.count("\n")
+    rows: List[Dict[str, Any]] = []
+    st: Dict[str, Any] = {}
+
+    def stage(name, fn, prepare=None):
+        rows.append(_measure(name, fn, n, repeat, alloc, prepare))
+
+    # --- agent_tools (ingest) pipeline; each stage gets a fresh copy of its input
+    st["parsed"] = parse_logs(text)
+    stage("parse_logs", lambda: parse_logs(text))
+
+    def prep(src, dst):
+        return lambda: st.__setitem__(dst, [e.model_copy(deep=True) for e in st[src]])
+
+    stage("enrich_events", lambda: enrich_events(st["in"]), prep("parsed", "in"))
+    st["enriched"] = enrich_events([e.model_copy(deep=True) for e in st["parsed"]])
+    stage("apply_rules", lambda: apply_rules(st["in"]), prep("enriched", "in"))
+    st["ruled"] = apply_rules([e.model_copy(deep=True) for e in st["enriched"]])
+    stage("map_events_to_mitre", lambda: map_events_to_mitre(st["in"]), prep("ruled", "in"))
+    st["mapped"] = map_events_to_mitre([e.model_copy(deep=True) for e in st["ruled"]])
+    stage("build_timeline", lambda: build_timeline(st["in"]), prep("mapped", "in"))
+    st["timeline"] = build_timeline([e.model_copy(deep=True) for e in st["mapped"]])
+    stage("timeline_to_graph", lambda: timeline_to_graph(st["timeline"]))
+    stage("report_local_html", lambda: _local_html(st["timeline"], []))
+
+    # --- ForensicMind (app.py) pipeline
+    st["fm_events"] = fm.fm_parse_lines(text)
+    stage("fm_parse_lines", lambda: fm.fm_parse_lines(text))
+    st["fm_enriched"] = fm.fm_enrich(st["fm_events"])
+    stage("fm_enrich", lambda: fm.fm_enrich(st["fm_events"]))
+    st["fm_mitre"] = fm.fm_mitre_map(st["fm_enriched"])
+    stage("fm_mitre_map", lambda: fm.fm_mitre_map(st["fm_enriched"]))
+    st["fm_timeline"] = fm.fm_make_timeline(st["fm_mitre"])
+    stage("fm_make_timeline", lambda: fm.fm_make_timeline(st["fm_mitre"]))
+    tl = st["fm_timeline"]
+    stage("fm_report_html", lambda: fm.fm_report_html(tl["timeline"], tl["iocs"], tl["mitre"]))
+
+    graph_events = [{"source": e.source, "target": e.target, "tactic": e.tactic,
+                     "technique": e.technique, "stepNum": e.stepNum} for e in st["timeline"].events]
+    stage("build_graph_from_events", lambda: fm._build_graph_from_events(copy.copy(graph_events)))
+
+    return {
+        "meta": {
+            "events": n,
+            "bytes": len(text.encode("utf-8")),
+            "noise": noise,
+            "hosts": hosts,
+            "seed": seed,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "stages": rows,
+        "total_seconds": round(sum(r["seconds"] for r in rows), 6),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Stages whose time grew by more than `tolerance` (fraction) vs baseline."""
+    old = {r["stage"]: r for r in baseline.get("stages", [])}
+    worse = []
+    for r in current["stages"]:
+        b = old.get(r["stage"])
+        if not b or not b.get("seconds"):
+            continue
+        ratio = r["seconds"] / b["seconds"]
+        if ratio > 1 + tolerance:
+            worse.append({"stage": r["stage"], "baseline_s": b["seconds"], "current_s": r["seconds"],
+                          "slowdown": round(ratio, 3)})
+    return worse
+
+
+def _print_table(res: Dict[str, Any]) -> None:
+    print(f"{'stage':<26}{'seconds':>10}{'events/s':>14}{'rss MB':>9}{'alloc MB':>10}")
+    for r in res["stages"]:
+        print(f"{r['stage']:<26}{r['seconds']:>10.4f}{(r['events_per_sec'] or 0):>14,.0f}"
+              f"{r['peak_rss_mb']:>9}{r.get('alloc_peak_mb', '-'):>10}")
+    print(f"{'total':<26}{res['total_seconds']:>10.4f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the SentinelMind pipeline stages")
+    ap.add_argument("--events", type=int, default=10000)
+    ap.add_argument("--noise", type=float, default=0.7)
+    ap.add_argument("--hosts", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=1337)
+    ap.add_argument("--repeat", type=int, default=1, help="best-of-N timing")
+    ap.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--out", help="write JSON results here")
+    ap.add_argument("--baseline", help="previous JSON results to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.10)
+    args = ap.parse_args(argv)
+
+    res = run(args.events, args.noise, args.hosts, args.seed, args.repeat, not args.no_alloc)
+    _print_table(res)
+    rc = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            worse = compare(res, json.load(f), args.tolerance)
+        res["regressions"] = worse
+        for w in worse:
+            print(f"REGRESSION {w['stage']}: {w['baseline_s']}s -> {w['current_s']}s (x{w['slowdown']})")
+        rc = 1 if worse else 0
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+        print(f"wrote {args.out}")
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
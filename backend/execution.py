@@ -0,0 +1,122 @@
+"""
+Execution layer for CPU-heavy pipeline work.
+
+Route handlers call `await run_heavy(fn, *args)` instead of running the
+parse/enrich/MITRE pipeline on the event loop thread. Work goes to a
+thread or process pool; admission control caps concurrent heavy jobs and
+the number waiting for a slot, answering 429 once both are full so light
+endpoints (/health, /graph, ...) keep being served.
+
+Env:
+  SENTINEL_EXEC_MODE       thread | process   (default thread)
+  SENTINEL_EXEC_WORKERS    pool size          (default 4)
+  SENTINEL_MAX_HEAVY_JOBS  concurrent jobs    (default 2)
+  SENTINEL_QUEUE_DEPTH     jobs allowed to wait for a slot (default 8)
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+try:
+    import profiling
+except Exception:
+    from backend import profiling  # type: ignore
+
+EXEC_MODE = os.getenv("SENTINEL_EXEC_MODE", "thread").lower()
+EXEC_WORKERS = int(os.getenv("SENTINEL_EXEC_WORKERS", "4"))
+MAX_HEAVY_JOBS = int(os.getenv("SENTINEL_MAX_HEAVY_JOBS", "2"))
+MAX_QUEUE_DEPTH = int(os.getenv("SENTINEL_QUEUE_DEPTH", "8"))
+
+RETRY_AFTER = "2"
+
+_pool: Optional[Executor] = None
+_slots: Optional[asyncio.Semaphore] = None
+_running = 0
+_waiting = 0
+_rejected = 0
+_completed = 0
+
+
+def _get_pool() -> Executor:
+    global _pool
+    if _pool is None:
+        if EXEC_MODE == "process":
+            _pool = ProcessPoolExecutor(max_workers=EXEC_WORKERS)
+        else:
+            _pool = ThreadPoolExecutor(max_workers=EXEC_WORKERS, thread_name_prefix="heavy")
+    return _pool
+
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(MAX_HEAVY_JOBS)
+    return _slots
+
+
+def check_capacity() -> None:
+    """Raise the 429 run_heavy would raise right now (for routes that answer before the work starts)."""
+    global _rejected
+    if _running + _waiting >= MAX_HEAVY_JOBS + MAX_QUEUE_DEPTH:
+        _rejected += 1
+        raise HTTPException(
+            status_code=429,
+            detail=f"Server busy: {_running} heavy jobs running, {_waiting} queued. Retry later.",
+            headers={"Retry-After": RETRY_AFTER},
+        )
+
+
+async def run_heavy(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run fn(*args, **kwargs) off the event loop; 429 if the heavy queue is full.
+
+    In process mode fn and its arguments/result must be picklable (module-level
+    functions, plain data).
+    """
+    global _running, _waiting, _completed
+    check_capacity()
+
+    slots = _get_slots()
+    _waiting += 1
+    try:
+        await slots.acquire()
+    finally:
+        _waiting -= 1
+    _running += 1
+    try:
+        loop = asyncio.get_running_loop()
+        session = profiling.current()
+        if session is None:
+            result = await loop.run_in_executor(_get_pool(), functools.partial(fn, *args, **kwargs))
+        else:
+            call = functools.partial(profiling.profiled_call, fn, *args, **kwargs)
+            result, raw = await loop.run_in_executor(_get_pool(), call)
+            session.worker_stats.append(raw)
+        _completed += 1
+        return result
+    finally:
+        _running -= 1
+        slots.release()
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "mode": EXEC_MODE,
+        "workers": EXEC_WORKERS,
+        "max_heavy_jobs": MAX_HEAVY_JOBS,
+        "max_queue_depth": MAX_QUEUE_DEPTH,
+        "running": _running,
+        "queued": _waiting,
+        "rejected": _rejected,
+        "completed": _completed,
+    }
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,266 @@
+"""
+Conditional GET + precompressed variants for large read endpoints.
+
+    return http_cache.respond(request, ("graph", t, level), version, lambda: payload)
+
+`version` is the caller's cheap content version (file mtime/size, a store write
+counter); when it is unchanged and the client sends a matching If-None-Match,
+the answer is a 304 without building or serializing anything. When the version
+is None the body is built and hashed on every request, and a matching ETag still
+saves the transfer. The ETag is a content hash of the uncompressed body,
+so compressed variants are cached per content rather than per route.
+Each encoding is compressed once, on first request, and kept in a byte-bounded
+LRU. Streamed bodies go through `tee`, which caches them once the stream ends, so
+the first load still streams and later loads come from the cache.
+
+Encodings: gzip always; br with `brotli`/`brotlicffi` installed; zstd with
+`zstandard` (or the Python 3.14 stdlib). Preference zstd > br > gzip, subject to
+the client's Accept-Encoding q-values.
+
+Env:
+  SENTINEL_HTTP_CACHE_MB     variant cache size (default 256)
+  SENTINEL_HTTP_MIN_COMPRESS bodies smaller than this are sent as is (default 1024)
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+try:
+    from metrics import stage
+except Exception:
+    from backend.metrics import stage  # type: ignore
+
+CACHE_BYTES = int(float(os.getenv("SENTINEL_HTTP_CACHE_MB", "256")) * (1 << 20))
+MIN_COMPRESS = int(os.getenv("SENTINEL_HTTP_MIN_COMPRESS", "1024"))
+
+_CODECS: Dict[str, Callable[[bytes], bytes]] = {"gzip": lambda b: gzip.compress(b, compresslevel=6, mtime=0)}
+try:
+    import brotli  # type: ignore
+except Exception:
+    try:
+        import brotlicffi as brotli  # type: ignore
+    except Exception:
+        brotli = None
+if brotli is not None:
+    _CODECS["br"] = lambda b: brotli.compress(b, quality=5)
+try:
+    import zstandard  # type: ignore
+    _CODECS["zstd"] = lambda b: zstandard.ZstdCompressor(level=10).compress(b)
+except Exception:
+    try:
+        from compression import zstd as _zstd  # type: ignore  # Python 3.14+
+        _CODECS["zstd"] = lambda b: _zstd.compress(b, level=10)
+    except Exception:
+        pass
+PREFERENCE = [c for c in ("zstd", "br", "gzip") if c in _CODECS]
+
+
+class _Entry:
+    __slots__ = ("etag", "media_type", "bodies", "size")
+
+    def __init__(self, etag: str, media_type: str, body: bytes):
+        self.etag = etag
+        self.media_type = media_type
+        self.bodies: Dict[str, bytes] = {"identity": body}
+        self.size = len(body)
+
+
+_lock = threading.Lock()
+_versions: "OrderedDict[Tuple[Hashable, Hashable], str]" = OrderedDict()  # (key, version) -> etag
+_entries: "OrderedDict[str, _Entry]" = OrderedDict()                        # etag -> variants
+_bytes = 0
+_stats = {"hits": 0, "misses": 0, "not_modified": 0, "compressed": 0}
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return {**_stats, "entries": len(_entries), "bytes": _bytes, "limit": CACHE_BYTES, "encodings": PREFERENCE}
+
+
+def clear() -> None:
+    global _bytes
+    with _lock:
+        _versions.clear()
+        _entries.clear()
+        _bytes = 0
+
+
+def negotiate(accept_encoding: Optional[str]) -> str:
+    """Best encoding we have that the client accepts (q > 0), else identity."""
+    if not accept_encoding:
+        return "identity"
+    q: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        q[name] = weight
+    best, best_q = "identity", 0.0
+    for enc in PREFERENCE:
+        w = q.get(enc, q.get("*", 0.0))
+        if w > best_q:
+            best, best_q = enc, w
+    return best
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        # variants share the content hash: "abc-gzip" revalidates "abc"
+        if tag.strip('"').split("-", 1)[0] == etag:
+            return True
+    return False
+
+
+def _encode(body: Any) -> bytes:
+    if isinstance(body, bytes):
+        return body
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _evict() -> None:
+    global _bytes
+    while _bytes > CACHE_BYTES and len(_entries) > 1:
+        _, old = _entries.popitem(last=False)
+        _bytes -= old.size
+
+
+def _store(key: Hashable, version: Hashable, body: bytes, media_type: str) -> _Entry:
+    global _bytes
+    etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+    with _lock:
+        if version is not None:
+            _versions[(key, version)] = etag
+            _versions.move_to_end((key, version))
+            while len(_versions) > 4096:
+                _versions.popitem(last=False)
+        entry = _entries.get(etag)
+        if entry is None:
+            entry = _Entry(etag, media_type, body)
+            if entry.size <= CACHE_BYTES:
+                _entries[etag] = entry
+                _bytes += entry.size
+                _evict()
+        else:
+            _entries.move_to_end(etag)
+        return entry
+
+
+def _lookup(key: Hashable, version: Hashable) -> Optional[_Entry]:
+    with _lock:
+        etag = _versions.get((key, version))
+        entry = _entries.get(etag) if etag else None
+        if entry is not None:
+            _entries.move_to_end(etag)
+        return entry
+
+
+def _variant(entry: _Entry, encoding: str) -> Tuple[str, bytes]:
+    global _bytes
+    body = entry.bodies["identity"]
+    if encoding == "identity" or len(body) < MIN_COMPRESS:
+        return "identity", body
+    data = entry.bodies.get(encoding)
+    if data is None:
+        with stage("http_compress", nbytes=len(body)):
+            data = _CODECS[encoding](body)
+        if len(data) >= len(body):
+            return "identity", body
+        with _lock:
+            if encoding not in entry.bodies:
+                entry.bodies[encoding] = data
+                entry.size += len(data)
+                _stats["compressed"] += 1
+                if entry.etag in _entries:
+                    _bytes += len(data)
+                    _evict()
+    return encoding, data
+
+
+def _headers(etag: str, encoding: str) -> Dict[str, str]:
+    h = {"ETag": f'"{etag}"' if encoding == "identity" else f'"{etag}-{encoding}"',
+         "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if encoding != "identity":
+        h["Content-Encoding"] = encoding
+    return h
+
+
+def _serve(request: Request, entry: _Entry) -> Response:
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if _matches(request.headers.get("if-none-match"), entry.etag):
+        with _lock:
+            _stats["not_modified"] += 1
+        if len(entry.bodies["identity"]) < MIN_COMPRESS:
+            encoding = "identity"
+        return Response(status_code=304, headers=_headers(entry.etag, encoding))
+    encoding, body = _variant(entry, encoding)
+    return Response(content=body, media_type=entry.media_type, headers=_headers(entry.etag, encoding))
+
+
+def cached(request: Request, key: Hashable, version: Hashable) -> Optional[Response]:
+    """The cached response (or 304) for key at this version, None on a miss."""
+    entry = _lookup(key, version) if version is not None else None
+    if entry is None:
+        return None
+    with _lock:
+        _stats["hits"] += 1
+    return _serve(request, entry)
+
+
+def respond(request: Request, key: Hashable, version: Hashable, build: Callable[[], Any],
+            media_type: str = "application/json") -> Response:
+    """Cached, negotiated response for `build()` (bytes, str or JSON-able), or a 304."""
+    hit = cached(request, key, version)
+    if hit is not None:
+        return hit
+    with _lock:
+        _stats["misses"] += 1
+    return _serve(request, _store(key, version, _encode(build()), media_type))
+
+
+def tee(key: Hashable, version: Hashable, chunks: Iterable[str], media_type: str) -> Iterator[str]:
+    """Pass a streamed body through; once complete it is cached for the next request."""
+    parts: List[str] = []
+    size, keep = 0, version is not None
+    for chunk in chunks:
+        if keep:
+            parts.append(chunk)
+            size += len(chunk)
+            if size > CACHE_BYTES:
+                keep, parts = False, []
+        yield chunk
+    if keep:
+        with _lock:
+            _stats["misses"] += 1
+        _store(key, version, "".join(parts).encode("utf-8"), media_type)
+
+
+def file_version(path) -> Optional[str]:
+    """mtime/size token for a file, None when it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
@@ -1,25 +1,238 @@
-from fastapi import APIRouter, UploadFile, File
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 
 from schemas.models import Timeline
-from agent_tools.parser import parse_logs
+from agent_tools.archive import BadArchive, iter_events
 from agent_tools.enrich import enrich_events
 from agent_tools.anomaly import apply_rules
 from agent_tools.mitre_map_ibmrag import map_events_to_mitre
 from agent_tools.timeline import build_timeline
 from agent_tools.graphify import timeline_to_graph
+from agent_tools import checkpoint, preview as preview_mode, shard
+from agent_tools.ioc_index import IOCIndex
+from execution import RETRY_AFTER, check_capacity, run_heavy
+from metrics import StageRecorder, record_samples
 
 router = APIRouter()
 
+OUT_DIR = Path(__file__).resolve().parents[1] / "data" / "out"
+JOBS_DIR = Path(os.getenv("SENTINEL_JOBS_DIR", str(OUT_DIR / "jobs")))
+JOBS_AUTORESUME = os.getenv("SENTINEL_JOBS_AUTORESUME", "1") == "1"
+JOBS_RETRY_MAX_S = float(os.getenv("SENTINEL_JOBS_RETRY_MAX_S", "60"))
+_active: Dict[str, "asyncio.Task"] = {}
+
 def _dump(model):
     return model.model_dump() if hasattr(model, "model_dump") else model.dict()
 
+def _write_json(path: Path, obj) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(obj, fh, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def save_latest(payload: dict, index: IOCIndex, rec: StageRecorder) -> None:
+    """Persist the case behind /timeline/latest, /graph/latest and /iocs (data/out/*_latest.json)."""
+    with rec.stage("persist", events=index.events):
+        OUT_DIR.mkdir(parents=True, exist_ok=True)
+        _write_json(OUT_DIR / "timeline_latest.json", payload["timeline"])
+        _write_json(OUT_DIR / "graph_latest.json", payload["graph"])
+        index.save(OUT_DIR / "iocs_latest.json")
+
+def run_ingest_pipeline(sources: List[Tuple[str, str]]):
+    """Whole parse → graph pipeline; runs in the heavy-job pool (keep picklable).
+
+    `sources` are (original filename, path on disk) pairs: plain logs, .gz,
+    .zip or tar bundles, decompressed as streams and merged by timestamp.
+    Returns (payload, stage samples) so stage metrics survive a process pool.
+    """
+    rec = StageRecorder()
+    nbytes = sum(os.path.getsize(p) for _, p in sources)
+    per_file = {}
+    with rec.stage("parse", nbytes=nbytes) as s:
+        events = []
+        for e in iter_events(sources):
+            f = e.raw.get("file")
+            per_file[f] = per_file.get(f, 0) + 1
+            events.append(e)
+        s.events = len(events)
+    n = len(events)
+    index = IOCIndex()
+    with rec.stage("enrich", events=n):
+        events = enrich_events(events, index)
+    with rec.stage("anomaly", events=n):
+        events = apply_rules(events)
+    with rec.stage("mitre", events=n):
+        events = map_events_to_mitre(events)
+    with rec.stage("timeline", events=n):
+        tl: Timeline = build_timeline(events)
+        index.resolve(tl.events)
+    with rec.stage("graphify", events=n):
+        graph = timeline_to_graph(tl)
+    payload = {"timeline": _dump(tl), "graph": _dump(graph), "files": per_file}
+    save_latest(payload, index, rec)
+    return {**payload, "iocs": index.overview()}, rec.samples
+
+def run_sharded_pipeline(sources: List[Tuple[str, str]]):
+    """run_ingest_pipeline on the shard workers; the IOC index is built from the merged timeline."""
+    payload, samples = shard.run_sharded(sources)
+    rec = StageRecorder()
+    events = payload["timeline"]["events"]
+    with rec.stage("ioc_index", events=len(events)):
+        index = IOCIndex.from_timeline(events)
+    save_latest(payload, index, rec)
+    return {**payload, "iocs": index.overview()}, samples + rec.samples
+
+async def spool_uploads(uploads: List[UploadFile], tmpdir: str) -> List[Tuple[str, str]]:
+    """Copy uploads to disk in 1 MiB chunks so workers (threads or processes) stream from paths."""
+    out = []
+    for i, up in enumerate(uploads):
+        name = os.path.basename(up.filename or f"upload-{i}")
+        path = os.path.join(tmpdir, f"{i}-{name}")
+        with open(path, "wb") as fh:
+            while chunk := await up.read(1 << 20):
+                fh.write(chunk)
+        out.append((name, path))
+    return out
+
 @router.post("/ingest")
-async def ingest(file: UploadFile = File(...)):
-    text = (await file.read()).decode("utf-8", errors="ignore")
-    events = parse_logs(text)
-    events = enrich_events(events)
-    events = apply_rules(events)
-    events = map_events_to_mitre(events)
-    tl: Timeline = build_timeline(events)
-    graph = timeline_to_graph(tl)
-    return {"timeline": _dump(tl), "graph": _dump(graph)}
+async def ingest(
+    file: Optional[UploadFile] = File(None),
+    files: List[UploadFile] = File(None),
+    preview: bool = Query(False, description="sampled first look instead of the full pipeline (agent_tools/preview.py)"),
+    sample: int = Query(preview_mode.SAMPLE, ge=10, le=100000, description="preview: lines kept per stratum"),
+    seconds: float = Query(preview_mode.SECONDS, gt=0, le=600, description="preview: scan budget"),
+    seed: Optional[int] = Query(None, description="preview: RNG seed for a reproducible sample"),
+):
+    """One or more logs or evidence bundles (.gz, .zip, .tar.gz) → timeline + graph."""
+    uploads = ([file] if file else []) + (files or [])
+    if not uploads:
+        raise HTTPException(400, "Upload at least one file (field 'file' or 'files').")
+    tmpdir = tempfile.mkdtemp(prefix="sentinel-ingest-")
+    try:
+        sources = await spool_uploads(uploads, tmpdir)
+        if preview:
+            payload, samples = await run_heavy(preview_mode.run_preview, sources, sample, seconds, seed)
+        else:
+            pipeline = run_sharded_pipeline if shard.SHARDS > 1 else run_ingest_pipeline
+            payload, samples = await run_heavy(pipeline, sources)
+    except BadArchive as e:
+        raise HTTPException(400, str(e))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    record_samples(samples)
+    return payload
+
+
+# ---------- resumable jobs for huge inputs (agent_tools/checkpoint.py) ----------
+
+def _job_dir(job_id: str) -> Path:
+    d = JOBS_DIR / os.path.basename(job_id)
+    if not (d / checkpoint.STATE).exists():
+        raise HTTPException(404, f"No ingest job {job_id!r}")
+    return d
+
+async def _run_job(job_dir: Path) -> None:
+    # the heavy queue can fill up between admission and start (or on boot):
+    # the job stays pending, the rejection goes into its state, and it retries with backoff
+    delay = float(RETRY_AFTER)
+    try:
+        while True:
+            try:
+                _, samples = await run_heavy(checkpoint.run_job, str(job_dir))
+            except HTTPException as e:
+                if e.status_code != 429:
+                    raise
+                await asyncio.to_thread(checkpoint.note_rejected, job_dir, e.detail, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, JOBS_RETRY_MAX_S)
+                continue
+            record_samples(samples)
+            return
+    finally:
+        _active.pop(job_dir.name, None)
+
+def _start(job_dir: Path) -> bool:
+    if job_dir.name in _active:
+        return False
+    _active[job_dir.name] = asyncio.create_task(_run_job(job_dir))
+    return True
+
+@router.post("/ingest/jobs", status_code=202)
+async def create_ingest_job(file: Optional[UploadFile] = File(None), files: List[UploadFile] = File(None)):
+    """Like /ingest, but checkpointed: returns a job id at once; poll GET /ingest/jobs/{id}."""
+    uploads = ([file] if file else []) + (files or [])
+    if not uploads:
+        raise HTTPException(400, "Upload at least one file (field 'file' or 'files').")
+    check_capacity()  # 429 before spooling, not a 202 for a job that cannot start
+    job_dir = JOBS_DIR / checkpoint.new_job_id()
+    (job_dir / "input").mkdir(parents=True)
+    sources = await spool_uploads(uploads, str(job_dir / "input"))
+    try:
+        state = await asyncio.to_thread(checkpoint.create_job, job_dir, sources)
+    except BadArchive as e:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise HTTPException(400, str(e))
+    try:
+        check_capacity()  # the queue may have filled while the upload was spooled
+    except HTTPException:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+    _start(job_dir)
+    return checkpoint.summary(state)
+
+@router.get("/ingest/jobs")
+def list_ingest_jobs():
+    out = []
+    for d in sorted(JOBS_DIR.glob("*/" + checkpoint.STATE)):
+        try:
+            out.append({**checkpoint.summary(checkpoint.load_state(d.parent)), "active": d.parent.name in _active})
+        except Exception:
+            continue
+    return {"jobs": out}
+
+@router.get("/ingest/jobs/{job_id}")
+def get_ingest_job(job_id: str):
+    d = _job_dir(job_id)
+    return {**checkpoint.summary(checkpoint.load_state(d)), "active": d.name in _active}
+
+@router.post("/ingest/jobs/{job_id}/resume", status_code=202)
+async def resume_ingest_job(job_id: str):
+    """Continue a failed or interrupted job from its last checkpoint."""
+    d = _job_dir(job_id)
+    if d.name not in _active:
+        check_capacity()
+    return {**checkpoint.summary(checkpoint.load_state(d)), "started": _start(d)}
+
+@router.get("/ingest/jobs/{job_id}/result")
+def get_ingest_job_result(job_id: str):
+    d = _job_dir(job_id)
+    res = d / checkpoint.RESULT
+    if not res.exists():
+        raise HTTPException(409, f"Job {job_id} is {checkpoint.load_state(d)['status']}; no result yet.")
+    return json.loads(res.read_text(encoding="utf-8"))
+
+@router.delete("/ingest/jobs/{job_id}")
+def delete_ingest_job(job_id: str):
+    d = _job_dir(job_id)
+    if d.name in _active:
+        raise HTTPException(409, f"Job {job_id} is running.")
+    shutil.rmtree(d, ignore_errors=True)
+    return {"deleted": job_id}
+
+@router.on_event("shutdown")
+def _stop_shard_workers():
+    shard.shutdown()
+
+@router.on_event("startup")
+async def _resume_interrupted_jobs():
+    # jobs left pending/running by a crash or restart continue from their checkpoints
+    if JOBS_AUTORESUME:
+        for d in checkpoint.unfinished(JOBS_DIR):
+            _start(Path(d))
@@ -0,0 +1,138 @@
+"""
+IOC pivots over the inverted index written at ingest (agent_tools/ioc_index.py).
+
+    GET /iocs?type=ip&q=203.&limit=50           ranked IOC summary
+    GET /iocs/{value}/events?offset=0&limit=100  events carrying one IOC
+
+Without `job` both read the latest /ingest case (data/out/iocs_latest.json +
+timeline_latest.json); `?job=<id>` reads a finished /ingest/jobs case.
+Index and timeline are loaded once per file version and kept in memory, so
+a pivot is a dict lookup and a slice of the posting list. Only the
+SENTINEL_IOC_CACHE_CASES most recently used cases (default 2) stay loaded;
+pivots on another job reload its files.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query
+
+from agent_tools import checkpoint
+from agent_tools.ioc_index import IOCIndex
+from ingest_router import OUT_DIR, JOBS_DIR
+from metrics import stage
+
+router = APIRouter()
+
+CACHE_CASES = max(1, int(os.getenv("SENTINEL_IOC_CACHE_CASES", "2")))
+
+_lock = threading.Lock()
+_index_cache: "OrderedDict[str, Tuple[str, IOCIndex]]" = OrderedDict()
+_events_cache: "OrderedDict[str, Tuple[str, List[Dict[str, Any]]]]" = OrderedDict()
+
+
+def _cached(cache: "OrderedDict[str, Tuple[str, Any]]", key: str, version: str) -> Any:
+    hit = cache.get(key)
+    if hit is None or hit[0] != version:
+        return None
+    cache.move_to_end(key)
+    return hit[1]
+
+
+def _keep(cache: "OrderedDict[str, Tuple[str, Any]]", key: str, version: str, value: Any) -> None:
+    cache[key] = (version, value)
+    cache.move_to_end(key)
+    while len(cache) > CACHE_CASES:
+        cache.popitem(last=False)
+
+
+def _version(path: Path) -> str:
+    try:
+        st = path.stat()
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    except OSError:
+        return "missing"
+
+
+def _case_files(job: Optional[str]) -> Tuple[Path, Path]:
+    """(index file, timeline file) of the latest case or of a finished job."""
+    if not job:
+        return OUT_DIR / "iocs_latest.json", OUT_DIR / "timeline_latest.json"
+    d = JOBS_DIR / Path(job).name
+    return d / checkpoint.IOCS, d / checkpoint.RESULT
+
+
+def _index(job: Optional[str]) -> IOCIndex:
+    path, _ = _case_files(job)
+    version = _version(path)
+    if version == "missing":
+        raise HTTPException(404, f"No IOC index for job {job!r}" if job else "No IOC index yet; call /ingest first.")
+    with _lock:
+        hit = _cached(_index_cache, str(path), version)
+        if hit is not None:
+            return hit
+        with stage("ioc_load"):
+            idx = IOCIndex.load(path)
+        _keep(_index_cache, str(path), version, idx)
+        return idx
+
+
+def _events(job: Optional[str]) -> List[Dict[str, Any]]:
+    _, path = _case_files(job)
+    version = _version(path)
+    if version == "missing":
+        raise HTTPException(404, "Case timeline is missing.")
+    with _lock:
+        hit = _cached(_events_cache, str(path), version)
+        if hit is not None:
+            return hit
+        # drop this case's stale timeline before parsing the new one, not after
+        _events_cache.pop(str(path), None)
+        with stage("ioc_load") as st:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            events = (data["timeline"] if job else data)["events"]
+            st.events = len(events)
+        _keep(_events_cache, str(path), version, events)
+        return events
+
+
+@router.get("/iocs")
+def list_iocs(
+    limit: int = Query(100, ge=1, le=10000),
+    offset: int = Query(0, ge=0),
+    type: Optional[str] = Query(None, description="ip|domain|hash|other"),
+    q: Optional[str] = Query(None, description="substring filter on the IOC value"),
+    job: Optional[str] = Query(None, description="ingest job id (default: latest /ingest)"),
+):
+    """IOCs ranked by number of events, with first/last seen."""
+    return _index(job).ranked(limit=limit, offset=offset, type=type, q=q)
+
+
+@router.get("/iocs/{value}/events")
+def ioc_events(
+    value: str,
+    limit: int = Query(100, ge=1, le=10000),
+    offset: int = Query(0, ge=0),
+    job: Optional[str] = Query(None, description="ingest job id (default: latest /ingest)"),
+):
+    """Every event touching one IOC, in timeline order (paged)."""
+    idx = _index(job)
+    entry = idx.lookup(value)
+    if entry is None:
+        raise HTTPException(404, f"IOC {value!r} not seen in this case")
+    events = _events(job)
+    if idx.events != len(events):
+        # index and timeline are separate files; between the two writes of an
+        # ingest their positions don't line up, so refuse rather than guess
+        raise HTTPException(
+            409, f"IOC index ({idx.events} events) and timeline ({len(events)} events) disagree; retry after ingest finishes"
+        )
+    page = entry["events"][offset:offset + limit]
+    return {
+        "value": value, "type": entry["type"], "count": entry["count"],
+        "first": entry["first"], "last": entry["last"], "offset": offset, "limit": limit,
+        "events": [events[i] for i in page],
+    }
@@ -0,0 +1,258 @@
+"""
+Live mode: follow data/{application,system,network}.log and push deltas.
+
+    ws://127.0.0.1:8000/live?types=application,network
+
+While at least one client is connected, every SENTINEL_LIVE_INTERVAL seconds
+the new lines of each file are run through enrich -> anomaly rules -> MITRE
+and clients receive
+    {"type": "delta", "log_type", "events", "nodes": [new nodes],
+     "edges": [new edges], "alerts": [...], "checkpoint": {...}}
+Offsets are checkpointed (data/out/live_checkpoints.json) once a delta has
+been published, so reconnecting or restarting resumes after the last
+delivered line instead of re-reading. A batch that fails is logged, counted
+in /live/status and retried from its checkpoint; after MAX_RETRIES failures
+in a row it is skipped so one bad batch cannot wedge the stream.
+"""
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from schemas.models import Event
+from agent_tools.tail import CheckpointStore, FileFollower
+from agent_tools.parser import parse_lines
+from agent_tools.enrich import enrich_events
+from agent_tools.anomaly import apply_rules
+from agent_tools.mitre_map_ibmrag import map_events_to_mitre
+from agent_tools.sigma import apply_sigma
+from metrics import stage
+
+router = APIRouter()
+
+# same files app.LOG_FILE_MAP serves on /graph
+DATA_DIR = Path(__file__).resolve().parent / "data"
+LIVE_FILES = {t: DATA_DIR / f"{t}.log" for t in ("application", "system", "network")}
+CHECKPOINTS = Path(os.getenv("SENTINEL_LIVE_CHECKPOINTS",
+                             str(Path(__file__).resolve().parents[1] / "data" / "out" / "live_checkpoints.json")))
+POLL_INTERVAL = float(os.getenv("SENTINEL_LIVE_INTERVAL", "1.0"))
+FROM_START = os.getenv("SENTINEL_LIVE_FROM", "end").lower() == "start"
+CLIENT_QUEUE = 256
+MAX_RETRIES = 3
+
+_log = logging.getLogger("uvicorn.error")
+
+
+class LiveStream:
+    """One followed file plus the state needed to emit deltas only."""
+
+    def __init__(self, log_type: str, path: Path, checkpoints: CheckpointStore):
+        self.log_type = log_type
+        self.follower = FileFollower(path, checkpoints, FROM_START)
+        self.fail_counts: Dict[str, int] = {}
+        self.nodes: Set[str] = set()
+        self.step = 0
+        self.events = 0
+        self.alerts = 0
+        self.skipped = 0        # lines that could not be turned into an event
+        self.errors = 0         # failed batches
+        self.failures = 0       # consecutive failures of the current batch
+        self.dropped_lines = 0  # lines of batches given up after MAX_RETRIES
+        self.last_error: Optional[str] = None
+        self._mark = None
+        self._lines = 0
+
+    def _event(self, line: str) -> Optional[Event]:
+        s = line.lstrip("\ufeff").strip()
+        if not s or s.startswith("#"):
+            return None
+        if s.startswith("{"):
+            try:
+                obj = json.loads(s)
+            except json.JSONDecodeError:
+                self.skipped += 1
+                return None
+            if not isinstance(obj, dict) or not obj.get("source") or not obj.get("target"):
+                self.skipped += 1
+                return None
+            try:
+                ev = Event(
+                    id=str(obj.get("id") or f"{self.log_type}-{self.step + 1}"),
+                    time=str(obj.get("time") or obj.get("timestamp") or ""),
+                    source=str(obj["source"]), target=str(obj["target"]),
+                    summary=str(obj.get("note") or obj.get("summary") or obj.get("message") or ""),
+                    raw={"line": s, "file": self.log_type, **obj},
+                    tactic=obj.get("tactic"), technique=obj.get("technique"),
+                    stepNum=int(obj.get("stepNum") or self.step + 1),
+                )
+            except (ValueError, TypeError, ValidationError):
+                # e.g. "stepNum": "abc" or a non-string tactic: skip the line, keep following
+                self.skipped += 1
+                return None
+            self.step += 1
+            return ev
+        ev = next(parse_lines([s], self.log_type), None)
+        if ev is None:
+            self.skipped += 1
+            return None
+        self.step += 1
+        ev.stepNum = self.step
+        return ev
+
+    def process(self) -> Optional[Dict[str, Any]]:
+        """Read new lines and turn them into a delta message (None if nothing new).
+
+        The read position is only checkpointed by commit(), after the caller has
+        published the delta; on an exception call failed() instead.
+        """
+        lines, self._mark = self.follower.poll()
+        self._lines = len(lines)
+        events = [e for e in (self._event(l) for l in lines) if e is not None]
+        if not events:
+            return None
+        with stage("live", events=len(events)):
+            events = enrich_events(events)
+            events = apply_rules(events, self.fail_counts)
+            unmapped = [e for e in events if not e.technique]
+            if unmapped:
+                map_events_to_mitre(unmapped, sigma=False)
+            # Sigma sees the whole batch (rule-tagged events too), as on /ingest
+            apply_sigma(events)
+
+        nodes, edges, alerts = [], [], []
+        for e in events:
+            for host, lbl in ((e.source, e.raw.get("source_label")), (e.target, e.raw.get("target_label"))):
+                if host not in self.nodes:
+                    self.nodes.add(host)
+                    nodes.append({"id": host, "label": lbl or host})
+            edges.append({"id": e.id, "source": e.source, "target": e.target, "stepNum": e.stepNum,
+                          "tactic": e.tactic or "Unknown", "technique": e.technique or "T0000"})
+            reasons = ((["ioc"] if e.iocs else []) + (["rule"] if "[rule:" in e.summary else [])
+                       + (["sigma"] if e.raw.get("sigma") else []))
+            if reasons:
+                alerts.append({"id": e.id, "time": e.time, "source": e.source, "target": e.target,
+                               "summary": e.summary, "iocs": e.iocs, "tactic": e.tactic,
+                               "technique": e.technique, "sigma": e.raw.get("sigma"), "reasons": reasons})
+        self.events += len(events)
+        self.alerts += len(alerts)
+        return {"type": "delta", "log_type": self.log_type, "events": len(events),
+                "nodes": nodes, "edges": edges, "alerts": alerts, "checkpoint": self.follower.status()}
+
+    def commit(self) -> None:
+        self.follower.commit(self._mark)
+        self.failures = 0
+
+    def failed(self, exc: BaseException) -> None:
+        """Count the error, then retry the batch on the next poll, or give up on it after MAX_RETRIES."""
+        self.errors += 1
+        self.failures += 1
+        self.last_error = f"{type(exc).__name__}: {exc}"
+        if self.failures >= MAX_RETRIES:
+            _log.error("[live] %s: skipping %d lines after %d failures: %s",
+                       self.log_type, self._lines, self.failures, self.last_error)
+            self.dropped_lines += self._lines
+            self.commit()
+        else:
+            _log.warning("[live] %s: batch failed (%d/%d), retrying: %s",
+                         self.log_type, self.failures, MAX_RETRIES, self.last_error)
+            self.follower.rewind()
+
+    def status(self) -> Dict[str, Any]:
+        return {**self.follower.status(), "events": self.events, "alerts": self.alerts, "nodes": len(self.nodes),
+                "skipped_lines": self.skipped, "errors": self.errors, "dropped_lines": self.dropped_lines,
+                "last_error": self.last_error}
+
+
+class LiveHub:
+    """Polls the files while anyone is listening and fans deltas out to clients."""
+
+    def __init__(self):
+        self.streams: Optional[Dict[str, LiveStream]] = None
+        self.clients: Dict["asyncio.Queue", Set[str]] = {}
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_streams(self) -> Dict[str, LiveStream]:
+        if self.streams is None:
+            store = CheckpointStore(CHECKPOINTS)
+            self.streams = {t: LiveStream(t, p, store) for t, p in LIVE_FILES.items()}
+        return self.streams
+
+    def subscribe(self, types: Set[str]) -> "asyncio.Queue":
+        self._ensure_streams()
+        q: "asyncio.Queue" = asyncio.Queue(maxsize=CLIENT_QUEUE)
+        self.clients[q] = types
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return q
+
+    def unsubscribe(self, q: "asyncio.Queue") -> None:
+        self.clients.pop(q, None)
+
+    def _publish(self, msg: Dict[str, Any]) -> None:
+        for q, types in list(self.clients.items()):
+            if msg["log_type"] not in types:
+                continue
+            if q.full():
+                # slow client: drop its oldest delta rather than stall everyone
+                q.get_nowait()
+                self.dropped += 1
+            q.put_nowait(msg)
+
+    async def _run(self) -> None:
+        while self.clients:
+            wanted = set().union(*self.clients.values())
+            for t, stream in self.streams.items():
+                if t not in wanted:
+                    continue
+                try:
+                    msg = await asyncio.to_thread(stream.process)
+                    if msg:
+                        self._publish(msg)
+                except Exception as e:
+                    stream.failed(e)
+                    continue
+                stream.commit()
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def status(self) -> Dict[str, Any]:
+        streams = self.streams or {}
+        return {"clients": len(self.clients), "dropped": self.dropped, "interval": POLL_INTERVAL,
+                "running": bool(self._task and not self._task.done()),
+                "streams": {t: s.status() for t, s in streams.items()}}
+
+
+hub = LiveHub()
+
+
+async def _pump(ws: WebSocket, q: "asyncio.Queue") -> None:
+    while True:
+        await ws.send_json(await q.get())
+
+
+@router.websocket("/live")
+async def live(ws: WebSocket, types: str = ""):
+    await ws.accept()
+    wanted = {t for t in types.split(",") if t in LIVE_FILES} or set(LIVE_FILES)
+    q = hub.subscribe(wanted)
+    sender = asyncio.create_task(_pump(ws, q))
+    try:
+        await ws.send_json({"type": "hello", "types": sorted(wanted), "interval": POLL_INTERVAL})
+        while True:
+            await ws.receive_text()  # clients may ping; we only care about disconnects
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        hub.unsubscribe(q)
+
+
+@router.get("/live/status")
+def live_status():
+    """Followed files, offsets, rotations and connected clients."""
+    return hub.status()
@@ -0,0 +1,218 @@
+"""
+Lightweight in-process metrics (no external deps).
+
+Route latencies are recorded into fixed-bucket histograms by the HTTP
+middleware in app.py and exposed on GET /stats/latency. Pipeline stages
+(parse, enrich, anomaly, mitre, timeline, graphify, report, llm,
+neptune_write) are timed with `stage()`; everything is rendered in
+Prometheus text format by `render_prometheus()` for GET /metrics.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# upper bounds in milliseconds; the last bucket is +Inf
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max, 3),
+            "buckets": {("+Inf" if i == len(self.buckets) else str(b)): c
+                        for i, (b, c) in enumerate(zip(self.buckets + (None,), self.counts))},
+        }
+
+
+ROUTE_LATENCY: Dict[str, Histogram] = {}
+_routes_lock = threading.Lock()
+
+
+def observe_route(method: str, path: str, seconds: float) -> None:
+    key = f"{method} {path}"
+    h = ROUTE_LATENCY.get(key)
+    if h is None:
+        with _routes_lock:
+            h = ROUTE_LATENCY.setdefault(key, Histogram())
+    h.observe(seconds * 1000.0)
+
+
+def route_latency_summary() -> Dict[str, Dict[str, object]]:
+    return {k: h.summary() for k, h in sorted(ROUTE_LATENCY.items())}
+
+
+# ---------- pipeline stages ----------
+
+class StageStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.events = 0
+        self.bytes = 0
+        self.errors = 0
+
+
+STAGES: Dict[str, StageStats] = {}
+_stages_lock = threading.Lock()
+
+
+def record_stage(name: str, seconds: float, events: int = 0, nbytes: int = 0, error: bool = False) -> None:
+    st = STAGES.get(name)
+    if st is None:
+        with _stages_lock:
+            st = STAGES.setdefault(name, StageStats())
+    st.latency.observe(seconds * 1000.0)
+    with _stages_lock:
+        st.events += events
+        st.bytes += nbytes
+        st.errors += 1 if error else 0
+
+
+class StageSample:
+    """Mutable handle yielded by stage(); set .events/.bytes before the block ends."""
+    __slots__ = ("name", "events", "bytes", "seconds", "error")
+
+    def __init__(self, name: str, events: int = 0, nbytes: int = 0):
+        self.name = name
+        self.events = events
+        self.bytes = nbytes
+        self.seconds = 0.0
+        self.error = False
+
+    def as_tuple(self) -> Tuple[str, float, int, int, bool]:
+        return (self.name, self.seconds, self.events, self.bytes, self.error)
+
+
+@contextmanager
+def _timed(name: str, events: int, nbytes: int, sink) -> Iterator[StageSample]:
+    sample = StageSample(name, events, nbytes)
+    t0 = time.perf_counter()
+    try:
+        yield sample
+    except BaseException:
+        sample.error = True
+        raise
+    finally:
+        sample.seconds = time.perf_counter() - t0
+        sink(sample.as_tuple())
+
+
+def stage(name: str, events: int = 0, nbytes: int = 0):
+    """Time a block and record it straight into the process registry."""
+    return _timed(name, events, nbytes, lambda s: record_stage(*s))
+
+
+def metered(name: str, chunks: Iterable[str], events: int = 0) -> Iterator[str]:
+    """Pass a chunk generator through, recording the stage when it is exhausted."""
+    with stage(name, events=events) as st:
+        for chunk in chunks:
+            st.bytes += len(chunk)
+            yield chunk
+
+
+class StageRecorder:
+    """Collects stage samples locally (e.g. inside a process-pool worker).
+
+    The samples are plain tuples, so they can travel back with the job
+    result and be replayed in the parent with record_samples().
+    """
+
+    def __init__(self):
+        self.samples: List[Tuple[str, float, int, int, bool]] = []
+
+    def stage(self, name: str, events: int = 0, nbytes: int = 0):
+        return _timed(name, events, nbytes, self.samples.append)
+
+
+def record_samples(samples: Optional[Iterable[Tuple[str, float, int, int, bool]]]) -> None:
+    for s in samples or ():
+        record_stage(*s)
+
+
+def stage_summary() -> Dict[str, Dict[str, object]]:
+    return {
+        k: {**st.latency.summary(), "events": st.events, "bytes": st.bytes, "errors": st.errors}
+        for k, st in sorted(STAGES.items())
+    }
+
+
+# ---------- Prometheus exposition ----------
+
+def _label(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _histogram_lines(name: str, labels: str, h: Histogram) -> List[str]:
+    out = []
+    cum = 0
+    for b, c in zip(h.buckets, h.counts):
+        cum += c
+        out.append(f'{name}_bucket{{{labels},le="{b / 1000.0:g}"}} {cum}')
+    out.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+    out.append(f"{name}_sum{{{labels}}} {h.total / 1000.0:.6f}")
+    out.append(f"{name}_count{{{labels}}} {h.count}")
+    return out
+
+
+def render_prometheus(extra_gauges: Optional[Dict[str, float]] = None) -> str:
+    lines = [
+        "# HELP sentinel_stage_duration_seconds Pipeline stage duration.",
+        "# TYPE sentinel_stage_duration_seconds histogram",
+    ]
+    for name, st in sorted(STAGES.items()):
+        lines += _histogram_lines("sentinel_stage_duration_seconds", f'stage="{_label(name)}"', st.latency)
+    for metric, attr, help_ in (
+        ("sentinel_stage_events_total", "events", "Events processed by a pipeline stage."),
+        ("sentinel_stage_bytes_total", "bytes", "Bytes handled by a pipeline stage (input size; rendered size for report)."),
+        ("sentinel_stage_errors_total", "errors", "Pipeline stage failures."),
+    ):
+        lines += [f"# HELP {metric} {help_}", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{stage="{_label(n)}"}} {getattr(st, attr)}' for n, st in sorted(STAGES.items())]
+
+    lines += [
+        "# HELP sentinel_http_request_duration_seconds HTTP request latency by route.",
+        "# TYPE sentinel_http_request_duration_seconds histogram",
+    ]
+    for key, h in sorted(ROUTE_LATENCY.items()):
+        method, _, path = key.partition(" ")
+        lines += _histogram_lines("sentinel_http_request_duration_seconds",
+                                  f'method="{_label(method)}",route="{_label(path)}"', h)
+
+    for name, value in sorted((extra_gauges or {}).items()):
+        lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
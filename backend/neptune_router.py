@@ -1,41 +1,80 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
 from schemas.models import NeptuneWriteRequest
+from metrics import stage
+import http_cache
 
 router = APIRouter()
 
-# Try to use your real Neptune client if present
+# AWS Neptune when NEPTUNE_ENDPOINT is set, else the embedded SQLite store
+# (agent_tools/graph_store.py): same graph_write/graph_read, durable across restarts.
+from agent_tools import graph_store
 try:
-    from agent_tools.neptune_client import graph_write, graph_read  # type: ignore
-    _has_neptune = True
+    from agent_tools import neptune_client  # type: ignore
+    _has_neptune = bool(neptune_client.BASE)
 except Exception as _e:
     _has_neptune = False
-    _memory_graph = {"nodes": [], "edges": []}
-    def graph_write(events):
-        # very small in-memory demo graph
-        nodes = {}
-        edges = []
-        for e in events:
-            nodes[e.source] = {"id": e.source, "label": e.source}
-            nodes[e.target] = {"id": e.target, "label": e.target}
-            edges.append({
-                "id": e.id, "source": e.source, "target": e.target,
-                "label": (e.summary or "")[:120],
-                "tactic": e.tactic, "technique": e.technique,
-                "stepNum": e.stepNum or 0
-            })
-        _memory_graph["nodes"] = list(nodes.values())
-        _memory_graph["edges"] = edges
-        return _memory_graph
-    def graph_read():
-        return _memory_graph
+
+if _has_neptune:
+    graph_write, graph_read = neptune_client.graph_write, neptune_client.graph_read
+else:
+    graph_write, graph_read = graph_store.graph_write, graph_store.graph_read
+
+def _local_store():
+    if _has_neptune:
+        raise HTTPException(status_code=501, detail="Not available with AWS Neptune; query Neptune directly.")
+    return graph_store.get_store()
 
 @router.post("/neptune/graph-write")
-def neptune_write(req: NeptuneWriteRequest):
+def neptune_write(
+    req: NeptuneWriteRequest,
+    summary: bool = Query(False, description="return counts instead of the whole graph"),
+    replace: bool = Query(False, description="local store: wipe the graph and bulk-load these events"),
+):
     if not req.events:
         raise HTTPException(status_code=400, detail="No events provided")
-    g = graph_write(req.events)
+    if replace and _has_neptune:
+        raise HTTPException(status_code=501, detail="replace is only supported by the local graph store.")
+    with stage("neptune_write", events=len(req.events)):
+        if _has_neptune:
+            g = graph_write(req.events)
+        else:
+            store = graph_store.get_store()
+            # big batches skip per-row index maintenance: indexes are rebuilt once
+            bulk = replace or len(req.events) >= graph_store.BULK_MIN
+            counts = store.bulk_load(req.events, replace=replace) if bulk else store.upsert(req.events)
+            if summary:
+                return {"ok": True, "bulk": bulk, **counts}
+            g = graph_read()
     return g
 
 @router.get("/neptune/graph-read")
-def neptune_read():
-    return graph_read()
+def neptune_read(request: Request):
+    # local store: a write counter + file stat version skips the read on repeat loads;
+    # Neptune has no cheap version, so the body is re-read but a matching ETag still answers 304
+    version = None if _has_neptune else graph_store.get_store().version()
+    return http_cache.respond(request, ("neptune-read",), version, graph_read)
+
+@router.get("/neptune/neighborhood")
+def neptune_neighborhood(
+    node: str,
+    depth: int = Query(1, ge=0, le=6),
+    after: Optional[int] = Query(None, description="only edges with stepNum >= after"),
+    direction: str = Query("both", description="out|in|both"),
+    limit: int = Query(5000, ge=1, le=100000),
+):
+    """Nodes within `depth` hops of `node` (local store only)."""
+    try:
+        res = _local_store().neighborhood(node, depth, after, direction, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not res["found"]:
+        raise HTTPException(status_code=404, detail=f"Unknown node '{node}'")
+    return res
+
+@router.get("/neptune/stats")
+def neptune_stats():
+    if _has_neptune:
+        return {"backend": "neptune", "endpoint": neptune_client.NEPTUNE_ENDPOINT}
+    return {"backend": "sqlite", **graph_store.get_store().stats()}
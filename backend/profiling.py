@@ -0,0 +1,107 @@
+"""
+Opt-in per-request profiling.
+
+Enabled with SENTINEL_PROFILING=1; a request then asks for it with the
+`X-Profile: 1` header (or `?profile=1`). The request runs under cProfile
+and tracemalloc, and a compact summary (top functions by cumulative time,
+allocation peak) comes back in the `X-Profile` response header.
+
+Heavy jobs run in the worker pool, so execution.run_heavy() profiles them
+there via `profiled_call` and merges the stats into the request's session.
+Concurrent profiled requests share tracemalloc; numbers are indicative.
+"""
+import contextvars
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROFILING_ENABLED = os.getenv("SENTINEL_PROFILING", "0") == "1"
+PROFILE_TOP = int(os.getenv("SENTINEL_PROFILE_TOP", "8"))
+
+
+class _RawStats:
+    """Adapter so pstats.Stats can load a plain stats dict (e.g. from a worker process)."""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class ProfileSession:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.worker_stats: List[Dict] = []
+        self.started = time.perf_counter()
+        self._own_tracemalloc = False
+
+    def __enter__(self) -> "ProfileSession":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+        tracemalloc.reset_peak()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.profile.disable()
+        self.alloc_current, self.alloc_peak = tracemalloc.get_traced_memory()
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+        self.elapsed = time.perf_counter() - self.started
+
+    def summary(self, top: int = PROFILE_TOP) -> Dict[str, Any]:
+        st = pstats.Stats(self.profile)
+        for ws in self.worker_stats:
+            st.add(_RawStats(ws))
+        rows = sorted(st.stats.items(), key=lambda kv: kv[1][3], reverse=True)  # cumulative time
+        funcs = []
+        for (fname, line, func), (_cc, ncalls, _tt, ct, _callers) in rows:
+            if func.startswith("<") and fname == "~":
+                continue  # builtins like <method 'enable'>
+            funcs.append(f"{os.path.basename(fname)}:{line}({func}) {ct * 1000:.1f}ms x{ncalls}")
+            if len(funcs) >= top:
+                break
+        return {
+            "wall_ms": round(self.elapsed * 1000, 1),
+            "alloc_peak_kb": round(self.alloc_peak / 1024, 1),
+            "top_cumulative": funcs,
+        }
+
+    def header_value(self) -> str:
+        # headers must be latin-1; keep it to one compact ASCII line
+        return json.dumps(self.summary(), ensure_ascii=True, separators=(",", ":"))
+
+
+_current: contextvars.ContextVar[Optional[ProfileSession]] = contextvars.ContextVar("sentinel_profile", default=None)
+
+
+def wants_profile(headers, query_params) -> bool:
+    if not PROFILING_ENABLED:
+        return False
+    return headers.get("x-profile") in ("1", "true") or query_params.get("profile") in ("1", "true")
+
+
+def start(session: ProfileSession):
+    return _current.set(session)
+
+
+def reset(token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[ProfileSession]:
+    return _current.get()
+
+
+def profiled_call(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, Dict]:
+    """Run fn under a fresh cProfile (works in worker threads/processes); returns (result, raw stats)."""
+    prof = cProfile.Profile()
+    result = prof.runcall(fn, *args, **kwargs)
+    prof.create_stats()
+    return result, prof.stats
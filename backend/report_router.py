@@ -1,11 +1,15 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from schemas.models import ReportRequest, ReportResponse, Timeline
 from pathlib import Path
 import json
 
 # Granite / fallback report generator
+from agent_tools import granite_report_ibm
 from agent_tools.granite_report_ibm import generate_report_html
+from agent_tools.report_stream import iter_local_report
+from metrics import stage, metered
+import http_cache
 
 router = APIRouter()
 
@@ -15,17 +19,35 @@ def _dump(m):
 @router.post("/report", response_model=ReportResponse)
 def make_report(req: ReportRequest):
     """Generate a report from a timeline + IOCs."""
-    html = generate_report_html(req.timeline, req.iocs)
+    with stage("report", events=len(req.timeline.events)) as s:
+        html = generate_report_html(req.timeline, req.iocs)
+        s.bytes = len(html)
     return {"html": html}
 
 @router.get("/report/html-latest")
-def report_html_latest():
+def report_html_latest(request: Request):
     """Generate a report using the latest ingested timeline (saved on disk)."""
     p = Path(__file__).resolve().parents[1] / "data" / "out" / "timeline_latest.json"
-    if not p.exists():
+    version = http_cache.file_version(p)
+    if version is None:
         raise HTTPException(404, "No timeline_latest.json; call /ingest first.")
-    
+    # rebuilt only when the timeline changes; repeat loads get 304 or a cached compressed copy
+    configured = granite_report_ibm.is_configured()
+    key = ("report-latest", configured)
+    hit = http_cache.cached(request, key, version)
+    if hit is not None:
+        return hit
+
     data = json.loads(p.read_text(encoding="utf-8"))
     tl = Timeline(**data)
-    html = generate_report_html(tl, [])
-    return HTMLResponse(content=html, status_code=200)
+    if not configured:
+        # local report: stream it page by page instead of building one string
+        chunks = metered("report", iter_local_report(tl), events=len(tl.events))
+        media = "text/html; charset=utf-8"
+        return StreamingResponse(http_cache.tee(key, version, chunks, media), media_type=media)
+    with stage("report", events=len(tl.events)) as s:
+        html, fell_back = granite_report_ibm.generate_report(tl, [])
+        s.bytes = len(html)
+    # a local fallback after a Granite error is served but not cached under the Granite key
+    return http_cache.respond(request, key, None if fell_back else version, lambda: html,
+                              media_type="text/html; charset=utf-8")
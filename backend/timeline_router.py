@@ -1,4 +1,4 @@
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
 from schemas.models import Timeline
 from agent_tools.parser import parse_logs
@@ -6,46 +6,80 @@ from agent_tools.enrich import enrich_events
 from agent_tools.anomaly import apply_rules
 from agent_tools.mitre_map_ibmrag import map_events_to_mitre
 from agent_tools.timeline import build_timeline
+from agent_tools.preview import run_preview
+from agent_tools.archive import BadArchive
+from ingest_router import spool_uploads
+from execution import run_heavy
+from metrics import StageRecorder, record_samples
+import http_cache
 from pathlib import Path
-import json
+import shutil
+import tempfile
 
 router = APIRouter()
 
 def _dump(m): 
     return m.model_dump() if hasattr(m, "model_dump") else m.dict()
 
-@router.post("/timeline")
-async def build(file: UploadFile = File(...)):
+# own path: app.py's POST /timeline (JSON events) is registered first and would shadow a multipart upload
+@router.post("/timeline/upload")
+async def build(file: UploadFile = File(...), preview: bool = Query(False, description="sampled first look (agent_tools/preview.py)")):
     """
     Upload a log file → parse, enrich, map to MITRE, and build a timeline.
-    Returns the timeline as JSON.
+    Returns the timeline as JSON. With ?preview=1 the upload is spooled to
+    disk and only sampled; the response adds estimates (see /ingest?preview=1).
     """
-    text = (await file.read()).decode("utf-8", errors="ignore")
-    events = parse_logs(text)
-    events = enrich_events(events)
-    events = apply_rules(events)
-    events = map_events_to_mitre(events)
-    tl: Timeline = build_timeline(events)
-    return {"timeline": _dump(tl)}
+    if preview:
+        tmpdir = tempfile.mkdtemp(prefix="sentinel-preview-")
+        try:
+            sources = await spool_uploads([file], tmpdir)
+            payload, samples = await run_heavy(run_preview, sources)
+        except BadArchive as e:
+            raise HTTPException(400, str(e))
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+    else:
+        payload, samples = await run_heavy(run_timeline_pipeline, await file.read())
+    record_samples(samples)
+    return payload
+
+def run_timeline_pipeline(data: bytes):
+    """parse → enrich → rules → MITRE → timeline; runs in the heavy-job pool."""
+    rec = StageRecorder()
+    with rec.stage("parse", nbytes=len(data)) as s:
+        events = parse_logs(data.decode("utf-8", errors="ignore"))
+        s.events = len(events)
+    n = len(events)
+    with rec.stage("enrich", events=n):
+        events = enrich_events(events)
+    with rec.stage("anomaly", events=n):
+        events = apply_rules(events)
+    with rec.stage("mitre", events=n):
+        events = map_events_to_mitre(events)
+    with rec.stage("timeline", events=n):
+        tl: Timeline = build_timeline(events)
+    return {"timeline": _dump(tl)}, rec.samples
+
+def _latest_file(request: Request, name: str):
+    # the file already is the JSON body: served as bytes, with ETag/304 and compression (http_cache)
+    p = Path(__file__).resolve().parents[1] / "data" / "out" / name
+    version = http_cache.file_version(p)
+    if version is None:
+        return None
+    return http_cache.respond(request, ("latest", name), version, p.read_bytes)
 
 @router.get("/timeline/latest")
-def get_latest_timeline():
+def get_latest_timeline(request: Request):
     """
     Get the most recently ingested timeline (from disk).
     Created automatically when /ingest is called.
     """
-    p = Path(__file__).resolve().parents[1] / "data" / "out" / "timeline_latest.json"
-    if not p.exists():
-        return JSONResponse({"error": "no timeline yet"}, status_code=404)
-    return json.loads(p.read_text(encoding="utf-8"))
+    return _latest_file(request, "timeline_latest.json") or JSONResponse({"error": "no timeline yet"}, status_code=404)
 
 @router.get("/graph/latest")
-def get_latest_graph():
+def get_latest_graph(request: Request):
     """
     Get the most recently ingested graph (from disk).
     Created automatically when /ingest is called.
     """
-    p = Path(__file__).resolve().parents[1] / "data" / "out" / "graph_latest.json"
-    if not p.exists():
-        return JSONResponse({"error": "no graph yet"}, status_code=404)
-    return json.loads(p.read_text(encoding="utf-8"))
+    return _latest_file(request, "graph_latest.json") or JSONResponse({"error": "no graph yet"}, status_code=404)
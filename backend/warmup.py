@@ -0,0 +1,73 @@
+"""
+Post-start warm-up.
+
+SDKs, numpy-backed modules, the MITRE index and LLM/Neptune sessions are
+built on first use so a cold worker imports fast and binds its port early.
+Right after start-up this module builds them anyway, in a background
+thread, so the first real requests do not pay for it either.
+
+    warmup.register("mitre_index", lambda: map_events_to_mitre([]))
+    @app.on_event("startup")
+    async def _warm(): warmup.start()
+
+Env:
+  SENTINEL_WARMUP        1 | 0             (default 1)
+  SENTINEL_WARMUP_DELAY  seconds to wait before starting, so uvicorn can
+                         finish start-up and open the port (default 0.2)
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from metrics import stage
+except Exception:
+    from backend.metrics import stage  # type: ignore
+
+WARMUP = os.getenv("SENTINEL_WARMUP", "1") == "1"
+DELAY = float(os.getenv("SENTINEL_WARMUP_DELAY", "0.2"))
+
+_log = logging.getLogger("uvicorn.error")
+_tasks: List[Tuple[str, Callable[[], Any]]] = []
+_status: Dict[str, Any] = {"state": "off" if not WARMUP else "pending", "tasks": {}}
+_task: Optional["asyncio.Task"] = None
+
+
+def register(name: str, fn: Callable[[], Any]) -> None:
+    _tasks.append((name, fn))
+
+
+def run_all() -> Dict[str, Any]:
+    """Run every registered task once; a failing task is recorded, not raised."""
+    _status["state"] = "running"
+    t_all = time.perf_counter()
+    for name, fn in _tasks:
+        t0 = time.perf_counter()
+        try:
+            with stage("warmup"):
+                fn()
+            _status["tasks"][name] = {"ok": True, "seconds": round(time.perf_counter() - t0, 4)}
+        except Exception as e:
+            _status["tasks"][name] = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    _status.update(state="done", seconds=round(time.perf_counter() - t_all, 4))
+    _log.info(f"warm-up done in {_status['seconds']}s: " +
+              ", ".join(f"{k}={'ok' if v['ok'] else 'failed'}" for k, v in _status["tasks"].items()))
+    return _status
+
+
+async def _later() -> None:
+    await asyncio.sleep(DELAY)
+    await asyncio.to_thread(run_all)
+
+
+def start() -> None:
+    """Schedule the warm-up from a startup hook (returns immediately)."""
+    global _task
+    if WARMUP and _task is None:
+        _task = asyncio.create_task(_later())
+
+
+def status() -> Dict[str, Any]:
+    return _status
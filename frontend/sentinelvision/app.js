@@ -1,5 +1,13 @@
+const API = 'http://127.0.0.1:8000';
+
+// super-nodes the user has opened; the server keeps them unfolded so edges
+// between two expanded clusters point at their real members
+const expanded = new Set();
+
 async function fetchGraph() {
-  const res = await fetch('http://127.0.0.1:8000/graph');
+  // coarse level first: super-nodes + collapsed parallel edges
+  const open = [...expanded].map(encodeURIComponent).join(',');
+  const res = await fetch(`${API}/graph?level=0&layout=force${open ? '&expanded='+open : ''}`);
   return await res.json();
 }
 
@@ -11,11 +19,25 @@ const colorByTactic = (t) => ({
 
 let cy, edges = [];
 
+const edgeKey = (e) => e.source+"->"+e.target+"#"+e.stepNum;
+const nodeEl = (n) => ({ data: { id: n.id, label: n.cluster ? n.label : n.id, cluster: !!n.cluster },
+                          position: n.x != null ? { x: n.x, y: n.y } : undefined });
+// positions come precomputed from the backend; only fall back to cose without them
+const layoutFor = (nodes) => nodes.length && nodes.every(n => n.x != null) ? { name: 'preset' } : { name: 'cose', animate: true };
+const edgeEl = (e) => ({ data: { id: edgeKey(e), source: e.source, target: e.target, color: colorByTactic(e.tactic), stepNum: e.stepNum, label: (e.tactic||"-")+"/"+(e.technique||"-")+(e.weight>1 ? " x"+e.weight : "") } });
+
+async function expand(id) {
+  expanded.add(id);
+  const g = await fetchGraph();
+  initCy(g.nodes || [], g.edges || []);
+}
+
 function initCy(nodes, edgesIn) {
+  if (cy) cy.destroy();
   const elements = [];
-  nodes.forEach(n => elements.push({ data: { id: n.id, label: n.id } }));
+  nodes.forEach(n => elements.push(nodeEl(n)));
   edges = edgesIn.sort((a,b)=> (a.stepNum||0) - (b.stepNum||0));
-  edges.forEach(e => elements.push({ data: { id: e.source+"->"+e.target+"#"+e.stepNum, source: e.source, target: e.target, color: colorByTactic(e.tactic), stepNum: e.stepNum, label: (e.tactic||"-")+"/"+(e.technique||"-") } }));
+  edges.forEach(e => elements.push(edgeEl(e)));
 
   cy = cytoscape({
     container: document.getElementById('graph'),
@@ -24,12 +46,14 @@ function initCy(nodes, edgesIn) {
       { selector: 'node', style: { 'label': 'data(label)', 'text-valign':'center', 'color':'#111', 'background-color':'#e5e7eb', 'border-color':'#111', 'border-width':1, 'width':36, 'height':36, 'font-size':10 } },
       { selector: 'edge', style: { 'curve-style':'bezier', 'target-arrow-shape':'triangle', 'line-color':'#94a3b8', 'target-arrow-color':'#94a3b8', 'width':2, 'label':'data(label)', 'font-size':8, 'text-background-opacity':1, 'text-background-color':'#fff', 'text-background-padding':2 } },
     ],
-    layout: { name: 'cose', animate: true }
+    layout: layoutFor(nodes)
   });
+  cy.on('dbltap', 'node[?cluster]', (evt) => expand(evt.target.id()));
 }
 
 async function loadGraph() {
   document.getElementById('status').innerText = "Loading...";
+  expanded.clear();
   const g = await fetchGraph();
   initCy(g.nodes || [], g.edges || []);
   document.getElementById('status').innerText = "Graph loaded";
@@ -38,7 +62,7 @@ async function loadGraph() {
 async function play() {
   if (!cy) return;
   for (const e of edges) {
-    const id = e.source+"->"+e.target+"#"+e.stepNum;
+    const id = edgeKey(e);
     cy.$('edge').style({'line-color':'#94a3b8','target-arrow-color':'#94a3b8'});
     cy.$(`#${CSS.escape(id)}`).style({'line-color': e.color || colorByTactic(e.tactic), 'target-arrow-color': e.color || colorByTactic(e.tactic), 'width':4});
     await new Promise(r => setTimeout(r, 900));
@@ -21,6 +21,10 @@ R=$(curl -s -X POST -H 'Content-Type: application/json' -d "$T" $BACKEND/report)
 echo "$R" | jq -r .html > forensicmind.html
 echo "Report written to forensicmind.html"
 
+echo "5b) offline export bundle"
+curl -s -X POST -H 'Content-Type: application/json' -d "$T" $BACKEND/report/export -o forensicmind-report.zip
+echo "Bundle written to forensicmind-report.zip (unzip and open index.html)"
+
 echo "6) graph-write (Neptune)"
 curl -s -X POST -H 'Content-Type: application/json' -d "$T" $BACKEND/graph-write >/dev/null
 echo "Graph written"